@@ -1,7 +1,12 @@
+import hashlib
 from collections import namedtuple
+from copy import copy
+from bisect import bisect_left
 
 import numpy
 
+from rendering import PathView
+
 class Algorithm(object):
     """Base class for algorithms that know about their parameters."""
 
@@ -41,26 +46,123 @@ class PathAlgorithm(Algorithm):
         """Find a ``Path`` through the given ``source_keypoints`` that approximates the given ``target_keypoints``."""
         raise NotImplementedError
 
+    def get_statistics(self):
+        """Return a dictionary of statistics about the last call, which is stored in the path file. Override this in subclasses."""
+        return {}
+
 class PiecewisePathAlgorithm(PathAlgorithm):
-    """Base class for path search algorithms that only look at two keypoints at a time."""
+    """Base class for path search algorithms that only look at two keypoints at a time.
+
+    Pieces are solved with their nominal target durations, the differences of the target keypoints, as long as the duration of the path
+    before them deviates from the target keypoints by at most ``drift_tolerance`` samples; otherwise, and always for the last piece, with
+    the target duration that makes up for the deviation (see ``reconcile()``). With the default of 0, every piece makes up for the pieces
+    before it.
+
+    If ``piece_cache`` is set to an ``ArtifactCache``, the path found for each piece is stored there and reused in later runs for pieces
+    with the same keypoints, target duration, cuts, algorithm and parameters. The cache does not change the path that is found. With a
+    ``drift_tolerance`` above 0, moving one keypoint only changes the pieces next to it, unless that makes the deviation exceed it.
+
+    ``warm_start`` may be set to a ``Path`` from an earlier run, e.g. with slightly different keypoints. Algorithms can take the part of it
+    between two keypoints from ``warm_piece()`` as a starting point.
+    """
 
     abstract = None
 
+    piece_cache = None
+
+    drift_tolerance = 0
+
+    warm_start = None
+
     def __call__(self, source_keypoints, target_keypoints, cuts):
-        """Find a path by successively calling ``find_path()``."""
+        """Find a path by successively calling ``find_piece()``."""
+        fingerprint = cuts_fingerprint(cuts) if self.piece_cache is not None else None
+        return self.reconcile(nominal_pieces(source_keypoints, target_keypoints), None, target_keypoints, cuts, fingerprint)[0]
+
+    def reconcile(self, pieces, piece_paths, target_keypoints, cuts, fingerprint=None):
+        """Join the paths of ``pieces`` (from ``nominal_pieces()``) that have been solved with their nominal target durations, or solve
+        them with ``find_piece()`` if ``piece_paths`` is ``None``.
+
+        Each piece before which the duration of the joined path deviates from the target keypoints by more than ``drift_tolerance``
+        samples is solved again with the target duration it has when solving sequentially; the last one after any deviation, as no later
+        piece can make up for it. Return the path and the number of pieces solved with other than their nominal target durations.
+        """
         path = Path()
-        for source_start, source_end, target_end in zip(source_keypoints, source_keypoints[1:], target_keypoints[1:]):
-            path += self.find_path(source_start, source_end, target_end - path.duration, cuts)
+        num_solved_again = 0
+        for i, (source_start, source_end, nominal_duration) in enumerate(pieces):
+            target_duration = target_keypoints[i+1] - path.duration
+            tolerance = self.drift_tolerance if i < len(pieces) - 1 else 0
+            if abs(target_duration - nominal_duration) > tolerance:
+                piece_path = self.find_piece(source_start, source_end, target_duration, cuts, fingerprint)
+                num_solved_again += 1
+            elif piece_paths is None:
+                piece_path = self.find_piece(source_start, source_end, nominal_duration, cuts, fingerprint)
+            else:
+                piece_path = piece_paths[i]
+            path += piece_path
+        return path, num_solved_again
+
+    def find_piece(self, source_start, source_end, target_duration, cuts, fingerprint=None):
+        """Call ``find_path()``, or return its result from ``piece_cache`` if it has been computed before.
+
+        ``fingerprint`` must be ``cuts_fingerprint(cuts)``; it is computed if it is not given.
+        """
+        if self.piece_cache is None:
+            return self.find_path(source_start, source_end, target_duration, cuts)
+        key = self.piece_cache.key("piece", self.__class__.__name__, sorted(self.get_parameters().items()), source_start, source_end,
+                target_duration, fingerprint or cuts_fingerprint(cuts))
+        contents = self.piece_cache.get(key)
+        if contents is not None:
+            return Path([Segment(start, end) for start, end in contents["segments"]],
+                    [Keypoint(source, target) for source, target in contents["keypoints"]])
+        path = self.find_path(source_start, source_end, target_duration, cuts)
+        self.piece_cache.put(key, {
+            "segments": [(int(segment.start), int(segment.end)) for segment in path.segments],
+            "keypoints": [(source, target) for source, target in path.keypoints],
+            })
         return path
 
     def find_path(self, source_start, source_end, target_duration, cuts):
         """Find a ``Path`` from ``source_start`` to ``source_end`` with a duration of approximately ``target_duration``."""
         raise NotImplementedError
 
+    def warm_piece(self, source_start, source_end, cuts):
+        """Return the segments of ``warm_start`` from where it first passes ``source_start`` to where it then reaches ``source_end``.
+
+        Return ``None`` if there is no ``warm_start``, if it does not pass both points, or if it jumps where there is no cut in ``cuts``.
+        """
+        if self.warm_start is None:
+            return None
+        segments = self.warm_start.segments
+        first = next((i for i, segment in enumerate(segments) if segment.start <= source_start < segment.end), None)
+        if first is None:
+            return None
+        last = next((i for i in range(first, len(segments))
+            if (source_start if i == first else segments[i].start) < source_end <= segments[i].end), None)
+        if last is None:
+            return None
+        if first == last:
+            piece = [Segment(source_start, source_end)]
+        else:
+            piece = [Segment(source_start, segments[first].end)] + segments[first+1:last] + [Segment(segments[last].start, source_end)]
+        jumps = set((cut.start, cut.end) for cut in cuts)
+        if any(a.end != b.start and (a.end, b.start) not in jumps for a, b in zip(piece, piece[1:])):
+            return None
+        return piece
+
+def nominal_pieces(source_keypoints, target_keypoints):
+    """Return the source start, source end and nominal target duration of each piece between two keypoints."""
+    return [(source_start, source_end, target_end - target_start) for source_start, source_end, target_start, target_end
+            in zip(source_keypoints, source_keypoints[1:], target_keypoints, target_keypoints[1:])]
+
 Keypoint = namedtuple("Keypoint", ["source", "target"])
 
 Cut = namedtuple("Cut", ["start", "end", "cost"])
 
+def cuts_fingerprint(cuts):
+    """Return a string that identifies a list of cuts, regardless of their order."""
+    return hashlib.sha1(repr(sorted((int(start), int(end), float(cost)) for start, end, cost in cuts))).hexdigest()
+
 Segment = namedtuple("Segment", ["start", "end"])
 Segment.duration = property(lambda self: self.end - self.start)
 
@@ -128,7 +230,7 @@ class Path(object):
 
     @property
     def segment_target_ends(self):
-        return numpy.cumsum(segment.duration for segment in self.segments)
+        return numpy.cumsum([segment.duration for segment in self.segments], dtype=int)
 
 
     @property
@@ -189,13 +291,162 @@ class Path(object):
         self.segments[first_subsegment_idx:last_subsegment_idx+1] = segments
 
 
-    def synthesize(self, data):
-        """Synthesize the suite of segments represented by this path from the given data array."""
-        return numpy.concatenate([data[segment_start:segment_end] for segment_start, segment_end in self.segments])
+    def synthesize(self, data, crossfade=0):
+        """Synthesize the suite of segments represented by this path from the given data array, crossfading jumps over ``crossfade``
+        samples (see ``rendering.PathView``)."""
+        view = PathView(data, self.segments, crossfade)
+        return view.render(0, len(view))
 
     def cost(self):
         raise NotImplementedError
 
+class CompactPath(Path):
+    """``Path`` that stores the starts and ends of its segments in arrays, for fast queries and edits.
+
+    The duration and the target end of each segment (a prefix sum of durations) are kept up to date, as are the indices of the segments
+    after which a cut follows. ``duration`` and appending segments take O(1), finding the segments affected by ``remove_cuts()`` and
+    ``insert_cut()`` takes O(log n); the following segments are then moved in one array operation.
+
+    ``segments`` returns a new list on each access, so the path must be changed by assigning ``segments``, with ``+=``, ``remove_cuts()`` or
+    ``insert_cut()``. Subclasses may override ``_modified()``, which is called after every change.
+    """
+
+    def __init__(self, segments=None, keypoints=None):
+        self._starts = numpy.zeros(0, dtype=int)
+        self._ends = numpy.zeros(0, dtype=int)
+        self._target_ends = numpy.zeros(0, dtype=int)
+        self._size = 0
+        self._duration = 0
+        self._cut_positions = []
+        super(CompactPath, self).__init__(segments, keypoints)
+
+    def copy(self):
+        """Return a copy of the path that can be changed independently, including the attributes of subclasses."""
+        ret_val = copy(self)
+        ret_val._starts, ret_val._ends, ret_val._target_ends = self._starts.copy(), self._ends.copy(), self._target_ends.copy()
+        ret_val._cut_positions = self._cut_positions[:]
+        ret_val.keypoints = self.keypoints[:]
+        return ret_val
+
+    def _modified(self):
+        """Called after each change of the segments."""
+        pass
+
+    @property
+    def segments(self):
+        return [Segment(start, end) for start, end in zip(self._starts[:self._size].tolist(), self._ends[:self._size].tolist())]
+
+    @segments.setter
+    def segments(self, segments):
+        self._size = 0
+        self._duration = 0
+        self._cut_positions = []
+        self._extend([segment.start for segment in segments], [segment.end for segment in segments])
+
+    def _reserve(self, size):
+        # grow the arrays geometrically, so that appending takes amortized O(1)
+        if size > len(self._starts):
+            capacity = max(size, 2 * len(self._starts), 16)
+            for name in ("_starts", "_ends", "_target_ends"):
+                array = numpy.zeros(capacity, dtype=int)
+                array[:self._size] = getattr(self, name)[:self._size]
+                setattr(self, name, array)
+
+    def _extend(self, starts, ends):
+        # append segments with the given starts and ends
+        first, count = self._size, len(starts)
+        if not count:
+            return
+        self._reserve(first + count)
+        self._starts[first:first+count] = starts
+        self._ends[first:first+count] = ends
+        self._size += count
+        self._update(first)
+
+    def _update(self, first):
+        # recompute target ends and cut positions from segment first on
+        first_boundary = max(first - 1, 0)
+        del self._cut_positions[bisect_left(self._cut_positions, first_boundary):]
+        if first < self._size:
+            durations = self._ends[first:self._size] - self._starts[first:self._size]
+            self._target_ends[first:self._size] = numpy.cumsum(durations) + (self._target_ends[first-1] if first else 0)
+            if self._size - first == 1 and first: # common case of appending a single segment
+                if self._ends[first-1] != self._starts[first] - 1:
+                    self._cut_positions.append(first - 1)
+            else:
+                boundaries = self._ends[first_boundary:self._size-1] != self._starts[first_boundary+1:self._size] - 1
+                self._cut_positions.extend((numpy.flatnonzero(boundaries) + first_boundary).tolist())
+        self._duration = int(self._target_ends[self._size-1]) if self._size else 0
+        self._modified()
+
+    def _splice(self, first, last, starts, ends):
+        # replace the segments first to last - 1 by segments with the given starts and ends
+        tail_starts, tail_ends = self._starts[last:self._size].copy(), self._ends[last:self._size].copy()
+        self._size = first
+        self._reserve(first + len(starts) + len(tail_starts))
+        self._starts[first:first+len(starts)], self._ends[first:first+len(starts)] = starts, ends
+        self._starts[first+len(starts):first+len(starts)+len(tail_starts)] = tail_starts
+        self._ends[first+len(starts):first+len(starts)+len(tail_starts)] = tail_ends
+        self._size = first + len(starts) + len(tail_starts)
+        self._update(first)
+
+    def __iadd__(self, other):
+        if isinstance(other, Path):
+            self.keypoints += other.keypoints if other.keypoints[:1] != self.keypoints[-1:] else other.keypoints[1:]
+            self._extend(other.segment_source_starts, other.segment_source_ends)
+        elif isinstance(other, Segment):
+            self._extend([other.start], [other.end])
+        else:
+            raise NotImplementedError
+        return self
+
+    @property
+    def duration(self):
+        return self._duration
+
+    @property
+    def segment_source_starts(self):
+        return self._starts[:self._size].tolist()
+
+    @property
+    def segment_source_ends(self):
+        return self._ends[:self._size].tolist()
+
+    @property
+    def segment_target_ends(self):
+        return self._target_ends[:self._size].copy()
+
+    @property
+    def cuts(self):
+        return [Cut(int(self._ends[i]), int(self._starts[i+1]), -1) for i in self._cut_positions]
+
+    def remove_cuts(self, start, end):
+        """Simulate ``self.cuts[start:end] = []``."""
+        start_segment_idx = self._cut_positions[start]
+        end_segment_idx = self._cut_positions[end] if end < len(self._cut_positions) else self._size - 1
+        if not self._starts[start_segment_idx] < self._ends[end_segment_idx]:
+            raise ValueError("removing these cuts would cause segments of negative length")
+        self._splice(start_segment_idx, end_segment_idx + 1, [self._starts[start_segment_idx]], [self._ends[end_segment_idx]])
+
+    def insert_cut(self, position, cut):
+        """Simulate ``self.cuts.insert(position, cut)``."""
+        first_subsegment_idx = self._cut_positions[position-1] + 1 if position else 0
+        last_subsegment_idx = self._cut_positions[position] if position < len(self._cut_positions) else self._size - 1
+        # the segments between two cuts follow each other in the source, find the one where the cut starts
+        segment_idx = first_subsegment_idx + numpy.searchsorted(self._starts[first_subsegment_idx:last_subsegment_idx+1], cut.start, "right") - 1
+        if segment_idx < first_subsegment_idx or not cut.start < self._ends[segment_idx]:
+            segment_idx = last_subsegment_idx
+        first_subsegment_idx = segment_idx
+
+        first_start, last_end = self._starts[first_subsegment_idx], self._ends[last_subsegment_idx]
+        if not cut.end < last_end:
+            raise ValueError("inserting this cut would cause segments of negative length")
+        if first_start != cut.start:
+            starts, ends = [first_start, cut.end], [cut.start, last_end]
+        else:
+            starts, ends = [cut.end], [last_end]
+        self._splice(first_subsegment_idx, last_subsegment_idx + 1, starts, ends)
+
 BOOLEANS = {
         True: True, 1: True, "True": True, "true": True, "yes": True, "on": True,
         False: False, 0: False, "False": False, "false": False, "no": False, "off": False,
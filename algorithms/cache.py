@@ -0,0 +1,79 @@
+"""Cache for computed cuts and paths, stored as data files in a directory.
+
+Entries are named by a hash of everything they were computed from (see ``ArtifactCache.key()``), so they are found again no matter
+under which names the input files are stored, and become invalid only when their inputs change. When the total size of the entries
+exceeds the size limit, the least recently used entries are deleted; using an entry updates its modification time.
+"""
+
+import os
+import hashlib
+
+from datafile import read_datafile, write_datafile
+
+# number of samples that are hashed at once by array_fingerprint()
+BLOCK_SIZE = 1 << 20
+
+def array_fingerprint(data):
+    """Return a string that identifies the contents, type and shape of the numpy array ``data``, which may be memory-mapped."""
+    h = hashlib.sha1(repr((data.dtype.str, data.shape)))
+    for start in xrange(0, len(data), BLOCK_SIZE):
+        h.update(data[start:start+BLOCK_SIZE].tostring())
+    return h.hexdigest()
+
+class ArtifactCache(object):
+    """Cache of data files in ``directory``, holding at most ``max_size`` bytes (no limit if it is ``None``)."""
+
+    def __init__(self, directory, max_size=None):
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, kind, *parts):
+        """Return the key of an entry of the given ``kind`` (e.g. ``"cuts"``) that has been computed from ``parts``, whose ``repr()`` must
+        identify them."""
+        return "%s-%s" % (kind, hashlib.sha1(repr(parts)).hexdigest())
+
+    def filename(self, key):
+        return os.path.join(self.directory, key + ".dat")
+
+    def get(self, key):
+        """Return the contents of the entry ``key``, or ``None`` if there is none."""
+        filename = self.filename(key)
+        try:
+            contents = read_datafile(filename)
+            os.utime(filename, None)
+            return contents
+        except (OSError, IOError, KeyError, SyntaxError, ValueError):
+            return None
+
+    def put(self, key, contents):
+        """Store ``contents`` as the entry ``key``, and delete old entries if the cache has grown too large."""
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        # write to a temporary file first, so that concurrent readers never see a partial file
+        temporary_filename = "%s.%d.tmp" % (self.filename(key), os.getpid())
+        write_datafile(temporary_filename, contents)
+        os.rename(temporary_filename, self.filename(key))
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        """Delete the least recently used entries until the cache fits into ``max_size``; never delete the entry ``keep``."""
+        if self.max_size is None:
+            return
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".dat"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue # deleted by another process
+                entries.append((stat.st_mtime, name, stat.st_size))
+        total_size = sum(size for mtime, name, size in entries)
+        for mtime, name, size in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if keep is None or name != keep + ".dat":
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    total_size -= size
+                except OSError:
+                    pass # deleted by another process
@@ -0,0 +1,97 @@
+"""Reading and writing of the files that store cuts, paths and other results.
+
+Data files are binary: the magic string ``MAGIC``, the format version and the size of the header as little-endian 32 bit integers, and a
+JSON header, followed by the raw data of the numpy arrays in the contents, each aligned to ``ALIGNMENT`` bytes. The header holds all
+other (JSON serializable) contents, as well as the type, shape and position of each array, so that arrays are read as memory maps.
+
+Files in the older text format, one ``key = repr(value)`` line per entry, are still read.
+"""
+
+import json
+import struct
+from ast import literal_eval
+
+import numpy
+
+MAGIC = "\x93DATAFILE"
+
+VERSION = 1
+
+ALIGNMENT = 64
+
+def aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def json_default(value):
+    # numpy scalars that have been put into the contents
+    if isinstance(value, numpy.generic):
+        return value.item()
+    raise TypeError("%r is not JSON serializable" % (value,))
+
+def write_datafile(filename, contents, binary=True):
+    """Write the dict ``contents`` to a data file, in the text format if ``binary`` is false."""
+    if not binary:
+        write_text_datafile(filename, contents)
+        return
+    arrays = dict((key, numpy.ascontiguousarray(value)) for key, value in contents.items() if isinstance(value, numpy.ndarray))
+    layout = {}
+    offset = 0 # relative to the start of the data
+    for key, value in sorted(arrays.items()):
+        layout[key] = {
+                "dtype": value.dtype.descr if value.dtype.names else value.dtype.str,
+                "shape": value.shape,
+                "offset": offset,
+                }
+        offset = aligned(offset + value.nbytes)
+    metadata = dict((key, value) for key, value in contents.items() if key not in arrays)
+    header = json.dumps({"metadata": metadata, "arrays": layout}, default=json_default, sort_keys=True)
+    data_start = aligned(len(MAGIC) + 8 + len(header))
+    with open(filename, "wb") as f:
+        f.write(MAGIC + struct.pack("<II", VERSION, len(header)) + header)
+        for key, value in sorted(arrays.items()):
+            f.seek(data_start + layout[key]["offset"])
+            f.write(value.tostring())
+
+def read_datafile(filename):
+    """Read the contents of a data file as a dict, with arrays as read-only memory maps."""
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return read_text_datafile(filename)
+        version, header_size = struct.unpack("<II", f.read(8))
+        if version > VERSION:
+            raise ValueError("data file version %d is not supported" % version)
+        header = json.loads(f.read(header_size))
+    data_start = aligned(len(MAGIC) + 8 + header_size)
+    contents = header["metadata"]
+    for key, array in header["arrays"].items():
+        dtype = numpy.dtype([(str(name), format) for name, format in array["dtype"]] if isinstance(array["dtype"], list) else str(array["dtype"]))
+        shape = tuple(array["shape"])
+        if dtype.itemsize * numpy.prod(shape, dtype=int):
+            contents[key] = numpy.memmap(filename, dtype=dtype, mode="r", offset=data_start + array["offset"], shape=shape)
+        else:
+            contents[key] = numpy.zeros(shape, dtype=dtype) # empty arrays cannot be mapped
+    return contents
+
+def write_text_datafile(filename, contents):
+    with open(filename, "w") as f:
+        for key, value in sorted(contents.items()):
+            print >> f, "%s = %s" % (key, repr(value))
+
+def read_text_datafile(filename):
+    contents = {}
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                key, value = line.split(" = ", 1)
+                contents[key.strip()] = literal_eval(value.strip())
+    return contents
+
+def read_rows(contents, columns, text_key, text_indices):
+    """Return the rows of the arrays ``columns`` of ``contents`` as a list of tuples.
+
+    If ``contents`` has been read from a file in the text format, return the items at ``text_indices`` of the rows of
+    ``contents[text_key]`` instead.
+    """
+    if all(column in contents for column in columns):
+        return zip(*[contents[column].tolist() for column in columns])
+    return [tuple(row[i] for i in text_indices) for row in contents[text_key]]
@@ -0,0 +1,79 @@
+from numpy import asarray, arange, repeat, cumsum, zeros, flatnonzero, argmin, log
+
+from ..algorithm import PiecewisePathAlgorithm, Keypoint
+from ..scoring import cost_aware_costs
+from greedy import CostAwarePath
+from jumpgraph import JumpGraph
+
+class BeamPathAlgorithm(PiecewisePathAlgorithm):
+    """Beam search for paths that keeps the ``beam_width`` best partial paths in flat arrays."""
+
+    def __init__(self, beam_width=100, max_steps=10000, grace_period=0, duration_penalty=1e-5, cut_penalty=1e1, repetition_penalty=1e3):
+        self.beam_width = int(beam_width)
+        self.max_steps = int(max_steps)
+        self.grace_period = float(grace_period)
+        self.duration_penalty = float(duration_penalty)
+        self.cut_penalty = float(cut_penalty)
+        self.repetition_penalty = float(repetition_penalty)
+
+    def score(self, duration, cut_cost, log_repetition, target_duration):
+        """Compute the cost of many paths at once, using the same metric as ``CostAwarePath.cost()``."""
+        return cost_aware_costs(self, duration, target_duration, cut_cost, log_repetition)
+
+    def find_path(self, source_start, source_end, target_duration, cuts):
+        graph = JumpGraph(cuts, source_start, source_end)
+        graph.compute_bounds(target_duration + self.grace_period)
+
+        # the frontier: current node, elapsed duration, accumulated cut cost, logarithm of the product of segment
+        # multiplicities (the product itself overflows on long paths) and multiplicity per node
+        node = asarray([graph.start])
+        duration = graph.durations[node]
+        cut_cost = zeros(1)
+        log_repetition = zeros(1)
+        counts = zeros((1, len(graph)), dtype=int)
+        counts[0, graph.start] = 1
+        history = [(node, asarray([-1]))] # per step, the node and the frontier index of its predecessor
+
+        best = None # (cost, step, index, cut cost) of the best complete path
+        for step in range(self.max_steps):
+            # collect complete paths
+            complete = flatnonzero(graph.terminal[node])
+            if len(complete):
+                costs = self.score(duration[complete], cut_cost[complete], log_repetition[complete], target_duration)
+                i = argmin(costs)
+                if best is None or costs[i] < best[0]:
+                    best = (costs[i], step, complete[i], cut_cost[complete[i]])
+
+            # expand all incomplete paths at once, dropping those that cannot reach the end in time
+            alive = flatnonzero(~graph.terminal[node] &
+                    (duration - graph.durations[node] + graph.min_remaining[node] <= target_duration + self.grace_period))
+            degree = graph.offsets[node[alive] + 1] - graph.offsets[node[alive]]
+            parent = repeat(alive, degree)
+            if not len(parent):
+                break
+            edge = repeat(graph.offsets[node[alive]], degree) + arange(len(parent)) - repeat(cumsum(degree) - degree, degree)
+            child = graph.targets[edge]
+            multiplicity = counts[parent, child]
+            new_duration = duration[parent] + graph.durations[child]
+            new_cut_cost = cut_cost[parent] + graph.costs[edge]
+            new_log_repetition = log_repetition[parent] + log(multiplicity + 1) - log(multiplicity.clip(1))
+
+            # keep the best beam_width paths
+            keep = self.score(new_duration, new_cut_cost, new_log_repetition, target_duration).argsort(kind="mergesort")[:self.beam_width]
+            node, duration, cut_cost, log_repetition = child[keep], new_duration[keep], new_cut_cost[keep], new_log_repetition[keep]
+            counts = counts[parent[keep]]
+            counts[arange(len(keep)), node] += 1
+            history.append((node, parent[keep]))
+
+        if best is None:
+            raise RuntimeError("no path from %d to %d found" % (source_start, source_end))
+
+        # follow the predecessors back to the start
+        cost, step, index, total_cut_cost = best
+        nodes = []
+        for step in range(step, -1, -1):
+            nodes.append(history[step][0][index])
+            index = history[step][1][index]
+        nodes.reverse()
+        segments = [graph.segment(n) for n in nodes]
+        return CostAwarePath(self, segments, [Keypoint(source_start, 0), Keypoint(source_end, target_duration)], total_cut_cost)
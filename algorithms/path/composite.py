@@ -0,0 +1,40 @@
+from ..algorithm import PathAlgorithm
+
+def create_path_algorithm(spec):
+    """Create a path algorithm from a string like ``"GreedyPathAlgorithm num_paths=20 grace_period=0"``, the name of the algorithm
+    followed by its parameters, as given on the command line."""
+    from . import algorithms
+    words = spec.split()
+    try:
+        algorithm_class = algorithms[words[0]]
+    except (IndexError, KeyError):
+        raise ValueError("path algorithm '%s' not found" % spec)
+    return algorithm_class(**dict(word.split("=", 1) for word in words[1:]))
+
+def delegated(name, default=None):
+    """Return a property of a ``CompositePathAlgorithm`` that is passed on to its delegates when it is set."""
+    def get(self):
+        return self.__dict__.get(name, default)
+    def set(self, value):
+        self.__dict__[name] = value
+        for algo in self.delegates:
+            setattr(algo, name, value)
+    return property(get, set, doc="see ``PiecewisePathAlgorithm``")
+
+class CompositePathAlgorithm(PathAlgorithm):
+    """Base class for path algorithms that delegate to other path algorithms.
+
+    The delegates are given as strings for ``create_path_algorithm()``, so that they can be passed as parameters on the command line
+    (e.g. ``algorithm="GreedyPathAlgorithm num_paths=20"``) and are compared as such when cached paths are checked.
+    """
+
+    abstract = None
+
+    # the algorithms delegated to, which get the ``piece_cache``, ``drift_tolerance`` and ``warm_start`` of this algorithm
+    delegates = ()
+
+    piece_cache = delegated("piece_cache")
+
+    drift_tolerance = delegated("drift_tolerance", 0)
+
+    warm_start = delegated("warm_start")
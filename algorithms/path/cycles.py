@@ -0,0 +1,66 @@
+from numpy import asarray, arange, repeat, diff, ones, isinf
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+class AutomatonGraph(object):
+    """Array representation of an automaton created by ``create_automaton()``, used for fast shortest path and loop searches.
+
+    ``segments[i]`` is the i-th segment of the automaton in playback order. ``graph`` is a sparse matrix with an entry for every jump
+    from segment i to segment j, weighted with the duration of segment i, so that shortest paths are shortest in playback time.
+    ``cheapest[i, j]`` is the lowest cost of jumping from segment i to segment j.
+    """
+
+    def __init__(self, automaton):
+        self.segments = [automaton[start] for start in sorted(automaton)]
+        self.index = dict((segment.start, i) for i, segment in enumerate(self.segments))
+        self.durations = asarray([segment.duration for segment in self.segments], dtype=float)
+
+        self.cheapest = {}
+        for i, segment in enumerate(self.segments):
+            for cost in segment: # sorted by cost, so the first jump to each segment is the cheapest
+                self.cheapest.setdefault((i, self.index[segment[cost].start]), cost)
+        rows, columns = zip(*self.cheapest.keys()) if self.cheapest else ((), ())
+        num_segments = len(self.segments)
+        self.graph = csr_matrix((ones(len(rows)), (rows, columns)), shape=(num_segments, num_segments))
+        self.graph.data[:] = self.durations[repeat(arange(num_segments), diff(self.graph.indptr))]
+
+    def path_costs(self, path):
+        """Return the costs of the jumps between the successive segment indices in ``path``."""
+        return [self.cheapest[a, b] for a, b in zip(path, path[1:])]
+
+    def shortest_path(self, start, end):
+        """Return the segment indices of the shortest path from segment index ``start`` to ``end``, or ``None``."""
+        distances, predecessors = dijkstra(self.graph, directed=True, indices=start, return_predecessors=True)
+        if isinf(distances[end]):
+            return None
+        path = [end]
+        while path[-1] != start:
+            path.append(predecessors[path[-1]])
+        path.reverse()
+        return path
+
+    def loops(self, chunk_size=None):
+        """Return ``(first, path)`` for every jump, where ``path`` is the shortest sequence of segment indices that starts with the
+        target of the jump and leads back to ``first``, the segment the jump was taken from.
+
+        The shortest paths back to each segment are found with one search on the reverse graph, shared among all of its jumps;
+        ``chunk_size`` segments are processed at once (default: as many as fit into about 8 MB).
+        """
+        num_segments = len(self.segments)
+        chunk_size = chunk_size or max(1, (1 << 20) // max(num_segments, 1))
+        reverse = self.graph.T.tocsr()
+        loops = []
+        for chunk_start in range(0, num_segments, chunk_size):
+            firsts = range(chunk_start, min(chunk_start + chunk_size, num_segments))
+            distances, predecessors = dijkstra(reverse, directed=True, indices=firsts, return_predecessors=True)
+            for row, first in enumerate(firsts):
+                for next in self.graph.indices[self.graph.indptr[first]:self.graph.indptr[first+1]]:
+                    if next == first:
+                        loops.append((first, [first]))
+                    elif not isinf(distances[row, next]):
+                        # in the reverse search, the predecessor of a segment is its successor on the way back to first
+                        path = [next]
+                        while path[-1] != first:
+                            path.append(predecessors[row, path[-1]])
+                        loops.append((first, path))
+        return loops
@@ -1,7 +1,7 @@
 from ..algorithm import PiecewisePathAlgorithm, Keypoint, Segment as SimpleSegment
 from greedy import CostAwarePath
 
-from segment import Segment, create_automaton 
+from segment import Segment, create_automaton, duration_bounds_by_start
 
 from bisect import bisect_right
 from math import sqrt
@@ -17,56 +17,91 @@ from collections import namedtuple
 # reicht start und zielsegment sowie die laenge aus?
 # laenge muesste je nachdem wo die schluesselstelle in anfang und ziel ist angepasst werden
 class DepthFirstPathAlgorithm(PiecewisePathAlgorithm):
-    def __init__(self, num_paths=10, duration_penalty=1e2, cut_penalty=1e1, repetition_penalty=1e1, avg_stack_size_times_factor = 1.5, avg_segment_divisor = 2):
+    def __init__(self, num_paths=10, duration_penalty=1e2, cut_penalty=1e1, repetition_penalty=1e1, avg_segment_divisor = 2, deepening_factor = 1.5, duration_bucket = "tolerance"):
         self.num_paths = int(num_paths)
         self.duration_penalty = float(duration_penalty)
         self.cut_penalty = float(cut_penalty)
         self.repetition_penalty = float(repetition_penalty)
-        self.avg_stack_size_times_factor = float(avg_stack_size_times_factor)
         self.avg_segment_divisor = float(avg_segment_divisor)
+        self.deepening_factor = float(deepening_factor)
+        self.duration_bucket = duration_bucket if duration_bucket == "tolerance" else int(duration_bucket)
+        self.statistics = {}
+
+    def __call__(self, source_keypoints, target_keypoints, cuts):
+        # progress of the search, summed over all pieces
+        self.statistics = {"iterations": 0, "considered_paths": 0}
+        return super(DepthFirstPathAlgorithm, self).__call__(source_keypoints, target_keypoints, cuts)
 
     def find_path(self, source_start, source_end, target_duration, cuts):
         # start and end frame shall be connected with a sequence of a certain duration
         frame_to_segment, start_frame, end_frame = create_automaton(cuts, source_start, source_end)
-        sorted_keys = sorted(frame_to_segment.keys())
         avg_segm_length = calc_average_segment_length(frame_to_segment)
+        # paths that end within this tolerance around the target duration are accepted
+        tolerance = avg_segm_length/self.avg_segment_divisor
+        bucket = max(tolerance if self.duration_bucket == "tolerance" else self.duration_bucket, 1)
+        # the durations within which the end can be reached from each segment, used to cut off dead branches
+        min_remaining, max_remaining = duration_bounds_by_start(frame_to_segment, end_frame, target_duration + tolerance)
+        # no acceptable path can consist of more segments than this
+        max_stack_size = int((target_duration + tolerance) / min(segment.duration for segment in frame_to_segment.values())) + 1
+        max_segm_length = max(segment.duration for segment in frame_to_segment.values())
         # the stack, which contains a tuple of (segment, iterator, cost)
         Stack_Item = namedtuple('Stack_Item', "segment iterator cost duration")
-        segments = [Stack_Item(start_frame, start_frame.__iter__(), 0.0, start_frame.duration)]
-        iter_count = tried_paths = 0
-        # restrict the stack to a maximum depth
-        max_stack_size = self.avg_stack_size_times_factor * target_duration/(avg_segm_length)
-        print "Maximum stack size: %f" %(max_stack_size)
+        iter_count = 0
         best_path = None
-        while segments and tried_paths < self.num_paths:
-            if not (iter_count % 1000):
-                print "\rIteration: %d, Stack size: %d, Considered paths: %d" % (iter_count, len(segments), tried_paths),
-            iter_count += 1
-            top_item = segments[-1]
-            if top_item.duration < target_duration and len(segments) < max_stack_size:
-                # if no further candidate is there pop the stack
-                try:
-                    cost = top_item.iterator.next()
+        # segment starts of the paths found so far; deeper rounds find the paths of earlier rounds again, which are not counted twice
+        tried_paths = set()
+        # iterative deepening: repeat the search with a growing maximum stack size until enough paths have been found
+        stack_size = min(int(target_duration / avg_segm_length) + 1, max_stack_size)
+        while True:
+            segments = [Stack_Item(start_frame, start_frame.__iter__(), 0.0, start_frame.duration)]
+            # transposition table: (segment start, duration bucket) -> (cost, stack size) of a state that dominates those seen so far
+            visited = {}
+            while segments and len(tried_paths) < self.num_paths:
+                iter_count += 1
+                top_item = segments[-1]
+                if top_item.duration < target_duration and len(segments) < stack_size:
+                    # if no further candidate is there pop the stack
+                    try:
+                        cost = top_item.iterator.next()
+                    except StopIteration:
+                        segments.pop()
+                        continue
                     new_item = top_item.segment[cost]
                     new_cost = top_item.cost + cost
                     new_duration = top_item.duration + new_item.duration
+                    # skip segments from which the end cannot be reached in time, or not within the maximum stack size
+                    if top_item.duration + min_remaining[new_item.start] > target_duration + tolerance or \
+                            top_item.duration + max_remaining[new_item.start] < target_duration - tolerance or \
+                            new_duration + (stack_size - len(segments) - 1) * max_segm_length < target_duration - tolerance:
+                        continue
+                    # skip states that have already been reached more cheaply with at most as many segments
+                    key = (new_item.start, int(new_duration // bucket))
+                    if key in visited and visited[key][0] <= new_cost and visited[key][1] <= len(segments):
+                        continue
+                    # states that are better in one respect only are searched, but do not replace the entry
+                    if key not in visited or (new_cost <= visited[key][0] and len(segments) <= visited[key][1]):
+                        visited[key] = (new_cost, len(segments))
                     segments.append(Stack_Item(new_item, new_item.__iter__(), new_cost, new_duration))
-                except StopIteration:
+                else:
                     segments.pop()
                     continue
-            else:
-                segments.pop()
-                continue
-            # test if we are near the end
-            if segments and segments[-1].segment == end_frame and abs(top_item.duration - target_duration) < avg_segm_length/self.avg_segment_divisor:
-                tried_paths += 1
-                new_path = CostAwarePath(self, [SimpleSegment(stack_item.segment.start, stack_item.segment.end) for stack_item in segments], [Keypoint(source_start, 0), Keypoint(source_end, target_duration)], top_item.cost)
-                if best_path is None or new_path < best_path:
-                    best_path = new_path
-        print "\rFinal Iteration: %d, Stack size: %d, Considered paths: %d" % (iter_count, len(segments), tried_paths)
+                # test if we are near the end
+                if new_item == end_frame and abs(new_duration - target_duration) < tolerance:
+                    tried_paths.add(tuple(stack_item.segment.start for stack_item in segments))
+                    new_path = CostAwarePath(self, [SimpleSegment(stack_item.segment.start, stack_item.segment.end) for stack_item in segments], [Keypoint(source_start, 0), Keypoint(source_end, target_duration)], new_cost)
+                    if best_path is None or new_path < best_path:
+                        best_path = new_path
+            if len(tried_paths) >= self.num_paths or stack_size >= max_stack_size:
+                break
+            stack_size = min(int(self.deepening_factor * stack_size) + 1, max_stack_size)
+        self.statistics["iterations"] = self.statistics.get("iterations", 0) + iter_count
+        self.statistics["considered_paths"] = self.statistics.get("considered_paths", 0) + len(tried_paths)
 
         return best_path
 
+    def get_statistics(self):
+        return self.statistics
+
 def calc_average_segment_length(frame_to_segment):
     total_length = sum([frame_to_segment[segment].duration for segment in frame_to_segment])
     return total_length / len(frame_to_segment)
@@ -1,24 +1,12 @@
-from bisect import bisect
 from datetime import datetime
-from itertools import product
+from multiprocessing import Pool, cpu_count
 
-from numpy.random import random, randint, permutation, seed
+from numpy import asarray, arange, zeros, full, where, minimum, lexsort, flatnonzero, concatenate, prod
+from numpy.random import randint, RandomState
 
 from ..algorithm import PiecewisePathAlgorithm, Keypoint, Cut, Path, Segment
-
-def unique(lst):
-    """Return a sorted list made of the unique elements of `l`."""
-    a = []
-    for x in lst:
-        index = bisect(a, x)
-        if index == 0 or a[index-1] != x:
-            a.insert(index, x)
-    return a
-
-def choice(l):
-    if len(l) == 0:
-        raise IndexError("random choice from empty sequence")
-    return l[randint(len(l))]
+from ..repetition import RepetitionIndex
+from ..scoring import overlaps, genetic_costs, CHUNK_ELEMENTS
 
 class GeneticPath(Path):
     def __init__(self, algo, keypoints, cuts=()):
@@ -27,61 +15,309 @@ class GeneticPath(Path):
         segments = [Segment(start, end) for start, end in zip(segment_starts, segment_ends)]
         super(GeneticPath, self).__init__(segments, keypoints)
         self.algo = algo
-
-    def remove_random_cut(self, cuts, num_cuts=1):
-        """Mutate the path by removing a random cut (or the given number of successive cuts)."""
-        segment_starts = [self.keypoints[0].source] + [cut.end for cut in self.cuts]
-        segment_ends = [cut.start for cut in self.cuts[num_cuts:]] + [self.keypoints[-1].source]
-        possible_cuts = [i for i, (x, y) in enumerate(zip(segment_starts, segment_ends)) if x < y]
-        if possible_cuts:
-            cut_idx = choice(possible_cuts)
-            self.remove_cuts(cut_idx, cut_idx + num_cuts)
-
-    def insert_random_cut(self, cuts):
-        """Mutate the path by inserting a random cut, assuming ``cuts`` is sorted."""
-        possible_cuts = [(i, c) for i, s in enumerate(self.segments) for c in cuts if s.start < c.start and c.end < s.end]
-        if possible_cuts:
-            self.insert_cut(*choice(possible_cuts))
-
-    def mutate(self, cuts):
-        """Randomly mutate the path by inserting or removing cuts, assuming ``cuts`` is sorted."""
-        if self.cuts and random() < self.algo.remove_probability:
-            num_cuts = randint(1, len(self.cuts) + 1) # TODO nicer distribution
-            self.remove_random_cut(cuts, num_cuts)
-        if random() < self.algo.add_probability:
-            self.insert_random_cut(cuts)
-
-    def crossover(self, other):
-        """Randomly mix two paths by jumping from one into the other."""
-        try:
-            self_idx, other_idx = choice([(i, j) for i, c in enumerate(self.cuts) for j, d in enumerate(other.cuts) if c.end < d.start])
-            return GeneticPath(self.algo, self.keypoints[:], self.cuts[:self_idx+1] + other.cuts[other_idx:])
-        except IndexError:
-            return GeneticPath(self.algo, self.keypoints[:], self.cuts[:])
-
-    def breed(self, other, *args, **kwargs):
-        """Create a child by crossover and mutation. Arguments are passed to ``self.mutate()``."""
-        child = self.crossover(other)
-        child.mutate(*args, **kwargs)
-        return child
+        # Path.cuts does not know the costs of the cuts
+        self.cut_costs = [cut.cost for cut in cuts]
+        self._cost = None
 
     def repetition_cost(self):
         """Compute a function that grows when parts of the source occur multiple times in the output."""
-        return sum(max(min(a.end, b.end) - max(a.start, b.start), 0) for a, b in product(self.segments, self.segments) if a is not b)
+        return RepetitionIndex(self.segments).overlap()
 
     def cost(self):
-        """Compute the cost of the path based on a quality metric."""
-        duration_cost = abs(self.duration - (self.keypoints[-1].target - self.keypoints[0].target))
-        cut_cost = sum(c.cost for c in self.cuts)
-        repetition_cost = self.repetition_cost()
-        return self.algo.duration_penalty * duration_cost + self.algo.cut_penalty * cut_cost + self.algo.repetition_penalty * repetition_cost
+        """Compute the cost of the path based on a quality metric. The path must not be changed afterwards, as the cost is cached."""
+        if self._cost is None:
+            duration_cost = abs(self.duration - (self.keypoints[-1].target - self.keypoints[0].target))
+            cut_cost = sum(self.cut_costs)
+            repetition_cost = self.repetition_cost()
+            self._cost = self.algo.duration_penalty * duration_cost + self.algo.cut_penalty * cut_cost + self.algo.repetition_penalty * repetition_cost
+        return self._cost
+
+def gather(genes, index):
+    """Return ``genes[i, index[i, k]]`` for every row i, or -1 where the index lies outside of the row."""
+    inside = (index >= 0) & (index < genes.shape[1])
+    if not genes.shape[1]:
+        return full(index.shape, -1, dtype=int)
+    return where(inside, genes[arange(len(genes))[:, None], where(inside, index, 0)], -1)
+
+def pick(candidates, rng):
+    """Pick a random ``True`` entry from each row of ``candidates``, with the same probability for all entries of a row.
+
+    Return the index of the picked entry into the flattened row, and whether the row had a ``True`` entry at all.
+    """
+    flat = candidates.reshape(len(candidates), prod(candidates.shape[1:], dtype=int))
+    counts = flat.sum(axis=1)
+    chosen = (rng.random_sample(len(flat)) * counts).astype(int)
+    if not flat.shape[1]:
+        return zeros(len(flat), dtype=int), counts > 0
+    return (flat.cumsum(axis=1) > chosen[:, None]).argmax(axis=1), counts > 0
+
+def chunks(num_rows, row_size):
+    """Split ``num_rows`` rows of ``row_size`` elements each into slices of at most ``CHUNK_ELEMENTS`` elements."""
+    step = max(1, CHUNK_ELEMENTS // max(row_size, 1))
+    return [slice(i, i + step) for i in range(0, num_rows, step)]
+
+class CutTable(object):
+    """The cuts available to a ``Population``, sorted and stored in flat arrays.
+
+    An individual is a row of cut indices into the table, padded with -1. Its i-th segment is played from ``segment_starts[i]`` (the
+    keypoint or the end of the preceding cut) to ``segment_ends[i]`` (the start of the next cut or the keypoint).
+    """
+
+    def __init__(self, cuts, source_start, source_end):
+        self.cuts = sorted(Cut(s, e, c) for s, e, c in cuts)
+        self.starts = asarray([cut.start for cut in self.cuts], dtype=int)
+        self.ends = asarray([cut.end for cut in self.cuts], dtype=int)
+        self.costs = asarray([cut.cost for cut in self.cuts], dtype=float)
+        self.source_start, self.source_end = source_start, source_end
+
+    def __len__(self):
+        return len(self.cuts)
+
+    def segment_bounds(self, genes, lengths):
+        """Return the segment starts and ends of all individuals, arrays with one column more than ``genes``.
+
+        Segments beyond the end of an individual have a duration of 0.
+        """
+        num_rows, width = genes.shape
+        is_cut = genes >= 0
+        index = where(is_cut, genes, 0)
+        segment_starts = full((num_rows, width + 1), self.source_start, dtype=int)
+        segment_ends = full((num_rows, width + 1), self.source_end, dtype=int)
+        if len(self.cuts):
+            segment_starts[:, 1:] = where(is_cut, self.ends[index], self.source_start)
+            segment_ends[:, :-1] = where(is_cut, self.starts[index], self.source_end)
+        used = arange(width + 1) <= lengths[:, None]
+        return where(used, segment_starts, 0), where(used, segment_ends, 0)
+
+    def encode(self, segments):
+        """Return the cut indices of the path made of ``segments``, or ``None`` if it jumps where there is no cut in the table."""
+        index = dict(((cut.start, cut.end), i) for i, cut in reversed(list(enumerate(self.cuts))))
+        genes = []
+        for a, b in zip(segments, segments[1:]):
+            if a.end != b.start:
+                if (a.end, b.start) not in index:
+                    return None
+                genes.append(index[a.end, b.start])
+        return genes
+
+    def is_valid(self, genes, lengths):
+        """Check which individuals consist only of segments with a positive duration."""
+        segment_starts, segment_ends = self.segment_bounds(genes, lengths)
+        return ((segment_starts < segment_ends) | (arange(genes.shape[1] + 1) > lengths[:, None])).all(axis=1)
+
+    def evaluate(self, genes, lengths):
+        """Return the duration, the sum of cut costs and the repetition cost (see ``GeneticPath.repetition_cost()``) of all individuals."""
+        is_cut = genes >= 0
+        index = where(is_cut, genes, 0)
+        if len(self.cuts):
+            durations = (self.source_end - self.source_start) + where(is_cut, self.starts[index] - self.ends[index], 0).sum(axis=1)
+            cut_costs = where(is_cut, self.costs[index], 0.0).sum(axis=1)
+        else:
+            durations = full(len(genes), self.source_end - self.source_start, dtype=int)
+            cut_costs = zeros(len(genes))
+        return durations, cut_costs, overlaps(*self.segment_bounds(genes, lengths))
+
+class Evaluator(object):
+    """Computes the statistics of individuals with ``CutTable.evaluate()``, split among the processes of ``pool`` if it is given.
+
+    The processes must have been started with ``init_worker()``.
+    """
+
+    def __init__(self, table, pool=None, num_chunks=1):
+        self.table, self.pool, self.num_chunks = table, pool, num_chunks
+
+    def __call__(self, genes, lengths):
+        if self.pool is None or len(genes) < 2 * self.num_chunks:
+            return self.table.evaluate(genes, lengths)
+        bounds = [len(genes) * i // self.num_chunks for i in range(self.num_chunks + 1)]
+        results = self.pool.map(evaluate_rows, [(genes[a:b], lengths[a:b]) for a, b in zip(bounds, bounds[1:])])
+        return tuple(concatenate(parts) for parts in zip(*results))
+
+class Population(object):
+    """Individuals encoded as rows of cut indices into a ``CutTable``, together with their costs.
+
+    The statistics of the individuals are computed once with ``evaluate`` (default: ``table.evaluate``), unless they are given as ``scores``,
+    a tuple of durations, cut costs and repetition costs.
+    """
+
+    def __init__(self, algo, table, target_duration, genes, lengths, scores=None, evaluate=None):
+        self.algo, self.table, self.target_duration = algo, table, target_duration
+        self.evaluate = evaluate or table.evaluate
+        self.genes, self.lengths = genes, lengths
+        self.durations, self.cut_costs, self.repetition_costs = scores or self.evaluate(genes, lengths)
+        self.costs = genetic_costs(algo, self.durations, target_duration, self.cut_costs, self.repetition_costs)
+
+    def __len__(self):
+        return len(self.genes)
+
+    @property
+    def scores(self):
+        return self.durations, self.cut_costs, self.repetition_costs
+
+    def derive(self, genes, lengths, scores=None):
+        """Create a population of other individuals with the same cut table and costs."""
+        return Population(self.algo, self.table, self.target_duration, trim(genes, lengths), lengths, scores, self.evaluate)
+
+    def subset(self, rows):
+        """Return the individuals in the given rows, without evaluating them again."""
+        return self.derive(self.genes[rows], self.lengths[rows], tuple(score[rows] for score in self.scores))
+
+    def __add__(self, other):
+        width = max(self.genes.shape[1], other.genes.shape[1])
+        return self.derive(concatenate([pad(self.genes, width), pad(other.genes, width)]), concatenate([self.lengths, other.lengths]),
+                tuple(concatenate(scores) for scores in zip(self.scores, other.scores)))
+
+    def select(self, num_individuals):
+        """Return the ``num_individuals`` best distinct individuals, sorted by cost."""
+        if not len(self):
+            return self
+        if self.genes.shape[1]:
+            order = lexsort(self.genes.T[::-1])
+            sorted_genes = self.genes[order]
+            first = concatenate([[True], (sorted_genes[1:] != sorted_genes[:-1]).any(axis=1)])
+            distinct = order[first]
+        else:
+            distinct = asarray([0])
+        # ties are broken by position, so that the order does not depend on the sorting algorithm
+        best = distinct[lexsort((distinct, self.costs[distinct]))][:num_individuals]
+        return self.subset(best)
+
+    def breed(self, num_children, rng):
+        """Create ``num_children`` children by crossover of two random individuals and mutation."""
+        fathers = rng.randint(len(self), size=num_children)
+        mothers = rng.randint(max(len(self) - 1, 1), size=num_children)
+        if len(self) > 1:
+            mothers += mothers >= fathers
+        genes, lengths = crossover(self.table, self.genes[fathers], self.lengths[fathers], self.genes[mothers], self.lengths[mothers], rng)
+        genes, lengths = self.mutate(genes, lengths, rng)
+        return self.derive(genes, lengths)
+
+    def mutate(self, genes, lengths, rng):
+        """Randomly mutate individuals by removing successive cuts, then by inserting a cut."""
+        remove = (lengths > 0) & (rng.random_sample(len(genes)) < self.algo.remove_probability)
+        genes, lengths = genes.copy(), lengths.copy()
+        rows = flatnonzero(remove)
+        genes[rows], lengths[rows] = remove_random_cuts(self.table, genes[rows], lengths[rows], rng)
+        insert = rng.random_sample(len(genes)) < self.algo.add_probability
+        rows = flatnonzero(insert)
+        inserted, inserted_lengths = insert_random_cut(self.table, genes[rows], lengths[rows], rng)
+        genes = pad(genes, inserted.shape[1])
+        genes[rows], lengths[rows] = inserted, inserted_lengths
+        return genes, lengths
+
+    def individual(self, i):
+        """Return the i-th individual as a ``GeneticPath``."""
+        keypoints = [Keypoint(self.table.source_start, 0), Keypoint(self.table.source_end, self.target_duration)]
+        return GeneticPath(self.algo, keypoints, [self.table.cuts[k] for k in self.genes[i, :self.lengths[i]]])
+
+def pad(genes, width):
+    """Pad individuals with -1 to the given number of columns."""
+    if genes.shape[1] >= width:
+        return genes
+    return concatenate([genes, full((len(genes), width - genes.shape[1]), -1, dtype=int)], axis=1)
+
+def trim(genes, lengths):
+    """Remove columns that only contain padding."""
+    return genes[:, :max(lengths.max(), 0) if len(lengths) else 0]
+
+def crossover(table, genes, lengths, other_genes, other_lengths, rng):
+    """Create one child of each pair of individuals by jumping from the first into the second.
+
+    A child takes the cuts of ``genes`` up to a random cut i and the cuts of ``other_genes`` from a random cut j on, where cut i must end
+    before cut j starts. Children of pairs without such cuts are copies of the first individual.
+    """
+    width, other_width = genes.shape[1], other_genes.shape[1]
+    firsts = lengths - 1
+    seconds = other_lengths.copy()
+    if width and other_width:
+        cut_ends = where(genes >= 0, table.ends[where(genes >= 0, genes, 0)], float("inf"))
+        cut_starts = where(other_genes >= 0, table.starts[where(other_genes >= 0, other_genes, 0)], -float("inf"))
+        for rows in chunks(len(genes), width * other_width):
+            index, found = pick(cut_ends[rows, :, None] < cut_starts[rows, None, :], rng)
+            firsts[rows] = where(found, index // other_width, firsts[rows])
+            seconds[rows] = where(found, index % other_width, seconds[rows])
+    child_lengths = firsts + 1 + other_lengths - seconds
+    columns = arange(child_lengths.max() if len(child_lengths) else 0)[None, :]
+    child = where(columns <= firsts[:, None], gather(genes, columns), gather(other_genes, columns - firsts[:, None] - 1 + seconds[:, None]))
+    return where(columns < child_lengths[:, None], child, -1), child_lengths
+
+def remove_random_cuts(table, genes, lengths, rng):
+    """Remove a random number of successive cuts from each individual, at a random position where this is possible."""
+    num_cuts = 1 + (rng.random_sample(len(genes)) * lengths).astype(int)
+    segment_starts, segment_ends = table.segment_bounds(genes, lengths)
+    positions = arange(genes.shape[1])[None, :]
+    # removing cuts i to i + num_cuts - 1 merges segments i to i + num_cuts
+    last = minimum(positions + num_cuts[:, None], genes.shape[1])
+    merged_ends = segment_ends[arange(len(genes))[:, None], last]
+    index, found = pick((positions <= (lengths - num_cuts)[:, None]) & (segment_starts[:, :-1] < merged_ends), rng)
+    columns = positions + where(found[:, None] & (positions >= index[:, None]), num_cuts[:, None], 0)
+    new_lengths = where(found, lengths - num_cuts, lengths)
+    new_genes = gather(genes, columns)
+    return where(positions < new_lengths[:, None], new_genes, -1), new_lengths
+
+def insert_random_cut(table, genes, lengths, rng):
+    """Insert a random cut into a random segment of each individual, where the segment starts before and ends after the cut."""
+    segment_starts, segment_ends = table.segment_bounds(genes, lengths)
+    segments, cuts = zeros(len(genes), dtype=int), zeros(len(genes), dtype=int)
+    found = zeros(len(genes), dtype=bool)
+    for rows in chunks(len(genes), (genes.shape[1] + 1) * len(table)):
+        candidates = (segment_starts[rows, :, None] < table.starts[None, None, :]) & (table.ends[None, None, :] < segment_ends[rows, :, None])
+        candidates &= (arange(genes.shape[1] + 1) <= lengths[rows, None])[:, :, None]
+        index, found[rows] = pick(candidates, rng)
+        segments[rows], cuts[rows] = index // max(len(table), 1), index % max(len(table), 1)
+    positions = arange(genes.shape[1] + 1)[None, :]
+    new_genes = where(positions < segments[:, None], gather(genes, positions), gather(genes, positions - 1))
+    new_genes = where(positions == segments[:, None], cuts[:, None], new_genes)
+    new_genes = where(found[:, None], new_genes, pad(genes, genes.shape[1] + 1))
+    return new_genes, where(found, lengths + 1, lengths)
+
+def evolve(population, num_generations, rng, report=None):
+    """Breed ``population`` for the given number of generations and return the resulting population.
+
+    ``report(generation, population)`` is called after each generation if it is given.
+    """
+    algo = population.algo
+    for generation in range(num_generations):
+        population = (population + population.breed(algo.num_children, rng)).select(algo.num_individuals)
+        if report is not None:
+            report(generation, population)
+    return population
+
+def migrate(islands, num_migrants):
+    """Add the best ``num_migrants`` individuals of each island to the next island, in a ring."""
+    migrants = [island.subset(slice(num_migrants)) for island in islands]
+    return [(island + migrants[i-1]).select(island.algo.num_individuals) for i, island in enumerate(islands)]
+
+# state of a worker process of GeneticPathAlgorithm.find_path, set once when the process is started
+_worker_state = None
+
+def init_worker(algo, table, target_duration):
+    global _worker_state
+    _worker_state = (algo, table, target_duration)
+
+def evaluate_rows(task):
+    genes, lengths = task
+    algo, table, target_duration = _worker_state
+    return table.evaluate(genes, lengths)
+
+def evolve_island(task):
+    genes, lengths, scores, rng, num_generations = task
+    algo, table, target_duration = _worker_state
+    island = evolve(Population(algo, table, target_duration, genes, lengths, scores), num_generations, rng)
+    return island.genes, island.lengths, island.scores, rng
 
 class GeneticPathAlgorithm(PiecewisePathAlgorithm):
-    """Genetic algorithm for finding paths."""
+    """Genetic algorithm for finding paths.
+
+    With ``num_islands`` > 1, as many populations evolve independently, and every ``migration_interval`` generations, the best
+    ``num_migrants`` individuals of each island move on to the next. Islands are evolved in ``num_workers`` processes (0 for one per CPU);
+    with a single island, the evaluation of new individuals is split among the processes.
+    """
 
     def __init__(self, num_individuals=1000, num_generations=10, num_children=1000, random_seed="random",
             add_probability=0.4, remove_probability=0.4,
-            duration_penalty=1e2, cut_penalty=1e1, repetition_penalty=1e1):
+            duration_penalty=1e2, cut_penalty=1e1, repetition_penalty=1e1,
+            num_workers=1, num_islands=1, migration_interval=5, num_migrants=10):
         self.num_individuals = int(num_individuals)
         self.num_generations = int(num_generations)
         self.num_children = int(num_children)
@@ -91,28 +327,69 @@ class GeneticPathAlgorithm(PiecewisePathAlgorithm):
         self.duration_penalty = float(duration_penalty)
         self.cut_penalty = float(cut_penalty)
         self.repetition_penalty = float(repetition_penalty)
+        self.num_workers = int(num_workers)
+        self.num_islands = int(num_islands)
+        self.migration_interval = int(migration_interval)
+        self.num_migrants = int(num_migrants)
+        if self.num_islands < 1 or self.migration_interval < 1:
+            raise ValueError("there must be at least one island and one generation between migrations")
 
     def find_path(self, source_start, source_end, target_duration, cuts):
-        # TODO sometimes, the algorithm seems to yield different results even when run with the same random seed
-        if self.random_seed is not None:
-            seed(self.random_seed)
-
-        population = [GeneticPath(self, [Keypoint(source_start, 0), Keypoint(source_end, target_duration)]) for i in range(self.num_individuals)]
-        cuts = sorted(Cut(s, e, c) for s, e, c in cuts)
+        table = CutTable(cuts, source_start, source_end)
+        pool = None
+        if self.num_workers != 1:
+            pool = Pool(self.num_workers or None, init_worker, (self, table, target_duration))
+        try:
+            evaluate = Evaluator(table, pool, self.num_workers or cpu_count())
+            initial = self.initial_genes(table, source_start, source_end, cuts)
+            if self.num_islands == 1:
+                # the island model with a single island is just the plain genetic algorithm
+                population = evolve(Population(self, table, target_duration, *initial, evaluate=evaluate), self.num_generations,
+                        RandomState(self.random_seed), lambda generation, population: self.report(generation, population))
+            else:
+                population = self.evolve_islands(Population(self, table, target_duration, *initial), pool)
+        finally:
+            if pool is not None:
+                pool.terminate()
 
-        for generation in range(self.num_generations):
-            print
-            print "%s: computing generation %d" % (datetime.now().strftime("%c"), generation + 1)
+        return population.individual(0)
 
-            population.extend(x.breed(y, cuts) for x, y in (permutation(population)[:2] for c in range(self.num_children)))
-            population = unique(population)[:self.num_individuals]
-            
-            costs = [p.cost() for p in population]
-            durations = [p.duration / float(target_duration) for p in population]
-            nums_cuts = [len(p.cuts) for p in population]
-            print "min/avg/max cost:", min(costs), sum(costs) / float(len(population)), max(costs)
-            print "min/avg/max duration / desired duration:", min(durations), sum(durations) / float(len(population)), max(durations)
-            print "min/avg/max number of cuts:", min(nums_cuts), sum(nums_cuts) / float(len(population)), max(nums_cuts)
+    def initial_genes(self, table, source_start, source_end, cuts):
+        """Return the genes and lengths of the initial population: individuals without cuts, and the ``warm_piece()``, if any."""
+        genes, lengths = zeros((self.num_individuals, 0), dtype=int), zeros(self.num_individuals, dtype=int)
+        warm = self.warm_piece(source_start, source_end, cuts)
+        warm = table.encode(warm) if warm is not None else None
+        if warm and self.num_individuals:
+            warm_genes, warm_lengths = asarray([warm], dtype=int), asarray([len(warm)])
+            if table.is_valid(warm_genes, warm_lengths)[0]:
+                genes = pad(genes, len(warm))
+                genes[0], lengths[0] = warm_genes[0], warm_lengths[0]
+        return genes, lengths
 
-        return population[0]
+    def evolve_islands(self, population, pool):
+        """Evolve ``num_islands`` copies of ``population`` with migration and return the union of the final islands."""
+        # each island has its own random number generator, so that the result does not depend on the number of workers
+        islands = [population] * self.num_islands
+        rngs = [RandomState([self.random_seed, i]) for i in range(self.num_islands)]
+        for first in range(0, self.num_generations, self.migration_interval):
+            num_generations = min(self.migration_interval, self.num_generations - first)
+            if pool is None:
+                islands = [evolve(island, num_generations, rng) for island, rng in zip(islands, rngs)]
+            else:
+                results = pool.map(evolve_island, [(island.genes, island.lengths, island.scores, rng, num_generations)
+                        for island, rng in zip(islands, rngs)])
+                islands = [population.derive(genes, lengths, scores) for genes, lengths, scores, rng in results]
+                rngs = [rng for genes, lengths, scores, rng in results]
+            if first + num_generations < self.num_generations:
+                islands = migrate(islands, self.num_migrants)
+            self.report(first + num_generations - 1, reduce(lambda a, b: a + b, islands).select(self.num_individuals * self.num_islands))
+        return reduce(lambda a, b: a + b, islands).select(self.num_individuals)
 
+    def report(self, generation, population):
+        """Print statistics about the population after the given generation."""
+        print
+        print "%s: computed generation %d" % (datetime.now().strftime("%c"), generation + 1)
+        durations = population.durations / float(population.target_duration)
+        print "min/avg/max cost:", population.costs.min(), population.costs.mean(), population.costs.max()
+        print "min/avg/max duration / desired duration:", durations.min(), durations.mean(), durations.max()
+        print "min/avg/max number of cuts:", population.lengths.min(), population.lengths.mean(), population.lengths.max()
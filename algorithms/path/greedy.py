@@ -1,17 +1,44 @@
 from heapq import heappush, heappop
 from bisect import bisect
-from numpy import prod
+from math import expm1
 
-from ..algorithm import Segment, Path, PiecewisePathAlgorithm, Keypoint
+from ..algorithm import Segment, CompactPath, PiecewisePathAlgorithm, Keypoint
+from ..repetition import RepetitionIndex
+from jumpgraph import JumpGraph
 
 def find_next(item, sorted_list):
     return sorted_list[bisect(sorted_list, item)]
 
-class CostAwarePath(Path):
+class CostAwarePath(CompactPath):
+    """Path with the cost function of the greedy algorithm. The multiplicities of its segments are kept in a ``RepetitionIndex`` that is
+    updated as segments are appended, and rebuilt when other edits are made."""
+
     def __init__(self, algo, segments=None, keypoints=None, cut_cost=0):
+        self.repetitions = RepetitionIndex()
         super(CostAwarePath, self).__init__(segments, keypoints)
         self.algo = algo
         self.cut_cost = cut_cost
+        self._cost = None
+
+    def copy(self):
+        ret_val = super(CostAwarePath, self).copy()
+        ret_val.repetitions = self.repetitions.copy() if self.repetitions is not None else None
+        return ret_val
+
+    def _modified(self):
+        self._cost = None
+
+    def _extend(self, starts, ends):
+        if not self._size: # all segments are replaced
+            self.repetitions = RepetitionIndex()
+        if self.repetitions is not None:
+            for start, end in zip(starts, ends):
+                self.repetitions.insert(Segment(start, end))
+        super(CostAwarePath, self)._extend(starts, ends)
+
+    def _splice(self, first, last, starts, ends):
+        self.repetitions = None # rebuilt when it is needed
+        super(CostAwarePath, self)._splice(first, last, starts, ends)
 
     def add_segment(self, cost, segment):
         self.cut_cost += cost
@@ -19,16 +46,21 @@ class CostAwarePath(Path):
 
     def cost(self):
         """Compute the cost of the path based on a quality metric."""
-        duration_cost = abs(self.duration - (self.keypoints[-1].target - self.keypoints[0].target)) ** 2
-        repetition_cost = prod([self.segments.count(x) for x in set(self.segments)]) - 1
-        return self.algo.duration_penalty * duration_cost + self.algo.cut_penalty * self.cut_cost + self.algo.repetition_penalty * repetition_cost
+        if self._cost is None:
+            if self.repetitions is None:
+                self.repetitions = RepetitionIndex(self.segments)
+            duration_cost = abs(self.duration - (self.keypoints[-1].target - self.keypoints[0].target)) ** 2
+            # the product of multiplicities minus 1, computed from its logarithm, which does not overflow
+            log_multiplicity = self.repetitions.log_multiplicity
+            repetition_cost = expm1(log_multiplicity) if log_multiplicity < 700 else float("inf")
+            self._cost = self.algo.duration_penalty * duration_cost + self.algo.cut_penalty * self.cut_cost + self.algo.repetition_penalty * repetition_cost
+        return self._cost
 
     @property
     def end(self):
-        try:
-            return self.segments[-1].end
-        except IndexError:
-            return self.keypoints[0].source
+        if self._size:
+            return int(self._ends[self._size-1])
+        return self.keypoints[0].source
 
 class GreedyPathAlgorithm(PiecewisePathAlgorithm):
     def __init__(self, num_paths=50, grace_period=0, duration_penalty=1e-5, cut_penalty=1e1, repetition_penalty=1e3):
@@ -72,9 +104,18 @@ class GreedyPathAlgorithm(PiecewisePathAlgorithm):
                 # add empty dict of options
                 self.options.setdefault(segment_end, {})
 
+        # minimum durations needed to reach the end from each segment end
+        graph = JumpGraph(cuts, source_start, source_end)
+        graph.compute_bounds(target_duration + self.grace_period)
+
+        # a path of an earlier run is a bound for the cost of the paths worth searching
+        keypoints = [Keypoint(source_start, 0), Keypoint(source_end, target_duration)]
+        warm = self.warm_path(source_start, source_end, cuts, keypoints)
+        incumbent = warm.cost() if warm is not None else float("inf")
+
         # find paths
         processed = 0
-        incomplete = [CostAwarePath(self, [], [Keypoint(source_start, 0), Keypoint(source_end, target_duration)])] # heapqueue of incomplete paths
+        incomplete = [CostAwarePath(self, [], keypoints)] # heapqueue of incomplete paths
         complete = [] # sorted list of complete paths
 
         while incomplete and len(complete) < self.num_paths: # still incomplete paths to process
@@ -82,13 +123,35 @@ class GreedyPathAlgorithm(PiecewisePathAlgorithm):
             path = heappop(incomplete) # get shortest incomplete path
             processed += 1
             for option in self.options[path.end].values():
-                newpath = CostAwarePath(self, path.segments[:], path.keypoints[:], path.cut_cost)
+                newpath = path.copy()
                 newpath.add_segment(*option) # add a possible cut
                 if newpath.end == source_end: # path arrived at end of source
                     heappush(complete, newpath)
-                elif newpath.duration <= target_duration + self.grace_period: # adding cuts to path will make it better
+                elif self.lower_bound(newpath, graph, target_duration) >= incumbent: # path cannot get better than the earlier one
+                    pass
+                elif newpath.duration + graph.bounds_after(newpath.end)[0] <= target_duration + self.grace_period: # path can still end in time
                     heappush(incomplete, newpath)
         
         print "\r%d paths processed, %d in queue, %d completed" % (processed, len(incomplete), len(complete))
+        if warm is not None and (not complete or warm.cost() <= complete[0].cost()):
+            return warm
         return complete[0]
 
+    def warm_path(self, source_start, source_end, cuts, keypoints):
+        """Return the piece of ``warm_start`` between the keypoints as a ``CostAwarePath``, or ``None``."""
+        segments = self.warm_piece(source_start, source_end, cuts)
+        if segments is None:
+            return None
+        cut_costs = {}
+        for cut in cuts:
+            cut_costs[cut.start, cut.end] = min(cut.cost, cut_costs.get((cut.start, cut.end), cut.cost))
+        cut_cost = sum(cut_costs[a.end, b.start] for a, b in zip(segments, segments[1:]) if a.end != b.start)
+        return CostAwarePath(self, segments, keypoints, cut_cost)
+
+    def lower_bound(self, path, graph, target_duration):
+        """Return a lower bound for the costs of all complete paths that continue ``path``."""
+        # cut and repetition costs can only grow, the duration error can only shrink to what is reachable from the end of the path
+        min_after, max_after = graph.bounds_after(path.end)
+        error = max(0, path.duration + min_after - target_duration, target_duration - (path.duration + max_after))
+        return path.cost() - self.duration_penalty * (path.duration - target_duration) ** 2 + self.duration_penalty * error ** 2
+
@@ -0,0 +1,135 @@
+from numpy import asarray, zeros, ones, full, cumsum, concatenate, repeat, arange, diff, bincount, flatnonzero, isfinite, inf
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra, connected_components
+
+from ..algorithm import Segment
+
+def duration_bounds(offsets, targets, durations, terminal, max_duration):
+    """Compute, for every node of a graph in CSR form, the minimum and maximum duration of a path from that node to a terminal node.
+
+    Both durations include the duration of the node itself. The maximum is only computed up to ``max_duration``; nodes that can run into
+    a loop on their way to a terminal node get exactly ``max_duration``. Nodes that cannot reach a terminal node get ``inf`` and ``-inf``.
+    Terminal nodes may have successors, i.e. paths may pass through them.
+    """
+
+    num_nodes = len(durations)
+    offsets, targets = asarray(offsets, dtype=int), asarray(targets, dtype=int)
+    durations = asarray(durations, dtype=float)
+    rows = repeat(arange(num_nodes), diff(offsets))
+    sink = num_nodes # virtual node that follows every terminal node
+
+    # shortest distance to the sink; every edge costs the duration of the node it leaves
+    ends = flatnonzero(terminal)
+    graph = csr_matrix((ones(len(rows) + len(ends)), (concatenate([rows, ends]), concatenate([targets, full(len(ends), sink, dtype=int)]))),
+            shape=(num_nodes + 1, num_nodes + 1))
+    graph.data[:] = concatenate([durations, [0.0]])[repeat(arange(num_nodes + 1), diff(graph.indptr))]
+    min_remaining = dijkstra(graph.T, directed=True, indices=sink)[:num_nodes]
+    reachable = isfinite(min_remaining)
+
+    # nodes within a strongly connected component can be repeated arbitrarily often
+    num_components, labels = connected_components(graph, directed=True, connection="strong")
+    cyclic = (bincount(labels)[labels] > 1)[:num_nodes] | (graph.diagonal()[:num_nodes] > 0)
+
+    # longest distance to the sink, processing nodes in reverse topological order of their components
+    successors = [set(targets[offsets[i]:offsets[i+1]]) for i in range(num_nodes)]
+    predecessors = [[] for i in range(num_nodes)]
+    for i in range(num_nodes):
+        for j in successors[i]:
+            predecessors[j].append(i)
+    pending = [sum(1 for j in successors[i] if labels[j] != labels[i]) for i in range(num_nodes)]
+    component_pending = bincount(labels[:num_nodes], pending, minlength=num_components)
+    queue = [c for c in set(labels[:num_nodes]) if component_pending[c] == 0]
+    members = [[] for c in range(num_components)]
+    for i in range(num_nodes):
+        members[labels[i]].append(i)
+    max_remaining = full(num_nodes, -inf)
+    while queue:
+        component = queue.pop()
+        nodes = members[component]
+        if cyclic[nodes[0]]:
+            if reachable[nodes[0]]:
+                max_remaining[nodes] = max_duration
+        else:
+            i = nodes[0]
+            longest = max([0.0 if terminal[i] else -inf] + [max_remaining[j] for j in successors[i]])
+            max_remaining[i] = min(durations[i] + longest, max_duration)
+        for i in nodes:
+            for j in predecessors[i]:
+                if labels[j] != component:
+                    component_pending[labels[j]] -= 1
+                    if component_pending[labels[j]] == 0:
+                        queue.append(labels[j])
+
+    return min_remaining, max_remaining
+
+class JumpGraph(object):
+    """Graph of the playable segments between two keypoints, stored in flat arrays.
+
+    Node ``i`` copies the source from ``starts[i]`` to ``ends[i]``, where ``ends[i]`` is the next position after ``starts[i]`` at which a
+    cut may be taken (or ``source_end``). The successors of node ``i`` are ``targets[offsets[i]:offsets[i+1]]``, reached with the cut costs
+    ``costs[offsets[i]:offsets[i+1]]``; just continuing to play has cost 0. Nodes ending at ``source_end`` are terminal and have no successors.
+    """
+
+    def __init__(self, cuts, source_start, source_end):
+        # all sample points that can be the end of a copied segment
+        segment_ends = sorted(set([cut.start for cut in cuts] + [source_start, source_end]))
+        # all sample points where copying can start: after a cut, after continuing to play, or at the start keypoint
+        positions = sorted(set([source_start] + [cut.end for cut in cuts] + segment_ends))
+        positions = [p for p in positions if p < segment_ends[-1]]
+        self.index = dict((p, i) for i, p in enumerate(positions))
+
+        self.source_start, self.source_end = source_start, source_end
+        self.starts = asarray(positions, dtype=int)
+        self.ends = asarray(segment_ends, dtype=int)[asarray(segment_ends).searchsorted(self.starts, side="right")]
+        self.durations = self.ends - self.starts
+        self.terminal = self.ends == source_end
+        self.start = self.index[source_start]
+
+        # collect outgoing edges per segment end
+        jumps = {}
+        for cut in cuts:
+            if cut.end in self.index:
+                jumps.setdefault(cut.start, []).append((self.index[cut.end], cut.cost))
+        targets, costs, degrees = [], [], []
+        for end, terminal in zip(self.ends, self.terminal):
+            edges = []
+            if not terminal:
+                if end in self.index: # just continue playing
+                    edges.append((self.index[end], 0.0))
+                edges.extend(jumps.get(end, []))
+            targets.extend(target for target, cost in edges)
+            costs.extend(cost for target, cost in edges)
+            degrees.append(len(edges))
+        self.targets = asarray(targets, dtype=int)
+        self.costs = asarray(costs, dtype=float)
+        self.offsets = concatenate([zeros(1, dtype=int), cumsum(degrees, dtype=int)])
+
+    def compute_bounds(self, max_duration):
+        """Compute ``min_remaining`` and ``max_remaining``, the range of durations of paths from each node to ``source_end``.
+
+        The durations include the node itself; see ``duration_bounds()``.
+        """
+        self.min_remaining, self.max_remaining = duration_bounds(self.offsets, self.targets, self.durations, self.terminal, max_duration)
+        self.ending = dict((end, i) for i, end in enumerate(self.ends))
+
+    def can_finish(self, node, duration, target_duration, tolerance=0):
+        """Check whether a path whose last node is ``node`` and whose duration is ``duration`` can reach ``source_end`` with a duration of
+        ``target_duration`` +- ``tolerance``. Works element-wise on arrays. ``compute_bounds()`` must have been called before."""
+        elapsed = duration - self.durations[node]
+        return (elapsed + self.min_remaining[node] <= target_duration + tolerance) & (elapsed + self.max_remaining[node] >= target_duration - tolerance)
+
+    def bounds_after(self, frame):
+        """Return the minimum and maximum duration that remains to be played after a segment that ends at ``frame``."""
+        node = self.ending[frame]
+        return self.min_remaining[node] - self.durations[node], self.max_remaining[node] - self.durations[node]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def successors(self, node):
+        """Return the successor nodes of ``node`` and the costs of reaching them."""
+        return self.targets[self.offsets[node]:self.offsets[node+1]], self.costs[self.offsets[node]:self.offsets[node+1]]
+
+    def segment(self, node):
+        """Return the ``Segment`` copied by ``node``."""
+        return Segment(int(self.starts[node]), int(self.ends[node]))
@@ -15,17 +15,20 @@
 # choosing a loop is a random decision
 
 from collections import namedtuple
-from heapq import heappush, heappop
-from math import sqrt
-from bisect import bisect_right
-from numpy.random import random, randint, permutation, seed
+from math import sqrt, exp, expm1
+from bisect import bisect_right, bisect_left
+from multiprocessing import Pool
+from numpy.random import randint, RandomState
+import numpy.random
 from scipy.stats import norm
-from numpy import prod, unique, std
+from numpy import unique, std
 from ..algorithm import PiecewisePathAlgorithm, Path, Keypoint, Segment as SimpleSegment
+from ..repetition import RepetitionIndex
 from segment import create_automaton
+from cycles import AutomatonGraph
 
 class LoopPathAlgorithm(PiecewisePathAlgorithm):
-    def __init__(self, random_seed = "random", num_paths=10, duration_penalty=1e2, cut_penalty=1e1, repetition_penalty=1e1, iterations=20, new_paths_per_iteration=10, deviation_divisor=10, max_rounds_without_change=3, first_fit_loop_integration = "True"):
+    def __init__(self, random_seed = "random", num_paths=10, duration_penalty=1e2, cut_penalty=1e1, repetition_penalty=1e1, iterations=20, new_paths_per_iteration=10, deviation_divisor=10, max_rounds_without_change=3, first_fit_loop_integration = "True", num_workers=1):
         self.random_seed = randint((1 << 31) - 1) if random_seed == "random" else int(random_seed)
         self.num_paths = int(num_paths)
         self.duration_penalty = int(duration_penalty)
@@ -39,13 +42,26 @@ class LoopPathAlgorithm(PiecewisePathAlgorithm):
         booleans = {"True": True, "False": False, "true": True, "false": False, True: True, False: False}
         # recognize boolean string argument or raise KeyError
         self.first_fit_loop_integration = booleans[first_fit_loop_integration]
+        # number of processes that expand paths, 0 for one per CPU
+        self.num_workers = int(num_workers)
+        # automata and their loops, see get_loop_table
+        self.loop_tables = {}
+
+    def get_loop_table(self, source_start, source_end, cuts):
+        """Create the automaton for the given piece and find its loops, or reuse the ones from an earlier call with the same arguments."""
+        key = (source_start, source_end, tuple(sorted(cuts)))
+        if key not in self.loop_tables:
+            automat, start_segment, end_segment = create_automaton(cuts, source_start, source_end)
+            graph = AutomatonGraph(automat)
+            self.loop_tables[key] = LoopTable(automat, start_segment, end_segment, graph, sorted(set(calc_loops(graph))))
+        return self.loop_tables[key]
 
     def find_path(self, source_start, source_end, target_duration, cuts): 
-        if self.random_seed is not None:
-            seed(self.random_seed)
-        automat, start_segment, end_segment = create_automaton(cuts, source_start, source_end)
-        initial_path = LoopPath(self, dijkstra(start_segment, end_segment), target_duration, self.first_fit_loop_integration)
-        loops = sorted(set(calc_loops(automat)))
+        automat, start_segment, end_segment, graph, loops = self.get_loop_table(source_start, source_end, cuts)
+        # start from the path of an earlier run, if there is one, or from the shortest path
+        warm = self.warm_piece(source_start, source_end, cuts)
+        initial_loop = (warm is not None and warm_loop(graph, warm)) or dijkstra(graph, start_segment, end_segment)
+        initial_path = LoopPath(self, initial_loop, target_duration, self.first_fit_loop_integration)
         # initial_path is an instance of LoopPath
         # loops is a list of Loops, sorted by duration
         # choose several loops to augment the paths
@@ -58,33 +74,36 @@ class LoopPathAlgorithm(PiecewisePathAlgorithm):
         paths = [initial_path]
         old_paths = []
         old_paths_counter = 0
-        for i in range(self.iterations):
-            # if nothing happens anymore, early break
-            if paths == old_paths:
-                old_paths_counter += 1
-            else:
-                old_paths = paths
-                old_paths_counter = 0
-            if old_paths_counter == self.max_rounds_without_change:
-                break
-            print "Iteration %d, cost of best path %d, Number of paths %d" % (i, sorted(paths)[0].cost(), len(paths))
-            new_paths = []
-            for path in paths:
-                missing_duration = path.missing_duration()
-                std_deviation = missing_duration / self.deviation_divisor
-                if missing_duration > 0:
-                    chosen_loops = pick(loops, missing_duration, std_deviation, self.new_paths_per_iteration)
-                    for loop in chosen_loops:
-                        try:
-                            new_path = path.integrate_loop(loop)
-                            new_paths.append(new_path)
-                        except PathNotMatchingToLoopError:
-                            pass
+        # every path is expanded with its own random number generator, seeded from random_seed, the iteration and its position in paths,
+        # so that the result does not depend on the number of workers
+        pool = None
+        if self.num_workers != 1:
+            # the workers are forked with the loop table, so that only paths are sent back and forth
+            pool = Pool(self.num_workers or None, _init_worker, (self, graph, loops))
+        try:
+            for i in range(self.iterations):
+                # if nothing happens anymore, early break
+                if paths == old_paths:
+                    old_paths_counter += 1
+                else:
+                    old_paths = paths
+                    old_paths_counter = 0
+                if old_paths_counter == self.max_rounds_without_change:
+                    break
+                print "Iteration %d, cost of best path %.0f, Number of paths %d" % (i, sorted(paths)[0].cost(), len(paths))
+                seeds = [(self.random_seed, i, k) for k in range(len(paths))]
+                new_paths = []
+                if pool is None:
+                    for path, path_seed in zip(paths, seeds):
+                        new_paths.extend(expand_path(path, loops, self.deviation_divisor, self.new_paths_per_iteration, RandomState(path_seed)))
                 else:
-                    chosen_removable_pieces = pick(path.get_removable_pieces(), missing_duration, std_deviation, self.new_paths_per_iteration)
-                    for piece in chosen_removable_pieces:
-                        new_paths.append(path.remove_piece(piece))
-            paths = uniquify_LoopPaths(paths + new_paths)[:self.num_paths]
+                    tasks = [(encode_path(graph, path), target_duration, path_seed) for path, path_seed in zip(paths, seeds)]
+                    for encoded_paths in pool.map(_expand_encoded_path, tasks):
+                        new_paths.extend(decode_path(self, graph, encoded, target_duration) for encoded in encoded_paths)
+                paths = uniquify_LoopPaths(paths + new_paths)[:self.num_paths]
+        finally:
+            if pool is not None:
+                pool.terminate()
         return sorted(paths)[0].convert_to_simple_segment()
 
 def distribution_function(mean, std_deviation):
@@ -103,8 +122,8 @@ def weight(loops, mean, std_deviation, df = distribution_function):
     rv = df(mean, std_deviation)
     return [rv.pdf(loop.duration) for loop in loops]
 
-def pick_index(loops_probability):
-    rand_number = random() * sum(loops_probability)
+def pick_index(loops_probability, rng=numpy.random):
+    rand_number = rng.random_sample() * sum(loops_probability)
     sum_of_probabilities = 0.0
     for i in range(len(loops_probability)):
        sum_of_probabilities += loops_probability[i]
@@ -112,9 +131,9 @@ def pick_index(loops_probability):
            break
     return i
 
-def pick(loops, mean, std_deviation, new_paths_per_iteration):
+def pick(loops, mean, std_deviation, new_paths_per_iteration, rng=numpy.random):
     loops_probability = weight(loops, mean, std_deviation)
-    indizes = [pick_index(loops_probability) for i in range(new_paths_per_iteration)]
+    indizes = [pick_index(loops_probability, rng) for i in range(new_paths_per_iteration)]
     return [loops[i] for i in unique(indizes)]
 
 def uniquify_LoopPaths(paths):
@@ -129,17 +148,59 @@ def uniquify_LoopPaths(paths):
 
 Loop = namedtuple('Loop', "duration cost path used")
 
+LoopTable = namedtuple('LoopTable', "automaton start_segment end_segment graph loops")
+
 def loop_to_loop_with_tuples(loop):
     return Loop(loop.duration, tuple(loop.cost), tuple(loop.path), loop.used)
 
 # taken from genetic.py
-def choice(l):
+def choice(l, rng=numpy.random):
     if len(l) == 0:
         raise IndexError("random choice from empty sequence")
-    return l[randint(len(l))]
+    return l[rng.randint(len(l))]
+
+def expand_path(path, loops, deviation_divisor, new_paths_per_iteration, rng=numpy.random):
+    # return new paths that are closer to the target duration than path, by integrating loops or removing pieces
+    new_paths = []
+    missing_duration = path.missing_duration()
+    std_deviation = missing_duration / deviation_divisor
+    if missing_duration > 0:
+        chosen_loops = pick(loops, missing_duration, std_deviation, new_paths_per_iteration, rng)
+        for loop in chosen_loops:
+            try:
+                new_paths.append(path.integrate_loop(loop, rng))
+            except PathNotMatchingToLoopError:
+                pass
+    else:
+        chosen_removable_pieces = pick(path.get_removable_pieces(), missing_duration, std_deviation, new_paths_per_iteration, rng)
+        for piece in chosen_removable_pieces:
+            new_paths.append(path.remove_piece(piece))
+    return new_paths
+
+def encode_path(graph, path):
+    # compact representation of path for sending it to another process: segment indices in graph and cut costs
+    return [graph.index[segment.start] for segment in path.segments], path.cut_cost
+
+def decode_path(algo, graph, encoded, target_duration):
+    indices, cut_cost = encoded
+    return LoopPath(algo, Loop(None, cut_cost, [graph.segments[i] for i in indices], 0), target_duration, algo.first_fit_loop_integration)
+
+# state of a worker process of LoopPathAlgorithm.find_path, set once when the process is started
+_worker_state = None
+
+def _init_worker(algo, graph, loops):
+    global _worker_state
+    _worker_state = (algo, graph, loops)
+
+def _expand_encoded_path(task):
+    encoded, target_duration, path_seed = task
+    algo, graph, loops = _worker_state
+    path = decode_path(algo, graph, encoded, target_duration)
+    new_paths = expand_path(path, loops, algo.deviation_divisor, algo.new_paths_per_iteration, RandomState(path_seed))
+    return [encode_path(graph, new_path) for new_path in new_paths]
 
 def is_loop_valid(loop):
-    ret_val = LoopPath(None, loop, 0).is_valid()
+    ret_val = LoopPath(None, loop, 0, False).is_valid()
     ret_val &= loop.path[-1][loop.cost[0]] == loop.path[0]
     return ret_val
 
@@ -149,74 +210,59 @@ def are_loops_valid(loops):
         ret_val &= is_loop_valid(loop)
     return ret_val
 
-def dijkstra(start, end):
-    # start/end are segments
-    # convert to a usable graph structur and convert back?
-    # or build dijkstra myself?
-    # build dijkstra myself
+def dijkstra(graph, start, end):
+    # start/end are segments, graph is the AutomatonGraph of their automaton
     # returns the shortest path from start to end
-    priority_queue = [Loop(0, [0], [start], 0)]
-    final_segments = []
-    while priority_queue and priority_queue[0].path[-1] != end:
-        item = heappop(priority_queue)
-        # TODO maybe we can use the path to item later
-        final_segments.append(item.path[-1])
-        new_duration = item.duration + item.path[-1].duration
-        for cost in item.path[-1]:
-            segment = item.path[-1][cost]
-            if not segment in final_segments:
-                heappush(priority_queue, Loop(new_duration, item.cost + [cost], item.path + [segment], 0))
-    if priority_queue:
-        return priority_queue[0]
-    else:
+    path = graph.shortest_path(graph.index[start.start], graph.index[end.start])
+    if path is None:
         return Loop(-1, [0], [], 0)
+    return Loop(graph.durations[path[:-1]].sum(), [0] + graph.path_costs(path), [graph.segments[i] for i in path], 0)
 
-def calc_loops(automata):
-    loops = calc_short_loops(automata)
-    loops += calc_straight_loops(automata)
+def warm_loop(graph, segments):
+    # segments is a path of simple segments, e.g. from an earlier run, graph is the AutomatonGraph of the automaton it should run through
+    # returns the path through the segments of the automaton that plays the same, or None if there is none
+    path = []
+    for segment in segments:
+        i = graph.index.get(segment.start)
+        if i is None:
+            return None
+        # the automaton splits the segment at every cut position
+        path.append(i)
+        while graph.segments[i].end < segment.end and i + 1 < len(graph.segments):
+            i += 1
+            path.append(i)
+        if graph.segments[i].end != segment.end:
+            return None
+    if any((a, b) not in graph.cheapest for a, b in zip(path, path[1:])):
+        return None
+    return Loop(graph.durations[path[:-1]].sum(), [0] + graph.path_costs(path), [graph.segments[i] for i in path], 0)
+
+def calc_loops(graph):
+    loops = calc_short_loops(graph)
+    loops += calc_straight_loops(graph)
     return loops
 
-# give a sorted list of loops with their length
-# a loop consists of (start, end), length, while start and end are segments or framenumbers
-def calc_short_loops(automata):
-    # shortest loop can be achieved by stepping to the successor of the node and then finding a path back to the node by using dijkstra
-    # more longer loops can be created by looking, when the shorter one jumped to the start. to create a longer loop don't take the jump and dijkstra again
-    # take caution that jumps always move towards the end, if a jump moves away from the end break
+# give a list of loops with their length
+# a loop consists of the segments between the target of a jump and the segment the jump was taken from
+def calc_short_loops(graph):
+    # shortest loop can be achieved by stepping to the successor of the node and then finding a path back to the node
     # we want loops where every node is taken only once (finite amount of loops and each loop is unique)
     loops = []
-    segment = automata[sorted(automata.keys())[0]]
-    while segment.has_followers:
-        for cost in segment:
-            next_segment = segment[cost]
-            possible_loop = dijkstra(next_segment, segment)
-            if possible_loop.duration >= 0:
-                # since this is a loop the first element may have a cost != 0
-                for cost in possible_loop.path[-1]:
-                    if possible_loop.path[-1][cost] == possible_loop.path[0]:
-                        possible_loop.cost[0] = cost
-                        break
-                loops.append(loop_to_loop_with_tuples(possible_loop))
-            # TODO find more loops, by looking after the jump towards the start, really needed? -> creates more jumps than desired
-        segment = segment.following_segment()[1]
+    for first, path in graph.loops():
+        # since this is a loop the first element has the cost of the jump back to its start
+        cost = [graph.cheapest[first, path[0]]] + graph.path_costs(path)
+        loops.append(Loop(graph.durations[path].sum(), tuple(cost), tuple(graph.segments[i] for i in path), 0))
     return loops
 
-def calc_straight_loops(automata):
+def calc_straight_loops(graph):
+    # loops that jump back and then just play until the jump is reached again
     loops = []
-    segment = automata[sorted(automata.keys())[0]]
-    while segment.has_followers:
+    target_ends = graph.durations.cumsum()
+    for i, segment in enumerate(graph.segments):
         for cost in segment:
-            next_segment = segment[cost]
-            if next_segment.start < segment.start:
-                cost_list = [cost]
-                path = [next_segment]
-                duration = next_segment.duration
-                while next_segment != segment:
-                    next_cost, next_segment = next_segment.following_segment()
-                    cost_list.append(next_cost)
-                    path.append(next_segment)
-                    duration += next_segment.duration
-                loops.append(Loop(duration, tuple(cost_list), tuple(path), 0))
-        segment = segment.following_segment()[1]
+            j = graph.index[segment[cost].start]
+            if j < i:
+                loops.append(Loop(target_ends[i] - target_ends[j] + graph.durations[j], (cost,) + (0.0,) * (i - j), tuple(graph.segments[j:i+1]), 0))
     return loops
 
 class PathNotMatchingToLoopError(Exception):
@@ -231,6 +277,29 @@ class LoopPath(Path):
         self.deterministic = deterministic
         keypoints = [Keypoint(loop.path[0], 0), Keypoint(loop.path[-1], target_duration)]
         super(LoopPath, self).__init__(loop.path[:], keypoints)
+        # duration, sum of cut costs and multiplicity of each segment are kept up to date by integrate_loop and remove_piece
+        self._duration = sum(segment.duration for segment in self.segments)
+        self._cut_cost_sum = sum(self.cut_cost)
+        self.repetitions = RepetitionIndex(self.segments)
+        self._cost = None
+
+    def _derive(self, segments, cut_cost, duration, cut_cost_sum, added=(), removed=()):
+        # create a path with the given segments and statistics, based on the repetitions of self
+        ret_val = LoopPath.__new__(LoopPath)
+        ret_val.algo, ret_val.deterministic, ret_val.keypoints = self.algo, self.deterministic, self.keypoints[:]
+        ret_val.segments, ret_val.cut_cost = segments, cut_cost
+        ret_val._duration, ret_val._cut_cost_sum = duration, cut_cost_sum
+        ret_val.repetitions = self.repetitions.copy()
+        for segment in added:
+            ret_val.repetitions.insert(segment)
+        for segment in removed:
+            ret_val.repetitions.remove(segment)
+        ret_val._cost = None
+        return ret_val
+
+    @property
+    def duration(self):
+        return self._duration
 
     def is_valid(self):
         ret_val = len(self.segments) == len(self.cut_cost)
@@ -239,9 +308,13 @@ class LoopPath(Path):
         return ret_val
 
     def remove_piece(self, piece):
-        ret_val = self.copy()
-        ret_val.segments = self.segments[:piece.start_index+1] + self.segments[piece.end_index:]
-        ret_val.cut_cost = self.cut_cost[:piece.start_index+1] + [piece.new_cost] + self.cut_cost[piece.end_index+1:]
+        removed = self.segments[piece.start_index+1:piece.end_index]
+        ret_val = self._derive(
+                self.segments[:piece.start_index+1] + self.segments[piece.end_index:],
+                self.cut_cost[:piece.start_index+1] + [piece.new_cost] + self.cut_cost[piece.end_index+1:],
+                self._duration - piece.duration,
+                self._cut_cost_sum - sum(self.cut_cost[piece.start_index+1:piece.end_index+1]) + piece.new_cost,
+                removed=removed)
         assert ret_val.is_valid()
         return ret_val
 
@@ -250,61 +323,76 @@ class LoopPath(Path):
         # prefer removable sequences with a bigger duration than time
         # prefer removing sequences with lots of jumps / high cost => need a decision who lowers the cost best
         Removable_Piece = namedtuple("Removable_Piece", "duration old_cost new_cost start_index end_index")
+        # positions of the segments in the path, indexed by their start frame
+        positions = {}
+        for k, segment in enumerate(self.segments):
+            positions.setdefault(segment.start, []).append(k)
+        # target_ends[k] is the duration of, cost_sums[k] the sum of costs up to, but not including, the k-th segment
+        target_ends, cost_sums = [0], [0]
+        for segment, cost in zip(self.segments, self.cut_cost):
+            target_ends.append(target_ends[-1] + segment.duration)
+            cost_sums.append(cost_sums[-1] + cost)
         rp = []
         for i in range(len(self.segments)):
-            # duration and cost is what we get if we remove the segments between i and j
-            # duration is the sum of the duration of the to be removed segments
-            duration = 0
-            # cost is the sum of previous costs for the jumps of the segments which are to be removed
-            cost = 0
-            for j in range(len(self.segments))[i+1:-1]:
-                # what if we remove up to the j-th segment
-                duration += self.segments[j].duration
-                cost += self.cut_cost[j]
-                for _cost in self.segments[i]:
-                    # end of j-th segment must be a jump from the i-th
-                    # cost we save would be cost - _cost
-                    if self.segments[i][_cost].start == self.segments[j+1].start:
-                        rp.append(Removable_Piece(duration, cost, _cost, i, j+1))
+            for _cost in self.segments[i]:
+                # the segments between i and k can be removed if k is a jump target of the i-th segment
+                # duration and cost is what we get if we remove them, cost we save would be cost - _cost
+                jump_positions = positions.get(self.segments[i][_cost].start, [])
+                for k in jump_positions[bisect_left(jump_positions, i + 2):]:
+                    rp.append(Removable_Piece(target_ends[k] - target_ends[i+1], cost_sums[k] - cost_sums[i+1], _cost, i, k))
+        rp.sort(key=lambda piece: (piece.start_index, piece.end_index))
         return rp
 
-    def integrate_loop(self, loop):
+    def integrate_loop(self, loop, rng=numpy.random):
         # check if by rotating the loop, it can be integrated in to the path
         # loop is a instance of Loop defined in loopsearch
+        # the loop can be inserted after the segm_nr-th segment if that can jump to a segment of the loop, and the segment before that
+        # in the loop can jump back to the next segment of the path
+        loop_positions = dict((segment.start, loop_segm_nr) for loop_segm_nr, segment in enumerate(loop.path))
         insertion_points = []
-        for segm_nr in range(len(self.segments)):
-            for loop_segm_nr in range(len(loop.path)):
-                for cost in self.segments[segm_nr]:
-                    if self.segments[segm_nr][cost].start == loop.path[loop_segm_nr].start:
-                        insertion_points.append((segm_nr, loop_segm_nr, cost))
-                        if self.deterministic:
+        for segm_nr in range(len(self.segments) - 1):
+            for cost in self.segments[segm_nr]:
+                loop_segm_nr = loop_positions.get(self.segments[segm_nr][cost].start)
+                if loop_segm_nr is not None:
+                    last_loop_segment = loop.path[loop_segm_nr-1]
+                    for end_cost in last_loop_segment:
+                        if last_loop_segment[end_cost] == self.segments[segm_nr+1]:
+                            insertion_points.append((segm_nr, loop_segm_nr, cost, end_cost))
                             break
+                    else:
+                        continue
+                    if self.deterministic:
+                        break
         if len(insertion_points) == 0:
             raise PathNotMatchingToLoopError("No intersection point found for integration of the loop")
-        insertion_point = choice(insertion_points)
-        ret_val = self.copy()
-        # maybe a point of failure
-        ret_val.segments = ret_val.segments[:insertion_point[0]+1] + list(loop.path[insertion_point[1]:]) + list(loop.path[:insertion_point[1]]) + ret_val.segments[insertion_point[0]+1:]
-        # there is no subtraction of cost, so it would be more efficient to just save the sum
-        # however with the sum the correctnes of the loop cannot be tested, what is better?
-        begin_cost = insertion_point[2]
-        for end_cost in loop.path[insertion_point[1]-1]:
-            if loop.path[insertion_point[1]-1][end_cost] == self.segments[insertion_point[0]+1]:
-                break
-        ret_val.cut_cost = ret_val.cut_cost[:insertion_point[0]+1] + [begin_cost] + list(loop.cost[insertion_point[1]+1:]) + list(loop.cost[:insertion_point[1]]) + [end_cost] + ret_val.cut_cost[insertion_point[0]+2:]
-        assert self.is_valid()
+        segm_nr, loop_segm_nr, begin_cost, end_cost = choice(insertion_points, rng)
+        inserted = list(loop.path[loop_segm_nr:]) + list(loop.path[:loop_segm_nr])
+        inserted_cost = [begin_cost] + list(loop.cost[loop_segm_nr+1:]) + list(loop.cost[:loop_segm_nr]) + [end_cost]
+        ret_val = self._derive(
+                self.segments[:segm_nr+1] + inserted + self.segments[segm_nr+1:],
+                self.cut_cost[:segm_nr+1] + inserted_cost + self.cut_cost[segm_nr+2:],
+                self._duration + sum(segment.duration for segment in inserted),
+                self._cut_cost_sum - self.cut_cost[segm_nr+1] + sum(inserted_cost),
+                added=inserted)
+        assert ret_val.is_valid()
         return ret_val
 
     def cost(self):
         """Compute the cost of the path based on a quality metric."""
-        duration_cost = self.missing_duration() ** 2
-        # TODO remove sqrt
-        from math import sqrt
-        repetition_cost = sqrt(max(0, prod([float(self.segments.count(x)) for x in set(self.segments)]) - 1))
-        return int(self.algo.duration_penalty * duration_cost + self.algo.cut_penalty * sum(self.cut_cost) + self.algo.repetition_penalty * repetition_cost)
+        if self._cost is None:
+            duration_cost = self.missing_duration() ** 2
+            # sqrt(prod(multiplicities) - 1), computed from the logarithm of the product so that it does not overflow on long paths
+            log_multiplicity = self.repetitions.log_multiplicity
+            if log_multiplicity < 1400:
+                repetition_cost = exp(0.5 * log_multiplicity) * sqrt(max(0.0, -expm1(-log_multiplicity)))
+            else:
+                repetition_cost = float("inf")
+            cost = self.algo.duration_penalty * duration_cost + self.algo.cut_penalty * self._cut_cost_sum + self.algo.repetition_penalty * repetition_cost
+            self._cost = int(cost) if cost < float("inf") else cost
+        return self._cost
 
     def copy(self):
-        return LoopPath(self.algo, Loop(0, self.cut_cost, self.segments, 0), self.target_duration(), self.deterministic)
+        return self._derive(self.segments[:], self.cut_cost[:], self._duration, self._cut_cost_sum)
 
     def target_duration(self):
         return self.keypoints[-1].target - self.keypoints[0].target
@@ -0,0 +1,63 @@
+from ..algorithm import PiecewisePathAlgorithm
+from composite import CompositePathAlgorithm, create_path_algorithm
+
+def cluster_cuts(cuts, cluster_size):
+    """Return a dict that maps each cell of a grid with ``cluster_size`` samples spacing over cut starts and ends to the cuts in it,
+    sorted by cost."""
+    clusters = {}
+    for cut in cuts:
+        clusters.setdefault((cut.start // cluster_size, cut.end // cluster_size), []).append(cut)
+    for members in clusters.itervalues():
+        members.sort(key=lambda cut: cut.cost)
+    return clusters
+
+def jumps(path):
+    """Return the (start, end) pairs of the jumps between the segments of ``path``."""
+    return [(a.end, b.start) for a, b in zip(path.segments, path.segments[1:]) if a.end != b.start]
+
+class MultiScalePathAlgorithm(CompositePathAlgorithm, PiecewisePathAlgorithm):
+    """Solve each piece first on a coarse set of cuts, then on the full set of cuts near the coarse solution.
+
+    Cuts are clustered on a grid with ``cluster_size`` samples spacing over their starts and ends, and the cheapest cut of each cluster
+    stands in for the whole cluster. The ``coarse`` algorithm finds a path with these cuts. The ``fine`` algorithm then refines it with
+    all cuts in the clusters of its jumps and the ``corridor`` clusters around them in each direction, so that its search space grows
+    with the length of the coarse path rather than with the number of cuts. Pieces with at most ``min_cuts`` cuts are solved by the
+    ``fine`` algorithm directly. A ``MultiScalePathAlgorithm`` with a larger ``cluster_size`` may serve as ``coarse`` algorithm, for
+    more than two levels.
+
+    Both algorithms are given as strings for ``create_path_algorithm()`` and must solve pieces between keypoints. A ``warm_start`` is
+    passed on to the ``fine`` algorithm.
+    """
+
+    def __init__(self, coarse="GreedyPathAlgorithm", fine="GreedyPathAlgorithm", cluster_size=4410, corridor=1, min_cuts=500):
+        self.coarse = coarse
+        self.fine = fine
+        self.cluster_size = int(cluster_size)
+        self.corridor = int(corridor)
+        self.min_cuts = int(min_cuts)
+        self.coarse_algorithm = create_path_algorithm(coarse)
+        self.fine_algorithm = create_path_algorithm(fine)
+        for spec, algo in [(coarse, self.coarse_algorithm), (fine, self.fine_algorithm)]:
+            if not isinstance(algo, PiecewisePathAlgorithm):
+                raise ValueError("%s does not solve pieces between keypoints" % spec)
+        self.delegates = [self.fine_algorithm]
+
+    def find_path(self, source_start, source_end, target_duration, cuts):
+        if len(cuts) <= self.min_cuts:
+            return self.fine_algorithm.find_path(source_start, source_end, target_duration, cuts)
+
+        clusters = cluster_cuts(cuts, self.cluster_size)
+        coarse_path = self.coarse_algorithm.find_path(source_start, source_end, target_duration, [members[0] for members in clusters.itervalues()])
+        if coarse_path is None:
+            # nothing to refine, e.g. when the coarse algorithm gives up
+            return self.fine_algorithm.find_path(source_start, source_end, target_duration, cuts)
+        return self.fine_algorithm.find_path(source_start, source_end, target_duration, self.corridor_cuts(cuts, coarse_path))
+
+    def corridor_cuts(self, cuts, coarse_path):
+        """Return the cuts in the clusters within the corridor around the jumps of ``coarse_path``."""
+        corridor = set()
+        offsets = range(-self.corridor, self.corridor + 1)
+        for start, end in jumps(coarse_path):
+            cell = start // self.cluster_size, end // self.cluster_size
+            corridor.update((cell[0] + i, cell[1] + j) for i in offsets for j in offsets)
+        return [cut for cut in cuts if (cut.start // self.cluster_size, cut.end // self.cluster_size) in corridor]
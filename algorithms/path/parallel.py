@@ -0,0 +1,60 @@
+from multiprocessing import Pool
+
+from ..algorithm import PiecewisePathAlgorithm, Path, cuts_fingerprint, nominal_pieces
+from composite import CompositePathAlgorithm, create_path_algorithm
+
+# state of a worker process of ParallelPiecesPathAlgorithm, set once when the process is started
+_worker_state = None
+
+def init_worker(algo, cuts, fingerprint):
+    global _worker_state
+    _worker_state = (algo, cuts, fingerprint)
+
+def solve_piece(task):
+    source_start, source_end, target_duration = task
+    algo, cuts, fingerprint = _worker_state
+    path = algo.find_piece(source_start, source_end, target_duration, cuts, fingerprint)
+    # only send back the segments, not the algorithm that paths of some classes refer to
+    return Path(path.segments, path.keypoints)
+
+class ParallelPiecesPathAlgorithm(CompositePathAlgorithm):
+    """Solve the pieces between the keypoints with a ``PiecewisePathAlgorithm`` in parallel.
+
+    ``PiecewisePathAlgorithm`` solves the pieces one after another, so that each piece can make up for the deviation of the duration of the
+    pieces before it from their target durations. Here, all pieces are first solved at once in ``num_workers`` processes (0 for one per
+    CPU) with their nominal target durations. Then, in a sequential pass (``PiecewisePathAlgorithm.reconcile()``), each piece before which
+    the deviation has grown beyond ``drift_tolerance`` samples is solved again, with the target duration it would have had when solving
+    sequentially. The last piece is solved again after any deviation, as no later piece can make up for it. The path is the one that the
+    ``algorithm`` finds with the same ``drift_tolerance``; only solving pieces that end up being solved again is wasted.
+
+    The ``algorithm`` must not start processes itself, e.g. use ``num_workers=1`` for it.
+    """
+
+    def __init__(self, algorithm="GreedyPathAlgorithm", num_workers=0):
+        self.algorithm = algorithm
+        self.num_workers = int(num_workers)
+        self.piecewise = create_path_algorithm(algorithm)
+        if not isinstance(self.piecewise, PiecewisePathAlgorithm):
+            raise ValueError("%s does not solve pieces between keypoints" % algorithm)
+        self.delegates = [self.piecewise]
+        self.statistics = {}
+
+    def __call__(self, source_keypoints, target_keypoints, cuts):
+        pieces = nominal_pieces(source_keypoints, target_keypoints)
+        fingerprint = cuts_fingerprint(cuts) if self.piece_cache is not None else None
+        if self.num_workers == 1:
+            init_worker(self.piecewise, cuts, fingerprint)
+            piece_paths = map(solve_piece, pieces)
+        else:
+            pool = Pool(self.num_workers or None, init_worker, (self.piecewise, cuts, fingerprint))
+            try:
+                piece_paths = pool.map(solve_piece, pieces)
+            finally:
+                pool.terminate()
+
+        path, num_solved_again = self.piecewise.reconcile(pieces, piece_paths, target_keypoints, cuts, fingerprint)
+        self.statistics = {"pieces": len(pieces), "solved_again": num_solved_again}
+        return path
+
+    def get_statistics(self):
+        return self.statistics
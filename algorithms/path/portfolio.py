@@ -0,0 +1,91 @@
+import time
+from multiprocessing import Process, Queue
+from Queue import Empty
+
+from ..algorithm import Path, Segment
+from ..scoring import pack_paths, score_paths
+from composite import CompositePathAlgorithm, create_path_algorithm
+
+def run_algorithm(queue, index, algo, source_keypoints, target_keypoints, cuts):
+    """Run ``algo`` and put its path (as a list of segment starts and ends), its keypoints, its runtime and an error message or ``None``
+    into ``queue``."""
+    start_time = time.time()
+    try:
+        path = algo(source_keypoints, target_keypoints, cuts)
+        queue.put((index, [(segment.start, segment.end) for segment in path.segments], path.keypoints, time.time() - start_time, None))
+    except Exception, e:
+        queue.put((index, None, None, time.time() - start_time, "%s: %s" % (e.__class__.__name__, e)))
+
+class PortfolioPathAlgorithm(CompositePathAlgorithm):
+    """Run several path algorithms at the same time, each in its own process, and return the best of their paths.
+
+    ``algorithms`` is a list of algorithms with their parameters, separated by semicolons, e.g.
+    ``"GreedyPathAlgorithm num_paths=20; GeneticPathAlgorithm random_seed=0"``. Algorithms that have not finished after ``deadline`` seconds
+    are stopped. As each algorithm has its own cost function, the paths are compared by the cost function of ``CostAwarePath`` with
+    the given penalties. The runtime and cost of each algorithm are available from ``get_statistics()``, keyed by its position and
+    specification, e.g. ``"1:GeneticPathAlgorithm random_seed=0"``, so that the same specification may be given more than once.
+    """
+
+    def __init__(self, algorithms="GreedyPathAlgorithm; GeneticPathAlgorithm", deadline=60.0, duration_penalty=1e-5, cut_penalty=1e1, repetition_penalty=1e3):
+        self.algorithms = algorithms
+        self.deadline = float(deadline)
+        self.duration_penalty = float(duration_penalty)
+        self.cut_penalty = float(cut_penalty)
+        self.repetition_penalty = float(repetition_penalty)
+        self.specs = [spec.strip() for spec in algorithms.split(";") if spec.strip()]
+        self.portfolio = [create_path_algorithm(spec) for spec in self.specs]
+        self.keys = ["%d:%s" % (i, spec) for i, spec in enumerate(self.specs)]
+        self.delegates = self.portfolio
+        self.statistics = {}
+
+    def __call__(self, source_keypoints, target_keypoints, cuts):
+        queue = Queue()
+        processes = [Process(target=run_algorithm, args=(queue, i, algo, source_keypoints, target_keypoints, cuts))
+                for i, algo in enumerate(self.portfolio)]
+        for process in processes:
+            process.start()
+
+        # collect results until all algorithms have finished or the deadline has passed
+        results = {}
+        end_time = time.time() + self.deadline
+        try:
+            while len(results) < len(processes):
+                try:
+                    index, segments, keypoints, elapsed_time, error = queue.get(timeout=max(end_time - time.time(), 0))
+                except Empty:
+                    break
+                results[index] = segments, keypoints, elapsed_time, error
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        self.statistics = dict((key, {"status": "deadline passed", "elapsed_time": self.deadline}) for key in self.keys)
+        paths, keys = [], []
+        for index, (segments, keypoints, elapsed_time, error) in sorted(results.items()):
+            self.statistics[self.keys[index]] = {"status": error or "finished", "elapsed_time": elapsed_time}
+            if error is None:
+                paths.append(Path([Segment(start, end) for start, end in segments], keypoints))
+                keys.append(self.keys[index])
+        if not paths:
+            raise RuntimeError("no path algorithm found a path before the deadline")
+
+        costs = self.score(paths, target_keypoints[-1] - target_keypoints[0], cuts)
+        for key, cost in zip(keys, costs):
+            self.statistics[key]["cost"] = float(cost)
+        best = costs.argmin()
+        self.statistics["best"] = keys[best]
+        print "Best path found by %s, cost %f" % (keys[best], costs[best])
+        return paths[best]
+
+    def score(self, paths, target_duration, cuts):
+        """Compute the costs of the paths by the cost function of ``CostAwarePath``."""
+        cut_costs = dict(((cut.start, cut.end), cut.cost) for cut in cuts)
+        path_cut_costs = [sum(cut_costs.get((a.end, b.start), 0.0) for a, b in zip(path.segments, path.segments[1:]) if a.end != b.start)
+                for path in paths]
+        segment_starts, segment_ends = pack_paths(paths)
+        return score_paths("cost_aware", self, segment_starts, segment_ends, path_cut_costs, target_duration)
+
+    def get_statistics(self):
+        return self.statistics
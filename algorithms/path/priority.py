@@ -1,5 +1,6 @@
 import itertools
 import time
+from bisect import bisect_right
 
 from ..algorithm import PiecewisePathAlgorithm, Path, Cut, Segment, Keypoint, BOOLEANS
 
@@ -9,6 +10,11 @@ class PriorityPath(Path):
         segment_ends = [cut.start for cut in cuts or []] + [keypoints[-1].source]
         segments = [Segment(start, end) for start, end in zip(segment_starts, segment_ends)]
         super(PriorityPath, self).__init__(segments, keypoints)
+        self._duration = sum(segment.duration for segment in segments)
+
+    @property
+    def duration(self):
+        return self._duration
 
     def cost(self):
         """Compute the difference between the actual and desired duration."""
@@ -23,10 +29,55 @@ class PriorityPath(Path):
         if isinstance(other, Cut):
             if not self.can_append(other):
                 raise ValueError("cut does not lie within last segment")
-            return PriorityPath(self.keypoints, self.cuts + [other])
+            # split the last segment instead of rebuilding all segments from the list of cuts
+            last = self.segments[-1]
+            path = PriorityPath.__new__(PriorityPath)
+            Path.__init__(path, self.segments[:-1] + [Segment(last.start, other.start), Segment(other.end, last.end)], self.keypoints)
+            path._duration = self._duration + other.start - other.end
+            return path
         else:
             return Path.__add__(self, other)
 
+class CutIndex(object):
+    """Cuts that can be appended to a ``PriorityPath``, sorted by start for range queries."""
+
+    def __init__(self, keypoints, cuts):
+        self.target_duration = keypoints[-1].target - keypoints[0].target
+        # cut.end < keypoints[-1].source must hold for every cut that is appended
+        self.cuts = sorted((cut for cut in cuts if cut.end < keypoints[-1].source), key=lambda cut: (cut.start, cut.end))
+        self.starts = [cut.start for cut in self.cuts]
+        # appending a cut changes the duration by cut.start - cut.end; smallest and largest change among the cuts from each index on
+        self.min_deltas, self.max_deltas = [float("inf")], [-float("inf")]
+        for cut in reversed(self.cuts):
+            self.min_deltas.append(min(self.min_deltas[-1], cut.start - cut.end))
+            self.max_deltas.append(max(self.max_deltas[-1], cut.start - cut.end))
+        self.min_deltas.reverse()
+        self.max_deltas.reverse()
+
+    def candidates(self, path):
+        """Return all cuts that can be appended to ``path``."""
+        return self.cuts[bisect_right(self.starts, path.segments[-1].start):]
+
+    def lower_bound(self, path, num_cuts=None):
+        """Return a lower bound for the cost of all paths that extend ``path`` by one up to ``num_cuts`` (default: any number of) cuts."""
+        first = bisect_right(self.starts, path.segments[-1].start)
+        if first == len(self.cuts) or num_cuts == 0:
+            return float("inf")
+        further = float("inf") if num_cuts is None else num_cuts - 1
+        if self.max_deltas[0] <= 0:
+            # without backward jumps, each cut starts after the end of the one before, so all further cuts come from the candidates of
+            # path, each at most once
+            further = min(further, len(self.cuts) - first - 1)
+            min_delta, max_delta = self.min_deltas[first], self.max_deltas[first]
+        else:
+            # a backward jump may lead before the candidates of path, and may be taken again and again
+            min_delta, max_delta = self.min_deltas[0], self.max_deltas[0]
+        shortest = path.duration + self.min_deltas[first] + (further * min_delta if further and min_delta < 0 else 0)
+        longest = path.duration + self.max_deltas[first] + (further * max_delta if further and max_delta > 0 else 0)
+        # the segments before the last one are kept, only the last one is split
+        shortest = max(shortest, path.duration - path.segments[-1].duration)
+        return max(0, shortest - self.target_duration, self.target_duration - longest)
+
 class PriorityPathAlgorithm(PiecewisePathAlgorithm):
     """Base class for priority algorithms for finding paths."""
 
@@ -35,17 +86,31 @@ class PriorityPathAlgorithm(PiecewisePathAlgorithm):
     def __init__(self):
         pass
 
-    def get_paths(self, keypoints, cuts, iterator=None):
-        """Return all cuts in breadth-first order."""
+    def get_paths(self, keypoints, cuts, max_num_cuts=None, incumbent=None):
+        """Return all paths with up to ``max_num_cuts`` (default: any number of) cuts in breadth-first order.
+
+        If ``incumbent`` is given, it is called to obtain the lowest cost found so far (or ``None``), and paths whose extensions cannot
+        have a lower cost are not extended (branch and bound).
+        """
+        index = CutIndex(keypoints, cuts)
+        levels = itertools.count() if max_num_cuts is None else range(max_num_cuts + 1)
         paths = [PriorityPath(keypoints)] # initial path with no cuts
-        if iterator is None:
-            iterator = itertools.count()
-        for num_cuts in iterator:
+        for num_cuts in levels:
             base_paths = []
             for path in paths: # yield all paths with num_cuts cuts
                 yield path
                 base_paths.append(path)
-            paths = (path + cut for path in base_paths for cut in cuts if path.can_append(cut)) # produce all paths with num_cuts + 1 cuts
+            if not base_paths: # all paths have been pruned, so there are no longer ones either
+                return
+            remaining = None if max_num_cuts is None else max_num_cuts - num_cuts
+            paths = (path + cut for path in self._promising(base_paths, index, remaining, incumbent) for cut in index.candidates(path)) # produce all paths with num_cuts + 1 cuts
+
+    def _promising(self, paths, index, num_cuts, incumbent):
+        """Return the paths whose extensions may still beat the incumbent."""
+        for path in paths:
+            best_cost = incumbent() if incumbent is not None else None
+            if best_cost is None or index.lower_bound(path, num_cuts) < best_cost:
+                yield path
 
 class AbortConditionPathAlgorithm(PriorityPathAlgorithm):
     """Base class for algorithms for finding paths with an abort condition."""
@@ -59,14 +124,17 @@ class AbortConditionPathAlgorithm(PriorityPathAlgorithm):
         best_path = None
         best_cost = None
         state = self.initialize_find_path(source_start, source_end, target_duration, cuts)
-        for num_paths, path in enumerate(self.get_paths([Keypoint(source_start, 0), Keypoint(source_end, target_duration)], cuts), 1):
+        num_paths = 0
+        for num_paths, path in enumerate(self.get_paths([Keypoint(source_start, 0), Keypoint(source_end, target_duration)], cuts,
+                incumbent=lambda: best_cost), 1):
             if best_cost is None or path.cost() < best_cost:
                 best_path = path
                 best_cost = path.cost()
             if self.abort_condition_fulfilled(state, best_path, best_cost, path):
-                if self.debug:
-                    print "%d paths enumerated, maximum number of cuts %d, lowest cost %.2f." % (num_paths, len(path.cuts), best_path.cost())
-                return best_path
+                break
+        if self.debug:
+            print "%d paths enumerated, maximum number of cuts %d, lowest cost %.2f." % (num_paths, len(path.cuts), best_path.cost())
+        return best_path
 
     def initialize_find_path(self, source_start, source_end, target_duration, cuts):
         """Initialize the path search and return a state object. Override this in subclasses."""
@@ -109,5 +177,9 @@ class MaxNumCutsPathAlgorithm(PriorityPathAlgorithm):
         self.max_num_cuts = int(max_num_cuts)
 
     def find_path(self, source_start, source_end, target_duration, cuts):
-        return min(self.get_paths([Keypoint(source_start, 0), Keypoint(source_end, target_duration)], cuts, range(self.max_num_cuts + 1)))
-
+        best_path = None
+        for path in self.get_paths([Keypoint(source_start, 0), Keypoint(source_end, target_duration)], cuts, self.max_num_cuts,
+                lambda: best_path.cost() if best_path is not None else None):
+            if best_path is None or path < best_path:
+                best_path = path
+        return best_path
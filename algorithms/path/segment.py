@@ -1,3 +1,7 @@
+from numpy import cumsum, concatenate, zeros
+
+from jumpgraph import duration_bounds
+
 # similar to the constructor of Graph in pathsearch.py
 # Writing this helped me to understand the data better and I feel more comfortable 
 def create_automaton(cuts, start, end):
@@ -47,6 +51,19 @@ def is_automata_correct(segments):
         return False
     return True
 
+def duration_bounds_by_start(automaton, end_segment, max_duration):
+    # the range of durations of paths from each segment of the automaton to end_segment (both included)
+    # returns two dicts which are indexable by the startframes of the segments, see duration_bounds
+    starts = sorted(automaton.keys())
+    index = dict((start, i) for i, start in enumerate(starts))
+    followers = [[index[follower.start] for follower in automaton[start].followers.values()] for start in starts]
+    offsets = concatenate([zeros(1, dtype=int), cumsum([len(f) for f in followers], dtype=int)])
+    targets = [i for f in followers for i in f]
+    durations = [automaton[start].duration for start in starts]
+    terminal = [automaton[start] is end_segment for start in starts]
+    min_remaining, max_remaining = duration_bounds(offsets, targets, durations, terminal, max_duration)
+    return dict(zip(starts, min_remaining)), dict(zip(starts, max_remaining))
+
 class Segment(object):
     def __init__(self, start, end):
         self._start = start
@@ -0,0 +1,106 @@
+from collections import deque
+
+from numpy import ones, repeat, arange, diff, bincount, concatenate, zeros
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, breadth_first_order
+
+from ..algorithm import PathAlgorithm, Path, Segment, Keypoint
+from jumpgraph import JumpGraph
+
+def recurrent_nodes(graph):
+    """Return a boolean array that tells for each node of a ``JumpGraph`` whether paths from it can go on forever, i.e. reach a cycle."""
+    num_nodes = len(graph)
+    rows = repeat(arange(num_nodes), diff(graph.offsets))
+    matrix = csr_matrix((ones(len(rows)), (rows, graph.targets)), shape=(num_nodes, num_nodes))
+    num_components, labels = connected_components(matrix, directed=True, connection="strong")
+    cyclic = (bincount(labels)[labels] > 1) | (matrix.diagonal() > 0)
+
+    # nodes that reach a cyclic node are the nodes reached from a virtual node behind all cyclic nodes when going backwards
+    sink = num_nodes
+    sources = cyclic.nonzero()[0]
+    backwards = csr_matrix((ones(len(rows) + len(sources)), (concatenate([graph.targets, zeros(len(sources), dtype=int) + sink]),
+        concatenate([rows, sources]))), shape=(num_nodes + 1, num_nodes + 1))
+    ret_val = zeros(num_nodes + 1, dtype=bool)
+    ret_val[breadth_first_order(backwards, sink, directed=True, return_predecessors=False)] = True
+    return ret_val[:num_nodes]
+
+class StreamingPathAlgorithm(PathAlgorithm):
+    """Generate an endless path segment by segment, in constant time and memory per segment.
+
+    Only the part of the jump graph from which playback can go on forever is used, so the path never runs into the end of the source.
+    Each next node is chosen by a beam search with ``beam_width`` paths over the next ``lookahead`` nodes, of which only the first one is
+    taken. Jumps cost ``cut_penalty`` times their cut cost, and playing a node again costs ``repetition_penalty`` per sample times the
+    number of times it has been played within the last ``window`` samples of output; repetitions further back are forgotten.
+
+    ``stream()`` yields the segments of the path. When called like other path algorithms, the path starts at the first source keypoint,
+    only uses the source up to the last source keypoint, and is cut off at the duration between the first and the last target keypoint;
+    keypoints in between are ignored.
+    """
+
+    def __init__(self, lookahead=8, beam_width=20, window=2646000, cut_penalty=1e1, repetition_penalty=1e-3):
+        self.lookahead = int(lookahead)
+        self.beam_width = int(beam_width)
+        self.window = int(window)
+        self.cut_penalty = float(cut_penalty)
+        self.repetition_penalty = float(repetition_penalty)
+
+    def __call__(self, source_keypoints, target_keypoints, cuts):
+        target_duration = target_keypoints[-1] - target_keypoints[0]
+        path = Path()
+        if target_duration <= 0:
+            path.keypoints = [Keypoint(source_keypoints[0], target_keypoints[0]), Keypoint(source_keypoints[0], target_keypoints[-1])]
+            return path
+        duration = 0
+        for segment in self.stream(source_keypoints[0], source_keypoints[-1], cuts):
+            if duration + segment.duration >= target_duration:
+                path += Segment(segment.start, segment.start + target_duration - duration)
+                break
+            path += segment
+            duration += segment.duration
+        path.keypoints = [Keypoint(source_keypoints[0], target_keypoints[0]), Keypoint(path.segments[-1].end, target_keypoints[-1])]
+        return path
+
+    def stream(self, source_start, source_end, cuts):
+        """Generate the ``Segment``s of an endless path from ``source_start`` through the source up to ``source_end``."""
+        graph = JumpGraph(cuts, source_start, source_end)
+        alive = recurrent_nodes(graph)
+        if not alive[graph.start]:
+            raise ValueError("no endless path from %d with the given cuts" % source_start)
+        successors = [[(target, cost) for target, cost in zip(*[a.tolist() for a in graph.successors(node)]) if alive[target]]
+                for node in range(len(graph))]
+        durations = graph.durations.tolist()
+
+        recent = deque() # (output time, node) of the nodes played within the window
+        counts = {} # number of times each node occurs in recent
+        elapsed = 0
+        node = graph.start
+        segment_start = int(graph.starts[node])
+        while True:
+            recent.append((elapsed, node))
+            counts[node] = counts.get(node, 0) + 1
+            elapsed += durations[node]
+            while recent[0][0] < elapsed - self.window:
+                forgotten = recent.popleft()[1]
+                counts[forgotten] -= 1
+                if not counts[forgotten]:
+                    del counts[forgotten]
+
+            next_node = self.choose(successors, durations, node, counts)
+            if graph.starts[next_node] != graph.ends[node]: # jump
+                yield Segment(segment_start, int(graph.ends[node]))
+                segment_start = int(graph.starts[next_node])
+            node = next_node
+
+    def choose(self, successors, durations, node, counts):
+        """Return the successor of ``node`` that starts the cheapest continuation of ``lookahead`` nodes."""
+        beam = [(0.0, ())]
+        for depth in range(self.lookahead):
+            candidates = []
+            for cost, nodes in beam:
+                for target, cut_cost in successors[nodes[-1] if nodes else node]:
+                    repetitions = counts.get(target, 0) + nodes.count(target)
+                    candidates.append((cost + self.cut_penalty * cut_cost + self.repetition_penalty * durations[target] * repetitions,
+                        nodes + (target,)))
+            candidates.sort(key=lambda candidate: candidate[0]) # stable, so that just playing on wins ties
+            beam = candidates[:self.beam_width]
+        return beam[0][1][0]
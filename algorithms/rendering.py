@@ -0,0 +1,152 @@
+"""Rendering of paths without holding the whole output in memory.
+
+A ``PathView`` behaves like the array that ``Path.synthesize()`` would return, but only copies the samples of the ranges that are
+sliced from it. ``write_wav()`` writes such a view (or any array) to a wave file block by block. Together with an input array that is
+memory-mapped (e.g. from ``scipy.io.wavfile.read(filename, mmap=True)``), rendering a path needs memory for one block only.
+
+Jumps can be smoothed with crossfades. Around a jump from source position ``e`` to ``s``, the output fades from the source after ``e``
+over to the source before ``s``, centered on the jump, so that the output keeps its duration. The fades of all jumps within a block are
+applied together, with weights looked up from a window table computed once per view.
+"""
+
+import struct
+from bisect import bisect_right
+
+import numpy
+
+# number of samples that are rendered at once by default
+CHUNK_SIZE = 1 << 16
+
+def fade_in_window(length):
+    """Return the weights of a raised cosine fade-in over ``length`` samples; the fade-out weights are 1 minus these."""
+    return numpy.sin(0.5 * numpy.pi * (numpy.arange(length) + 0.5) / length) ** 2
+
+class PathView(object):
+    """Read-only, array-like view of the output of a path with the given ``segments`` from ``data``.
+
+    Indexing with an integer or a slice returns what indexing the synthesized array would return, as a new array. Further dimensions
+    (channels) may be indexed as well, e.g. ``view[1000:2000, 0]``.
+
+    If ``crossfade`` is given, jumps are crossfaded over that many samples. Fades are shortened where the segments next to a jump are
+    shorter than half of it, or where the source does not extend far enough.
+    """
+
+    def __init__(self, data, segments, crossfade=0):
+        self.data = data
+        self.starts = [segment.start for segment in segments]
+        # target positions at which the segments start, and the duration as last element
+        self.offsets = [0]
+        for segment in segments:
+            self.offsets.append(self.offsets[-1] + segment.end - segment.start)
+
+        # target positions, source positions before and after, and half lengths of the fades at the jumps
+        half = int(crossfade) // 2
+        fades = [(self.offsets[i+1], a.end, b.start, min(half, a.duration // 2, b.duration // 2, len(data) - a.end, b.start))
+                for i, (a, b) in enumerate(zip(segments, segments[1:])) if a.end != b.start]
+        fades = [fade for fade in fades if fade[3] > 0]
+        self.fade_positions, self.fade_ends, self.fade_starts, self.fade_halves = \
+                [numpy.asarray(column, dtype=int) for column in zip(*fades)] if fades else [numpy.zeros(0, dtype=int)] * 4
+        self.fade_in = fade_in_window(2 * half) if half else None
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    @property
+    def shape(self):
+        return (len(self),) + self.data.shape[1:]
+
+    @property
+    def ndim(self):
+        return self.data.ndim
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    def __array__(self, dtype=None):
+        ret_val = self[:]
+        return ret_val if dtype is None else ret_val.astype(dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self[key[0]][(slice(None),) + key[1:]] if isinstance(key[0], slice) else self[key[0]][key[1:]]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            indices = xrange(start, stop, step)
+            if not len(indices):
+                return self.render(0, 0)
+            # render the range of all indices, then take every step-th sample of it from the first index on
+            return self.render(min(indices[0], indices[-1]), max(indices[0], indices[-1]) + 1)[::step]
+        position = int(key) + len(self) if key < 0 else int(key)
+        if not 0 <= position < len(self):
+            raise IndexError("index %d is out of bounds for a path of length %d" % (key, len(self)))
+        return self.render(position, position + 1)[0]
+
+    def render(self, start, stop, out=None):
+        """Return the samples of the output from ``start`` to ``stop``, written into ``out`` if it is given, or else into a new array."""
+        ret_val = numpy.empty((max(stop - start, 0),) + self.data.shape[1:], dtype=self.data.dtype) if out is None else out
+        i = bisect_right(self.offsets, start) - 1
+        position = start
+        while position < stop:
+            length = min(stop, self.offsets[i+1]) - position
+            source = self.starts[i] + position - self.offsets[i]
+            ret_val[position-start:position-start+length] = self.data[source:source+length]
+            position += length
+            i += 1
+        if self.fade_in is not None:
+            self.apply_fades(ret_val, start, stop)
+        return ret_val
+
+    def apply_fades(self, out, start, stop):
+        """Overwrite the samples of ``out``, the output from ``start`` to ``stop``, within the fades at the jumps."""
+        # fades that overlap the range, found by their center, which is at most half a window away
+        first, last = self.fade_positions.searchsorted([start - len(self.fade_in) // 2, stop + len(self.fade_in) // 2])
+        if first == last:
+            return
+        positions, ends, starts, halves = [column[first:last] for column in
+                (self.fade_positions, self.fade_ends, self.fade_starts, self.fade_halves)]
+        # one entry per sample of all fades: offset within the fade, target position, and the weight from the window table
+        lengths = 2 * halves
+        offsets = numpy.arange(lengths.sum()) - numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+        targets = numpy.repeat(positions - halves, lengths) + offsets
+        inside = (targets >= start) & (targets < stop)
+        offsets, targets = offsets[inside], targets[inside]
+        halves, ends, starts = [numpy.repeat(column, lengths)[inside] for column in (halves, ends, starts)]
+        weights = self.fade_in[(offsets * len(self.fade_in)) // (2 * halves)].reshape((-1,) + (1,) * (self.data.ndim - 1))
+        faded = (1 - weights) * self.data[ends - halves + offsets] + weights * self.data[starts - halves + offsets]
+        out[targets - start] = numpy.round(faded) if self.data.dtype.kind in "iu" else faded
+
+    def chunks(self, chunk_size=CHUNK_SIZE):
+        """Generate the output in blocks of ``chunk_size`` samples.
+
+        All blocks are rendered into the same buffer, so each block is only valid until the next one is generated.
+        """
+        buf = numpy.empty((chunk_size,) + self.data.shape[1:], dtype=self.data.dtype)
+        for start in xrange(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            yield self.render(start, stop, buf[:stop-start])
+
+def wav_header(rate, dtype, num_channels, num_samples):
+    """Return the header of a wave file with ``num_samples`` samples of type ``dtype`` per channel."""
+    dtype = numpy.dtype(dtype)
+    data_size = num_samples * num_channels * dtype.itemsize
+    if 36 + data_size >= 1 << 32:
+        raise ValueError("%d samples of %d channels do not fit into a wave file" % (num_samples, num_channels))
+    format_tag = 3 if dtype.kind == "f" else 1 # IEEE float or PCM
+    block_align = num_channels * dtype.itemsize
+    return "RIFF" + struct.pack("<I", 36 + data_size) + "WAVE" + \
+            "fmt " + struct.pack("<IHHIIHH", 16, format_tag, num_channels, rate, rate * block_align, block_align, dtype.itemsize * 8) + \
+            "data" + struct.pack("<I", data_size)
+
+def write_wav(filename, rate, data, chunk_size=CHUNK_SIZE):
+    """Write ``data``, an array or a ``PathView``, to a wave file, ``chunk_size`` samples at a time."""
+    num_channels = data.shape[1] if len(data.shape) > 1 else 1
+    little_endian = data.dtype.newbyteorder("<")
+    with open(filename, "wb") as f:
+        f.write(wav_header(rate, data.dtype, num_channels, len(data)))
+        if isinstance(data, PathView):
+            blocks = data.chunks(chunk_size)
+        else:
+            blocks = (data[start:start+chunk_size] for start in xrange(0, len(data), chunk_size))
+        for block in blocks:
+            f.write(numpy.ascontiguousarray(block, dtype=little_endian).tostring())
@@ -0,0 +1,114 @@
+from bisect import bisect_left
+from math import log
+
+class RepetitionIndex(object):
+    """Multiset of segments that keeps track of how much of the source is repeated, for the repetition costs of paths.
+
+    Two measures are maintained while segments are inserted and removed:
+
+    * the multiplicity, the product of how often each distinct segment occurs (see ``multiplicity()`` and ``log_multiplicity``), and
+    * the overlap, the sum of the lengths of the intersections of all ordered pairs of segments (see ``overlap()``).
+
+    The overlap is the integral of c(x) * (c(x) - 1) over all source positions x, where c(x) is the number of segments containing x.
+    It is kept with a sweep over the sorted segment boundaries in two Fenwick trees, which support adding to c(x) on a range of positions
+    and integrating c(x) over a range in O(log n). The trees are built when the overlap is first requested, and rebuilt when a segment
+    with a boundary that has not been seen yet is inserted afterwards.
+    """
+
+    def __init__(self, segments=()):
+        self.counts = {}
+        self.log_multiplicity = 0.0
+        self._overlap = None
+        for segment in segments:
+            self.insert(segment)
+
+    def copy(self):
+        ret_val = RepetitionIndex.__new__(RepetitionIndex)
+        ret_val.counts, ret_val.log_multiplicity, ret_val._overlap = self.counts.copy(), self.log_multiplicity, self._overlap
+        if self._overlap is not None:
+            ret_val._positions, ret_val._linear, ret_val._constant = self._positions, self._linear[:], self._constant[:]
+        return ret_val
+
+    def __len__(self):
+        return sum(self.counts.itervalues())
+
+    def count(self, segment):
+        """Return how often ``segment`` occurs."""
+        return self.counts.get((segment.start, segment.end), 0)
+
+    def insert(self, segment, count=1):
+        """Add ``count`` occurrences of ``segment``."""
+        self._change(segment, count)
+
+    def remove(self, segment, count=1):
+        """Remove ``count`` occurrences of ``segment``, which must be present."""
+        if self.count(segment) < count:
+            raise ValueError("segment is not present")
+        self._change(segment, -count)
+
+    def multiplicity(self):
+        """Return the product of how often each distinct segment occurs, 1 if no segment is repeated."""
+        return reduce(lambda a, b: a * b, self.counts.itervalues(), 1)
+
+    def overlap(self):
+        """Return the sum of the lengths of the intersections of all pairs of different segments (pairs are ordered)."""
+        if self._overlap is None:
+            self._build()
+        return self._overlap
+
+    def _change(self, segment, delta):
+        key = segment.start, segment.end
+        old = self.counts.get(key, 0)
+        new = old + delta
+        self.log_multiplicity += (log(new) if new else 0.0) - (log(old) if old else 0.0)
+        if new:
+            self.counts[key] = new
+        else:
+            del self.counts[key]
+        if self._overlap is not None and segment.start < segment.end:
+            if self._rank(segment.start) is None or self._rank(segment.end) is None:
+                self._overlap = None # rebuild lazily with the new boundaries
+            else:
+                for i in range(abs(delta)):
+                    self._sweep(segment.start, segment.end, 1 if delta > 0 else -1)
+
+    def _build(self):
+        self._positions = sorted(set(position for key in self.counts for position in key))
+        # c(x) at position x is the sum of linear[:i] * x + constant[:i], where positions[i-1] <= x < positions[i]
+        self._linear = [0] * (len(self._positions) + 1)
+        self._constant = [0] * (len(self._positions) + 1)
+        self._overlap = 0
+        for (start, end), count in self.counts.iteritems():
+            if start < end:
+                for i in range(count):
+                    self._sweep(start, end, 1)
+
+    def _sweep(self, start, end, delta):
+        # changing c(x) by delta on [start, end) changes the integral of c * (c - 1) by 2 * delta * integral of c before (or after) the change
+        if delta < 0:
+            self._add(start, end, delta)
+        self._overlap += 2 * delta * (self._integral(end) - self._integral(start))
+        if delta > 0:
+            self._add(start, end, delta)
+
+    def _rank(self, position):
+        i = bisect_left(self._positions, position)
+        return i if i < len(self._positions) and self._positions[i] == position else None
+
+    def _add(self, start, end, delta):
+        # add delta to c(x) for start <= x < end
+        for position, factor in ((start, 1), (end, -1)):
+            i = self._rank(position) + 1
+            while i < len(self._linear):
+                self._linear[i] += factor * delta
+                self._constant[i] += factor * delta * position
+                i += i & -i
+
+    def _integral(self, position):
+        # integral of c(x) from the first boundary up to position
+        i, linear, constant = self._rank(position), 0, 0
+        while i > 0:
+            linear += self._linear[i]
+            constant += self._constant[i]
+            i -= i & -i
+        return linear * position - constant
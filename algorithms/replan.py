@@ -0,0 +1,137 @@
+"""Re-planning of the rest of a path while it is being played, e.g. when the target keypoints are moved during playback.
+
+A ``Replanner`` keeps the cuts in a worker process, so that only the new keypoints have to be sent for each re-planning. The path is
+kept as it is up to the end of the segment that is played when the re-planned path can be delivered at the latest, and the rest of it
+is solved again with the path algorithm. A fast fallback algorithm solves it at the same time in a second worker process, and its path
+is used if the path algorithm misses the latency budget. If both miss it, the path is kept as it is.
+"""
+
+import time
+from bisect import bisect_right
+from multiprocessing import Pool, TimeoutError
+from threading import Thread
+
+from algorithm import Path, Keypoint, Segment
+from path.composite import create_path_algorithm
+
+# state of the worker process of a Replanner, set once when the process is started
+_worker_state = None
+
+def init_worker(algo, cuts):
+    global _worker_state
+    _worker_state = (algo, cuts)
+
+def solve_tail(task):
+    source_keypoints, target_keypoints = task
+    algo, cuts = _worker_state
+    path = algo(source_keypoints, target_keypoints, cuts)
+    # only send back the segments, not the algorithm that paths of some classes refer to
+    return [(segment.start, segment.end) for segment in path.segments]
+
+class Replanner(object):
+    """Re-plan paths computed by ``path_algo`` with ``cuts`` within ``latency`` seconds.
+
+    ``fallback`` is a path algorithm, or a string for ``create_path_algorithm()``; it should be fast enough to be run within the latency.
+    A worker that is still busy when a re-planned path is returned is replaced in the background; until the new one is up, paths are
+    re-planned without it. Call ``close()`` to stop the worker processes.
+    """
+
+    def __init__(self, path_algo, cuts, rate, latency=0.05, fallback="BeamPathAlgorithm beam_width=10"):
+        self.path_algo = path_algo
+        self.cuts = cuts
+        self.rate = rate
+        self.latency = float(latency)
+        self.fallback = create_path_algorithm(fallback) if isinstance(fallback, basestring) else fallback
+        # worker pools of the path algorithm and of the fallback, and the threads that replace them
+        self.pools = [None, None]
+        self.restarting = [None, None]
+        # number of re-plannings whose path came from either algorithm, or that kept the path
+        self.statistics = {"path": 0, "fallback": 0, "unchanged": 0}
+        for i in range(2):
+            self.start(i)
+
+    def start(self, i):
+        self.pools[i] = Pool(1, init_worker, ([self.path_algo, self.fallback][i], self.cuts))
+
+    def restart(self, i, pool):
+        pool.terminate()
+        self.start(i)
+
+    def close(self):
+        for i in range(2):
+            if self.restarting[i] is not None:
+                self.restarting[i].join()
+                self.restarting[i] = None
+            if self.pools[i] is not None:
+                self.pools[i].terminate()
+                self.pools[i] = None
+
+    def get_statistics(self):
+        return self.statistics
+
+    def commit_point(self, path, position):
+        """Return the number of segments of ``path`` that are kept when re-planning at target time ``position`` (in samples), and their
+        duration.
+
+        These are all segments up to the one that is played ``latency`` seconds after ``position``, as the path cannot be changed before.
+        """
+        ends = []
+        duration = 0
+        for segment in path.segments:
+            duration += segment.duration
+            ends.append(duration)
+        num_segments = min(bisect_right(ends, position + self.latency * self.rate) + 1, len(ends))
+        return num_segments, ends[num_segments-1] if num_segments else 0
+
+    def replan(self, path, position, source_keypoints, target_keypoints):
+        """Return a path that equals ``path`` up to the segment that is played at target time ``position`` (plus the latency), and then
+        follows the keypoints with target times after it, as well as the target time at which it starts to differ from ``path``.
+
+        If no new path can be found within the latency, ``path`` is returned as it is, with its duration as the target time.
+        All positions and times are in samples. Keypoints with earlier target times are ignored.
+        """
+        start_time = time.time()
+        deadline = start_time + self.latency
+        num_segments, commit_time = self.commit_point(path, position)
+        prefix = path.segments[:num_segments]
+        commit_source = prefix[-1].end if prefix else source_keypoints[0]
+        future = [(source, target) for source, target in zip(source_keypoints, target_keypoints) if target > commit_time]
+        if not future:
+            return Path(prefix, path.keypoints), commit_time
+        tail_source_keypoints = [commit_source] + [source for source, target in future]
+        tail_target_keypoints = [0] + [target - commit_time for source, target in future]
+
+        results = [None, None]
+        for i in range(2):
+            if self.restarting[i] is None or not self.restarting[i].is_alive():
+                self.restarting[i] = None
+                results[i] = self.pools[i].apply_async(solve_tail, [(tail_source_keypoints, tail_target_keypoints)])
+        # take the path of the path algorithm if it is found in time, or else the one of the fallback
+        tail = None
+        for i, result in enumerate(results):
+            if result is None:
+                continue
+            try:
+                tail = [Segment(start, end) for start, end in result.get(max(0.0, deadline - time.time()))]
+                self.statistics[["path", "fallback"][i]] += 1
+                break
+            except TimeoutError:
+                pass
+        # the kept segments must not have been played when the path is delivered
+        if tail is not None and commit_time < position + (time.time() - start_time) * self.rate:
+            tail = None
+
+        # workers that are still busy with these keypoints are replaced without holding up playback
+        for i, result in enumerate(results):
+            if result is not None and not result.ready():
+                pool, self.pools[i] = self.pools[i], None
+                self.restarting[i] = Thread(target=self.restart, args=(i, pool))
+                self.restarting[i].daemon = True
+                self.restarting[i].start()
+
+        if tail is None:
+            self.statistics["unchanged"] += 1
+            return path, path.duration
+        keypoints = [keypoint for keypoint in path.keypoints if keypoint.target <= commit_time] + \
+                [Keypoint(source, target) for source, target in future]
+        return Path(prefix + list(tail), keypoints), commit_time
@@ -0,0 +1,101 @@
+"""Cost functions of the path algorithms, evaluated for many candidate paths at once.
+
+Candidates are given as arrays with one row per path: the source ``segment_starts`` and ``segment_ends`` of the segments of each path,
+padded with segments of duration 0 (e.g. from 0 to 0), the sum of the ``cut_costs`` of each path and the ``target_durations``, the
+difference between the target times of the last and the first keypoint. ``pack_paths()`` creates the segment arrays from ``Path``
+objects. The penalties are taken from an algorithm object with ``duration_penalty``, ``cut_penalty`` and ``repetition_penalty``.
+"""
+
+from numpy import asarray, zeros, ones, full, where, minimum, maximum, sqrt, exp, expm1, log, arange, lexsort, concatenate, diff
+
+# upper limit for the number of elements of temporary arrays, computations (also of the genetic operators) are split into chunks of rows
+# below it
+CHUNK_ELEMENTS = 1 << 22
+
+def pack_paths(paths):
+    """Return the padded ``segment_starts`` and ``segment_ends`` arrays of the given paths."""
+    width = max([len(path.segments) for path in paths] + [0])
+    segment_starts = zeros((len(paths), width), dtype=int)
+    segment_ends = zeros((len(paths), width), dtype=int)
+    for i, path in enumerate(paths):
+        segment_starts[i, :len(path.segments)] = [segment.start for segment in path.segments]
+        segment_ends[i, :len(path.segments)] = [segment.end for segment in path.segments]
+    return segment_starts, segment_ends
+
+def durations(segment_starts, segment_ends):
+    """Return the duration of each path."""
+    return (segment_ends - segment_starts).sum(axis=1)
+
+def overlaps(segment_starts, segment_ends):
+    """Return the sum of the lengths of the intersections of all ordered pairs of different segments of each path.
+
+    This is ``RepetitionIndex.overlap()`` for each path: the integral of c(x) * (c(x) - 1), where c(x) is the number of segments that
+    contain x. It is computed from the boundaries of the segments of each row, sorted, in O(n log n) time and O(n) memory per row.
+    """
+    num_rows, width = segment_starts.shape
+    ret_val = zeros(num_rows)
+    if not width:
+        return ret_val
+    step = max(1, CHUNK_ELEMENTS // (2 * width))
+    for first in range(0, num_rows, step):
+        positions = concatenate([segment_starts[first:first+step], segment_ends[first:first+step]], axis=1)
+        changes = concatenate([ones(width, dtype=int), -ones(width, dtype=int)])
+        order = positions.argsort(axis=1, kind="mergesort")
+        positions = positions[arange(len(positions))[:, None], order]
+        # number of segments between each boundary and the next one
+        counts = changes[order].cumsum(axis=1)[:, :-1]
+        ret_val[first:first+step] = (diff(positions, axis=1) * counts * (counts - 1)).sum(axis=1)
+    return ret_val
+
+def log_multiplicities(segment_starts, segment_ends):
+    """Return the logarithm of the product of how often each distinct segment occurs in each path.
+
+    This is ``RepetitionIndex.log_multiplicity`` for each path. Padding segments are not counted.
+    """
+    num_rows, width = segment_starts.shape
+    if not width:
+        return zeros(num_rows)
+    # sort the segments of each row, so that equal segments are adjacent, and padding comes first
+    padding = segment_starts == segment_ends
+    rows = arange(num_rows)[:, None]
+    row_numbers = (rows + zeros(width, dtype=int)).ravel()
+    order = lexsort((segment_ends.ravel(), segment_starts.ravel(), ~padding.ravel(), row_numbers)).reshape(num_rows, width) - rows * width
+    starts, ends, padding = segment_starts[rows, order], segment_ends[rows, order], padding[rows, order]
+    # number of the occurrence of each segment among equal segments, counted from 1
+    columns = arange(width)[None, :]
+    new = concatenate([full((num_rows, 1), True), (starts[:, 1:] != starts[:, :-1]) | (ends[:, 1:] != ends[:, :-1])], axis=1)
+    occurrence = columns - maximum.accumulate(where(new, columns, 0), axis=1) + 1
+    # the last occurrence of each segment holds how often it occurs
+    last = concatenate([new[:, 1:], full((num_rows, 1), True)], axis=1)
+    return where(last & ~padding, log(occurrence), 0.0).sum(axis=1)
+
+def cost_aware_costs(algo, durations, target_durations, cut_costs, log_multiplicities):
+    """Costs like ``CostAwarePath.cost()``: squared duration error, cut costs and the product of multiplicities minus 1."""
+    return algo.duration_penalty * abs(durations - target_durations) ** 2 + algo.cut_penalty * cut_costs + \
+            algo.repetition_penalty * expm1(log_multiplicities)
+
+def genetic_costs(algo, durations, target_durations, cut_costs, overlaps):
+    """Costs like ``GeneticPath.cost()``: absolute duration error, cut costs and overlap."""
+    return algo.duration_penalty * abs(durations - target_durations) + algo.cut_penalty * cut_costs + algo.repetition_penalty * overlaps
+
+def loop_costs(algo, durations, target_durations, cut_costs, log_multiplicities):
+    """Costs like ``LoopPath.cost()`` (which rounds them to integers): squared duration error, cut costs and the square root of the
+    product of multiplicities minus 1."""
+    log_multiplicities = asarray(log_multiplicities, dtype=float)
+    # sqrt(exp(L) - 1) = exp(L / 2) * sqrt(1 - exp(-L)), which does not overflow before the result does
+    repetition_costs = where(log_multiplicities < 1400, exp(0.5 * minimum(log_multiplicities, 1400)) * sqrt(maximum(0.0, -expm1(-log_multiplicities))),
+            float("inf"))
+    return algo.duration_penalty * (target_durations - durations) ** 2 + algo.cut_penalty * cut_costs + algo.repetition_penalty * repetition_costs
+
+def score_paths(metric, algo, segment_starts, segment_ends, cut_costs, target_durations):
+    """Return the costs of all paths with the cost function ``metric``, one of ``"cost_aware"``, ``"genetic"`` and ``"loop"``."""
+    path_durations = durations(segment_starts, segment_ends)
+    cut_costs = asarray(cut_costs, dtype=float)
+    if metric == "cost_aware":
+        return cost_aware_costs(algo, path_durations, target_durations, cut_costs, log_multiplicities(segment_starts, segment_ends))
+    elif metric == "genetic":
+        return genetic_costs(algo, path_durations, target_durations, cut_costs, overlaps(segment_starts, segment_ends))
+    elif metric == "loop":
+        return loop_costs(algo, path_durations, target_durations, cut_costs, log_multiplicities(segment_starts, segment_ends))
+    else:
+        raise ValueError("unknown cost function %s" % metric)
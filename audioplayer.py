@@ -4,15 +4,32 @@
 Simply run it from the command line, passing the synthesized wave file and the path file as parameters."""
 
 
-from bisect import bisect
+from bisect import bisect, bisect_right
 from itertools import izip_longest
 
 import pyglet
 
 from algorithms.algorithm import Segment
+from algorithms.rendering import PathView
 
 # TODO enable continuing playback after end of track is reached
 
+def array_audio_format(rate, data):
+    '''Return the `AudioFormat` of the numpy array `data` with the sampling rate `rate`.'''
+
+    if data.ndim not in (1, 2):
+        raise ValueError("The data array must be one- or two-dimensional.""")
+
+    num_channels = data.shape[1] if data.ndim > 1 else 1
+    if num_channels not in [1, 2]:
+        raise ValueError("Only mono and stereo audio are supported.""")
+
+    num_bits = data.dtype.itemsize * 8
+    if num_bits not in [8, 16]:
+        raise ValueError("Only 8 and 16 bit audio are supported.""")
+
+    return pyglet.media.AudioFormat(num_channels, num_bits, rate)
+
 class ArraySource(pyglet.media.StaticMemorySource):
     '''A source that has been created from a numpy array.'''
 
@@ -26,59 +43,115 @@ class ArraySource(pyglet.media.StaticMemorySource):
                 A c-contiguous numpy array of dimension (num_samples, num_channels).
         '''
         
-        if data.ndim not in (1, 2):
-            raise ValueError("The data array must be one- or two-dimensional.""")
-
         if not data.flags.c_contiguous:
             raise ValueError("The data array must be c-contiguous.""")
 
-        num_channels = data.shape[1] if data.ndim > 1 else 1
-        if num_channels not in [1, 2]:
-            raise ValueError("Only mono and stereo audio are supported.""")
-        
-        num_bits = data.dtype.itemsize * 8
-        if num_bits not in [8, 16]:
-            raise ValueError("Only 8 and 16 bit audio are supported.""")
-        
-        audio_format = pyglet.media.AudioFormat(num_channels, num_bits, rate)
-
-        super(ArraySource, self).__init__(data.tostring(), audio_format)
+        super(ArraySource, self).__init__(data.tostring(), array_audio_format(rate, data))
 
     def _get_queue_source(self):
         return self
 
-def draw_line(x0, x1, y0, y1, color=None):
-    if color:
-        pyglet.gl.glColor3f(*color)
-    pyglet.graphics.draw(2, pyglet.gl.GL_LINES, ("v2f", (x0, y0, x1, y1)))
+class PathSource(pyglet.media.StreamingSource):
+    '''A source that renders a path from a numpy array of source audio while it is played.
+
+    Only the blocks requested by the player are rendered, so playback starts at once and needs constant memory, no matter how long
+    the path is. Seeking takes O(log n) for n segments.'''
 
-def draw_point(x, y, color=None, size=5):
-    if color:
-        pyglet.gl.glColor3f(*color)
-    pyglet.graphics.draw(2, pyglet.gl.GL_LINES, ("v2f", (x - 0.5 * size, y - 0.5 * size, x + 0.5 * size, y + 0.5 * size)))
-    pyglet.graphics.draw(2, pyglet.gl.GL_LINES, ("v2f", (x - 0.5 * size, y + 0.5 * size, x + 0.5 * size, y - 0.5 * size)))
+    def __init__(self, rate, data, segments, crossfade=0):
+        '''Construct a `PathSource` for the path with the segments `segments` through the data in `data`.
 
-def draw_keypoints(source_keypoints, target_keypoints, scale_source, scale_target, offset_source, offset_target, color=(1, 0, 0)):
+        :Parameters:
+            `rate` : `int`
+                The sampling rate in Hertz.
+            `data` : `array`
+                A numpy array of dimension (num_samples, num_channels), e.g. memory-mapped from a wave file.
+            `segments` : `list`
+                The `Segment`s of the path.
+            `crossfade` : `int`
+                The number of samples over which jumps are crossfaded.
+        '''
+
+        self.audio_format = array_audio_format(rate, data)
+        self.view = PathView(data, segments, crossfade)
+        self.rate = rate
+        self.position = 0
+        self._duration = len(self.view) / float(rate)
+
+    def get_audio_data(self, num_bytes, compensation_time=0.0):
+        # newer versions of pyglet also pass a compensation time, which is not needed as the timestamps follow from the position
+        num_samples = num_bytes // self.audio_format.bytes_per_sample
+        if num_samples <= 0 or self.position >= len(self.view):
+            return None
+        start, stop = self.position, min(self.position + num_samples, len(self.view))
+        self.position = stop
+        data = self.view.render(start, stop).tostring()
+        return pyglet.media.AudioData(data, len(data), start / float(self.rate), (stop - start) / float(self.rate), [])
+
+    def seek(self, timestamp):
+        self.position = min(max(int(round(timestamp * self.rate)), 0), len(self.view))
+
+    # names of these methods in older versions of pyglet
+    _get_audio_data = get_audio_data
+    _seek = seek
+
+def keypoint_vertices(source_keypoints, target_keypoints, scale_source, scale_target, offset_source, offset_target, size=5):
+    """Return the vertices of the lines of crosses of `size` pixels at the keypoints, in window coordinates."""
+    vertices = []
     for s, t in zip(source_keypoints, target_keypoints):
-        draw_point(scale_source * s + offset_source, scale_target * t + offset_target, color)
-
-def draw_path(segments, position=None, play_color=(0, 0, 1), jump_color=(0, 1, 0)):
-    """Draw a path up to the specified `position`."""
-    start = 0
-    for s0, s1 in izip_longest(segments, segments[1:]):
-        if position is None or start + s0.duration <= position:
-            draw_line(s0.start, s0.end, start, start + s0.duration, play_color)
-        elif position != start:
-            duration = (position - start)
-            draw_line(s0.start, s0.start + duration, start, start + duration, play_color)
-        start += s0.duration
-        if position is not None and start > position:
-            break
-        if s1 is not None:
-            draw_line(s0.end, s1.start, start, start, jump_color)
+        x, y = scale_source * s + offset_source, scale_target * t + offset_target
+        vertices.extend((x - 0.5 * size, y - 0.5 * size, x + 0.5 * size, y + 0.5 * size, x - 0.5 * size, y + 0.5 * size, x + 0.5 * size, y - 0.5 * size))
+    return vertices
+
+class PathDrawing(object):
+    """The lines of a path in a `pyglet.graphics.Batch`, colored up to the playback position.
+
+    The lines are created once. When the position changes, only the lines between the old and the new position are recolored, and the
+    segment that is played is found by bisection, so that drawing a frame does not depend on the length of the path."""
+
+    def __init__(self, segments, color=(1.0, 1.0, 1.0), play_color=(0.0, 0.0, 1.0), jump_color=(0.0, 1.0, 0.0)):
+        self.segments = segments
+        self.batch = pyglet.graphics.Batch()
+
+        # per segment, the line of the segment and the line of the jump after it (of length 0 after the last segment)
+        vertices = []
+        self.target_starts, self.target_ends = [], []
+        start = 0
+        for s0, s1 in izip_longest(segments, segments[1:]):
+            end = start + s0.duration
+            vertices.extend((s0.start, start, s0.end, end, s0.end, end, s0.end if s1 is None else s1.start, end))
+            self.target_starts.append(start)
+            self.target_ends.append(end)
+            start = end
+        self.colors = list(color) * (4 * len(segments))
+        self.played_colors = (list(play_color) * 2 + list(jump_color) * 2) * len(segments)
+        # pyglet cannot allocate an empty vertex list, and nothing is recolored without segments
+        self.lines = self.batch.add(4 * len(segments), pyglet.gl.GL_LINES, None, ("v2f", vertices), ("c3f", self.colors)) if segments else None
+        self.num_played = 0 # number of segments whose lines have the played colors
+
+        # the part of the segment that is played
+        self.current = self.batch.add(2, pyglet.gl.GL_LINES, None, ("v2f", (0, 0, 0, 0)), ("c3f", list(play_color) * 2))
+
+    def update(self, position):
+        """Color the path up to the target time `position`."""
+        num_played = bisect_right(self.target_ends, position)
+        if num_played > self.num_played:
+            self.lines.colors[12*self.num_played:12*num_played] = self.played_colors[12*self.num_played:12*num_played]
+        elif num_played < self.num_played:
+            self.lines.colors[12*num_played:12*self.num_played] = self.colors[12*num_played:12*self.num_played]
+        self.num_played = num_played
+
+        if num_played < len(self.segments) and position > self.target_starts[num_played]:
+            segment, start = self.segments[num_played], self.target_starts[num_played]
+            self.current.vertices[:] = (segment.start, start, segment.start + (position - start), position)
+        else:
+            self.current.vertices[:] = (0, 0, 0, 0)
+
+    def draw(self):
+        self.batch.draw()
 
 def play(rate, data, source_keypoints, target_keypoints, raw_segments, length):
-    sound = ArraySource(rate, data)
+    """Play back and visualize a path. `data` is either the synthesized array or a pyglet source, e.g. a `PathSource`."""
+    sound = data if isinstance(data, pyglet.media.Source) else ArraySource(rate, data)
 
     source_keypoints = [x / rate for x in source_keypoints]
     target_keypoints = [x / rate for x in target_keypoints]
@@ -94,11 +167,13 @@ def play(rate, data, source_keypoints, target_keypoints, raw_segments, length):
     max_source = length / rate
     max_target = max(max(target_keypoints), sum(s[1] - s[0] for s in segments))
 
-    target_starts = reduce(lambda x, y: x + [x[-1] + y], (s.duration for s in segments), [0])
-    points_of_interest = sorted(set([max(x - 3, 0) for x in target_starts]))
-
     window = pyglet.window.Window(resizable=True)
 
+    drawing = PathDrawing(segments)
+    points_of_interest = sorted(set([max(x - 3, 0) for x in drawing.target_starts + drawing.target_ends[-1:]]))
+    keypoints = pyglet.graphics.vertex_list(4 * len(source_keypoints), "v2f", ("c3f", (1.0, 0.0, 0.0) * (4 * len(source_keypoints))))
+    keypoints_window_size = [None]
+
     pyglet.gl.glEnable(pyglet.gl.GL_LINE_SMOOTH)
     pyglet.gl.glHint(pyglet.gl.GL_LINE_SMOOTH_HINT, pyglet.gl.GL_NICEST)
     pyglet.gl.glBlendFunc(pyglet.gl.GL_SRC_ALPHA, pyglet.gl.GL_ONE_MINUS_SRC_ALPHA)
@@ -114,10 +189,14 @@ def play(rate, data, source_keypoints, target_keypoints, raw_segments, length):
         scale_target = (window.height - 10) / float(max_target)
         pyglet.gl.glScalef(scale_source, scale_target, 1.0)
         pyglet.gl.glTranslatef(offset_source / scale_source, offset_target / scale_target, 1.0)
-        draw_path(segments, play_color=(1.0, 1.0, 1.0), jump_color=(1.0, 1.0, 1.0))
-        draw_path(segments, player.time, play_color=(0.0, 0.0, 1.0), jump_color=(0.0, 1.0, 0.0))
+        drawing.update(player.time)
+        drawing.draw()
         pyglet.gl.glPopMatrix()
-        draw_keypoints(source_keypoints, target_keypoints, scale_source, scale_target, offset_source, offset_target)
+        # the keypoints are drawn in window coordinates, so that they keep their size
+        if keypoints_window_size[0] != (window.width, window.height):
+            keypoints.vertices[:] = keypoint_vertices(source_keypoints, target_keypoints, scale_source, scale_target, offset_source, offset_target)
+            keypoints_window_size[0] = (window.width, window.height)
+        keypoints.draw(pyglet.gl.GL_LINES)
 
     @window.event
     def on_key_press(symbol, modifiers):
@@ -163,15 +242,16 @@ def play(rate, data, source_keypoints, target_keypoints, raw_segments, length):
 if __name__ == "__main__":
     import sys
     from scipy.io import wavfile
-    from datafile import read_datafile
+    from algorithms.datafile import read_datafile, read_rows
 
     if len(sys.argv) != 3:
         print >> sys.stderr, "Usage: %s wavfilename pathfilename" % sys.argv[0]
         sys.exit(1)
 
-    rate, data = wavfile.read(sys.argv[1])
+    rate, data = wavfile.read(sys.argv[1], mmap=True)
     pathdata = read_datafile(sys.argv[2])
-    segments = [(start_sample, end_sample) for start_sample, start_time, end_sample, end_time in pathdata["data"]]
+    segments = read_rows(pathdata, ["segment_starts", "segment_ends"], "data", (0, 2))
 
-    play(rate, data, pathdata["source_keypoints"], pathdata["target_keypoints"], segments, pathdata["length"])
+    # the wave file holds the synthesized path already, so it is streamed as it is
+    play(rate, PathSource(rate, data, [Segment(0, len(data))]), pathdata["source_keypoints"], pathdata["target_keypoints"], segments, pathdata["length"])
 
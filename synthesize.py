@@ -3,15 +3,17 @@
 import os
 import time
 
-from numpy import concatenate
+from numpy import concatenate, asarray
 from scipy.io import wavfile
 from pylab import figure, axes, title, show
 from matplotlib.lines import Line2D
 
-from datafile import read_datafile, write_datafile
-from utilities import make_lookup, ptime, frametime
+from algorithms.datafile import read_datafile, write_datafile, read_rows
+from utilities import make_lookup, ptime
 from timeplots import FrameTimeLocator, FrameTimeFormatter
-from algorithms.algorithm import Cut, Segment, Keypoint, Path
+from algorithms.rendering import PathView, write_wav
+from algorithms.cache import ArtifactCache, array_fingerprint
+from algorithms.algorithm import Cut, Segment, Keypoint, Path, cuts_fingerprint
 
 from algorithms.cuts import algorithms as cuts_algorithms
 from algorithms.path import algorithms as path_algorithms
@@ -31,11 +33,7 @@ def read_cuts(cutsfilename, cuts_algo=None, infilename=None):
                     if changed_parameters:
                         raise ValueError("parameters have changed (%s)" % ", ".join(changed_parameters))
                     else:
-                        return (
-                                contents["rate"],
-                                contents["length"],
-                                [Cut(int(start), int(end), float(error)) for start, start_time, end, end_time, error in contents["data"]],
-                                )
+                        return contents["rate"], contents["length"], cuts_from_contents(contents)
             else:
                 raise ValueError("cut file too old")
         except (OSError, IOError):
@@ -45,26 +43,38 @@ def read_cuts(cutsfilename, cuts_algo=None, infilename=None):
     else:
         raise TypeError("no cut file specified")
 
-def compute_cuts(rate, data, cuts_algo, cutsfilename=None):
+def cuts_from_contents(contents):
+    return [Cut(int(start), int(end), float(cost)) for start, end, cost in
+            read_rows(contents, ["cut_starts", "cut_ends", "cut_costs"], "data", (0, 2, 4))]
+
+def cuts_cache_key(cache, rate, data, cuts_algo):
+    return cache.key("cuts", array_fingerprint(data), rate, cuts_algo.__class__.__name__, sorted(cuts_algo.get_parameters().items()))
+
+def compute_cuts(rate, data, cuts_algo, cutsfilename=None, cache=None, cache_key=None):
     start_time = time.time()
     cuts = cuts_algo(data)
     elapsed_time = time.time() - start_time
 
-    # write cuts to file
-    if cutsfilename is not None:
-        print "Writing cuts to %s." % cutsfilename
+    # write cuts to file and cache
+    if cutsfilename is not None or cache is not None:
         contents = cuts_algo.get_parameters()
         contents["algorithm"] = cuts_algo.__class__.__name__
         contents["elapsed_time"] = elapsed_time
         contents["length"] = len(data)
         contents["rate"] = rate
-        contents["data"] = [(start, frametime(start, rate), end, frametime(end, rate), error) for start, end, error in cuts]
-        write_datafile(cutsfilename, contents)
+        contents["cut_starts"] = asarray([cut.start for cut in cuts], dtype=int)
+        contents["cut_ends"] = asarray([cut.end for cut in cuts], dtype=int)
+        contents["cut_costs"] = asarray([cut.cost for cut in cuts], dtype=float)
+        if cutsfilename is not None:
+            print "Writing cuts to %s." % cutsfilename
+            write_datafile(cutsfilename, contents)
+        if cache is not None:
+            cache.put(cache_key, contents)
 
     return cuts
 
-def read_path(pathfilename, path_algo=None, infilename=None, source_keypoints=None, target_keypoints=None):
-    # TODO check if list of cuts has changed
+def read_path(pathfilename, path_algo=None, infilename=None, source_keypoints=None, target_keypoints=None, cuts=None,
+        drift_tolerance_sec=None, cuts_algo=None):
     if pathfilename is not None:
         try:
             if infilename is None or os.stat(pathfilename).st_mtime > os.stat(infilename).st_mtime:
@@ -77,16 +87,24 @@ def read_path(pathfilename, path_algo=None, infilename=None, source_keypoints=No
                         changed_parameters.append("source_keypoints")
                     if target_keypoints is not None and contents["target_keypoints"] != target_keypoints:
                         changed_parameters.append("target_keypoints")
+                    # path files written before the fingerprint was stored cannot be checked
+                    if cuts is not None and "cuts_fingerprint" in contents and contents["cuts_fingerprint"] != cuts_fingerprint(cuts):
+                        changed_parameters.append("cuts")
+                    # without cuts, the algorithm and parameters they were computed with are checked
+                    if cuts is None and cuts_algo is not None and "cuts_parameters" in contents and \
+                            (contents["cuts_parameters"].get("algorithm") != cuts_algo.__class__.__name__ or
+                            cuts_algo.changed_parameters(contents["cuts_parameters"])):
+                        changed_parameters.append("cuts_algo")
+                    if drift_tolerance_sec is not None and "drift_tolerance" in contents and \
+                            contents["drift_tolerance"] != int(round(contents["rate"] * drift_tolerance_sec)):
+                        changed_parameters.append("drift_tolerance")
                     if changed_parameters:
                         raise ValueError("parameters have changed (%s)" % ", ".join(changed_parameters))
                     else:
                         return (
                                 contents["rate"],
                                 contents["length"],
-                                Path(
-                                [Segment(start, end) for start, start_time, end, end_time in contents["data"]],
-                                [Keypoint(source, target) for source, target in zip(contents["source_keypoints"], contents["target_keypoints"])]
-                                ),
+                                path_from_contents(contents),
                                 contents["source_keypoints"],
                                 contents["target_keypoints"],
                                 )
@@ -99,13 +117,32 @@ def read_path(pathfilename, path_algo=None, infilename=None, source_keypoints=No
     else:
         raise TypeError("no path file specified")
 
-def compute_path(rate, length, cuts, path_algo, source_keypoints, target_keypoints, pathfilename=None):
+def read_previous_path(pathfilename):
+    """Read the path from a path file, no matter with which parameters it was computed. Return ``None`` if it cannot be read."""
+    try:
+        contents = read_datafile(pathfilename)
+        return Path([Segment(start, end) for start, end in read_rows(contents, ["segment_starts", "segment_ends"], "data", (0, 2))])
+    except (OSError, IOError, KeyError, SyntaxError, TypeError, ValueError):
+        return None
+
+def path_from_contents(contents):
+    return Path(
+            [Segment(start, end) for start, end in read_rows(contents, ["segment_starts", "segment_ends"], "data", (0, 2))],
+            [Keypoint(source, target) for source, target in zip(contents["source_keypoints"], contents["target_keypoints"])]
+            )
+
+def path_cache_key(cache, rate, length, cuts, path_algo, source_keypoints, target_keypoints):
+    return cache.key("path", cuts_fingerprint(cuts), rate, length, path_algo.__class__.__name__, sorted(path_algo.get_parameters().items()),
+            getattr(path_algo, "drift_tolerance", None), source_keypoints, target_keypoints)
+
+def compute_path(rate, length, cuts, path_algo, source_keypoints, target_keypoints, pathfilename=None, cache=None, cache_key=None,
+        cuts_algo=None):
     start_time = time.time()
     path = path_algo(source_keypoints, target_keypoints, cuts)
     elapsed_time = time.time() - start_time
 
-    # write path to file
-    if pathfilename is not None:
+    # write path to file and cache
+    if pathfilename is not None or cache is not None:
         contents = path_algo.get_parameters()
         contents["algorithm"] = path_algo.__class__.__name__
         contents["elapsed_time"] = elapsed_time
@@ -113,8 +150,20 @@ def compute_path(rate, length, cuts, path_algo, source_keypoints, target_keypoin
         contents["rate"] = rate
         contents["source_keypoints"] = source_keypoints
         contents["target_keypoints"] = target_keypoints
-        contents["data"] = [(s.start, frametime(s.start, rate), s.end, frametime(s.end, rate)) for s in path.segments]
-        write_datafile(pathfilename, contents)
+        statistics = path_algo.get_statistics()
+        if statistics:
+            contents["statistics"] = statistics
+        contents["segment_starts"] = asarray([s.start for s in path.segments], dtype=int)
+        contents["segment_ends"] = asarray([s.end for s in path.segments], dtype=int)
+        contents["cuts_fingerprint"] = cuts_fingerprint(cuts)
+        if hasattr(path_algo, "drift_tolerance"):
+            contents["drift_tolerance"] = path_algo.drift_tolerance
+        if cuts_algo is not None:
+            contents["cuts_parameters"] = dict(cuts_algo.get_parameters(), algorithm=cuts_algo.__class__.__name__)
+        if pathfilename is not None:
+            write_datafile(pathfilename, contents)
+        if cache is not None:
+            cache.put(cache_key, contents)
 
     return path
 
@@ -165,8 +214,13 @@ def show_path_plot(rate, length, path, source_keypoints, target_keypoints):
     ax.scatter(source_keypoints, target_keypoints, color="red", marker="x")
 
 def main(infilename, cutsfilename, pathfilename, outfilename, source_keypoints_sec, target_keypoints_sec, cuts_algo, path_algo,
-        save_cuts=False, show_cuts=False, show_path=False, playback=False):
+        save_cuts=False, show_cuts=False, show_path=False, playback=False, piece_cache=None, warm_start=False,
+        crossfade_sec=0, cache_dir=None, cache_size=None, drift_tolerance_sec=0.1):
     source_keypoints = target_keypoints = None
+    max_size = None if cache_size is None else int(cache_size * 2**20)
+    if path_algo is not None and piece_cache is not None:
+        path_algo.piece_cache = ArtifactCache(piece_cache, max_size)
+    cache = ArtifactCache(cache_dir, max_size) if cache_dir is not None else None
 
     # try to read cuts from file
     try:
@@ -182,7 +236,8 @@ def main(infilename, cutsfilename, pathfilename, outfilename, source_keypoints_s
 
     # try to read path from file
     try:
-        rate, length, path, source_keypoints, target_keypoints = read_path(pathfilename, path_algo, infilename, source_keypoints, target_keypoints)
+        rate, length, path, source_keypoints, target_keypoints = read_path(pathfilename, path_algo, infilename, source_keypoints, target_keypoints,
+                cuts if has_cached_cuts else None, drift_tolerance_sec, cuts_algo)
         has_cached_path = True
     except ValueError, e:
         print e
@@ -198,7 +253,8 @@ def main(infilename, cutsfilename, pathfilename, outfilename, source_keypoints_s
 
     if must_read_data:
         if infilename is not None:
-            rate, data = wavfile.read(infilename)
+            # memory-mapped, so that only the parts of the input that are used are read
+            rate, data = wavfile.read(infilename, mmap=True)
             length = len(data)
             if source_keypoints_sec is not None and target_keypoints_sec is not None:
                 if not has_cached_path:
@@ -214,18 +270,39 @@ def main(infilename, cutsfilename, pathfilename, outfilename, source_keypoints_s
 
     if must_compute_cuts:
         if can_compute_cuts:
-            cuts = compute_cuts(rate, data, cuts_algo, cutsfilename)
+            cuts_key = cuts_cache_key(cache, rate, data, cuts_algo) if cache is not None else None
+            contents = cache.get(cuts_key) if cache is not None else None
+            if contents is not None:
+                print "Using cached cuts."
+                cuts = cuts_from_contents(contents)
+                if cutsfilename is not None:
+                    write_datafile(cutsfilename, contents)
+            else:
+                cuts = compute_cuts(rate, data, cuts_algo, cutsfilename, cache, cuts_key)
         else:
             raise RuntimeError("insufficient information to compute cuts")
 
     if must_compute_path:
         if can_compute_path:
-            path = compute_path(rate, length, cuts, path_algo, source_keypoints, target_keypoints, pathfilename)
+            if hasattr(path_algo, "drift_tolerance"):
+                path_algo.drift_tolerance = int(round(rate * drift_tolerance_sec))
+            path_key = path_cache_key(cache, rate, length, cuts, path_algo, source_keypoints, target_keypoints) if cache is not None else None
+            contents = cache.get(path_key) if cache is not None else None
+            if contents is not None:
+                print "Using cached path."
+                path = path_from_contents(contents)
+                if pathfilename is not None:
+                    write_datafile(pathfilename, contents)
+            else:
+                if warm_start:
+                    path_algo.warm_start = read_previous_path(pathfilename)
+                path = compute_path(rate, length, cuts, path_algo, source_keypoints, target_keypoints, pathfilename, cache, path_key,
+                        cuts_algo)
         else:
             raise RuntimeError("insufficient information to compute path")
 
     if outfilename:
-        wavfile.write(outfilename, rate, path.synthesize(data))
+        write_wav(outfilename, rate, PathView(data, path.segments, int(round(rate * crossfade_sec))))
 
     if save_cuts:
         for cut in cuts:
@@ -245,8 +322,8 @@ def main(infilename, cutsfilename, pathfilename, outfilename, source_keypoints_s
         show()
 
     if playback:
-        from audioplayer import play
-        play(rate, path.synthesize(data), source_keypoints, target_keypoints, path.segments, len(data))
+        from audioplayer import play, PathSource
+        play(rate, PathSource(rate, data, path.segments, int(round(rate * crossfade_sec))), source_keypoints, target_keypoints, path.segments, len(data))
 
 def format_parameter(pname, defaults):
     return "    %s=%s" % (pname, defaults[pname]) if pname in defaults else "    %s" % pname
@@ -285,6 +362,19 @@ def create_parser():
             help="cuts algorithm and parameters as key=value list")
     parser.add_argument("-P", "--pathalgo", dest="path_algo", nargs="*",
             help="path algorithm and parameters as key=value list")
+    parser.add_argument("--piece-cache", dest="piece_cache",
+            help="directory for caching the paths between pairs of key points across runs")
+    parser.add_argument("--drift-tolerance", dest="drift_tolerance_sec", type=ptime, default=0.1,
+            help="deviation from the target key points (in seconds, or hh:mm:ss.sss) up to which pieces between key points are solved with "
+            "their own target durations, so that they can be taken from the piece cache")
+    parser.add_argument("--cache-dir", dest="cache_dir",
+            help="directory for caching cuts and paths by the contents of the input and the algorithm parameters")
+    parser.add_argument("--cache-size", dest="cache_size", type=float, default=1024,
+            help="maximum size of the cache directory and of the piece cache in megabytes; the least recently used entries are deleted")
+    parser.add_argument("--warm-start", dest="warm_start", action="store_true",
+            help="start the path search from the path in the path file, if it has to be computed again")
+    parser.add_argument("--crossfade", dest="crossfade_sec", type=ptime, default=0,
+            help="duration of the crossfades at jumps in the output (in seconds, or hh:mm:ss.sss)")
     parser.add_argument("--save-cuts", dest="save_cuts", action="store_true",
             help="save cuts as wave files")
     parser.add_argument("--show-cuts", dest="show_cuts", action="store_true",
@@ -0,0 +1,27 @@
+"""Inputs shared by the tests."""
+
+from numpy.random import RandomState
+
+from algorithms.algorithm import Cut
+
+def random_cuts(num_cuts, length, seed=0, min_jump=500):
+    """Return ``num_cuts`` distinct random cuts within ``length`` samples, jumping at least ``min_jump`` samples."""
+    rng = RandomState(seed)
+    cuts = []
+    seen = set()
+    while len(cuts) < num_cuts:
+        start, end = rng.randint(1000, length - 1000, 2)
+        if abs(start - end) < min_jump or (start, end) in seen:
+            continue
+        seen.add((start, end))
+        cuts.append(Cut(int(start), int(end), float(rng.rand())))
+    return cuts
+
+def check_path(test, path, source_start, source_end, cuts):
+    """Check that ``path`` plays from ``source_start`` to ``source_end`` and jumps only where there is a cut."""
+    jumps = set((cut.start, cut.end) for cut in cuts)
+    segments = path.segments
+    test.assertEqual(segments[0].start, source_start)
+    test.assertEqual(segments[-1].end, source_end)
+    for a, b in zip(segments, segments[1:]):
+        test.assertTrue(a.end == b.start or (a.end, b.start) in jumps, "jump from %d to %d is no cut" % (a.end, b.start))
@@ -0,0 +1,193 @@
+import sys
+import types
+import unittest
+
+import numpy
+from numpy.random import RandomState
+
+from algorithms.algorithm import Segment
+from algorithms.rendering import PathView
+
+def stub_pyglet():
+    """Return a stand-in for the parts of pyglet that the audio player uses without a window."""
+    pyglet = types.ModuleType("pyglet")
+    pyglet.media = types.ModuleType("pyglet.media")
+    pyglet.graphics = types.ModuleType("pyglet.graphics")
+    pyglet.gl = types.ModuleType("pyglet.gl")
+
+    class Source(object):
+        pass
+
+    class StreamingSource(Source):
+        pass
+
+    class StaticMemorySource(Source):
+        def __init__(self, data, audio_format):
+            self.data, self.audio_format = data, audio_format
+
+    class AudioFormat(object):
+        def __init__(self, channels, sample_size, sample_rate):
+            self.channels, self.sample_size, self.sample_rate = channels, sample_size, sample_rate
+            self.bytes_per_sample = channels * sample_size // 8
+
+    class AudioData(object):
+        def __init__(self, data, length, timestamp, duration, events):
+            self.data, self.length, self.timestamp, self.duration, self.events = data, length, timestamp, duration, events
+
+    class VertexList(object):
+        def __init__(self, count, mode, group, *data):
+            for format, values in data:
+                setattr(self, "vertices" if format.startswith("v") else "colors", list(values))
+
+    class Batch(object):
+        def add(self, count, mode, group, *data):
+            if not count:
+                raise ValueError("vertex lists must not be empty")
+            return VertexList(count, mode, group, *data)
+
+    for name, value in [("Source", Source), ("StreamingSource", StreamingSource), ("StaticMemorySource", StaticMemorySource),
+            ("AudioFormat", AudioFormat), ("AudioData", AudioData)]:
+        setattr(pyglet.media, name, value)
+    pyglet.graphics.Batch = Batch
+    pyglet.gl.GL_LINES = 1
+    return pyglet
+
+# audioplayer keeps the stand-in as its pyglet module, while other modules are not affected
+_pyglet = sys.modules.get("pyglet")
+sys.modules["pyglet"] = stub_pyglet()
+try:
+    import audioplayer
+finally:
+    if _pyglet is None:
+        del sys.modules["pyglet"]
+    else:
+        sys.modules["pyglet"] = _pyglet
+
+def draw_path(segments, position=None, play_color=(0, 0, 1), jump_color=(0, 1, 0)):
+    """Return the ``(vertices, color)`` of the lines that drawing a path up to ``position`` drew before the lines were batched."""
+    lines = []
+    start = 0
+    for s0, s1 in zip(segments, segments[1:] + [None]):
+        if position is None or start + s0.duration <= position:
+            lines.append(((s0.start, start, s0.end, start + s0.duration), play_color))
+        elif position != start:
+            duration = (position - start)
+            lines.append(((s0.start, start, s0.start + duration, start + duration), play_color))
+        start += s0.duration
+        if position is not None and start > position:
+            break
+        if s1 is not None:
+            lines.append(((s0.end, start, s1.start, start), jump_color))
+    return lines
+
+class PathSourceTest(unittest.TestCase):
+    def setUp(self):
+        self.data = RandomState(0).randint(-30000, 30000, (5000, 2)).astype(numpy.int16)
+        self.segments = [Segment(0, 1500), Segment(3000, 4200), Segment(500, 2000), Segment(4000, 5000)]
+        self.source = audioplayer.PathSource(100, self.data, self.segments, crossfade=64)
+        self.expected = PathView(self.data, self.segments, 64)[:]
+
+    def check_block(self, audio_data, start, stop):
+        self.assertEqual(audio_data.data, self.expected[start:stop].tostring())
+        self.assertEqual(audio_data.length, 4 * (stop - start))
+        self.assertAlmostEqual(audio_data.timestamp, start / 100.0)
+        self.assertAlmostEqual(audio_data.duration, (stop - start) / 100.0)
+
+    def test_format(self):
+        self.assertEqual(self.source.audio_format.bytes_per_sample, 4)
+        self.assertAlmostEqual(self.source._duration, 52.0)
+
+    def test_blocks(self):
+        blocks = []
+        while True:
+            audio_data = self.source.get_audio_data(4 * 1000)
+            if audio_data is None:
+                break
+            blocks.append(audio_data.data)
+        self.assertEqual(len(blocks), 6)
+        self.assertEqual("".join(blocks), self.expected.tostring())
+
+    def test_compensation_time(self):
+        self.check_block(self.source.get_audio_data(4 * 700, 0.25), 0, 700)
+        self.check_block(self.source.get_audio_data(4 * 700, 0.0), 700, 1400)
+
+    def test_older_names(self):
+        self.check_block(self.source._get_audio_data(4 * 700), 0, 700)
+        self.source._seek(10.0)
+        self.check_block(self.source._get_audio_data(4 * 700), 1000, 1700)
+
+    def test_partial_samples(self):
+        self.check_block(self.source.get_audio_data(4 * 10 + 3), 0, 10)
+        self.assertIsNone(self.source.get_audio_data(3))
+
+    def test_seek(self):
+        self.source.seek(14.9)
+        self.check_block(self.source.get_audio_data(4 * 200), 1490, 1690)
+        self.source.seek(0.123)
+        self.check_block(self.source.get_audio_data(4 * 200), 12, 212)
+        self.source.seek(51.0)
+        self.check_block(self.source.get_audio_data(4 * 1000), 5100, 5200)
+        self.assertIsNone(self.source.get_audio_data(4 * 1000))
+
+    def test_seek_out_of_range(self):
+        self.source.seek(-1.0)
+        self.check_block(self.source.get_audio_data(4 * 100), 0, 100)
+        self.source.seek(100.0)
+        self.assertEqual(self.source.position, 5200)
+        self.assertIsNone(self.source.get_audio_data(4 * 100))
+
+class PathDrawingTest(unittest.TestCase):
+    def setUp(self):
+        # the second segment plays on from the first without a jump
+        self.segments = [Segment(100, 400), Segment(400, 600), Segment(50, 250), Segment(700, 900), Segment(300, 350)]
+        self.drawing = audioplayer.PathDrawing(self.segments)
+
+    def drawn_lines(self):
+        """Return the ``(vertices, color)`` of the lines of the drawing that do not have the color of unplayed lines."""
+        lines = []
+        vertices, colors = self.drawing.lines.vertices, self.drawing.lines.colors
+        # the last segment is followed by a jump line of length 0, which was not drawn before
+        for i in range(len(vertices) // 4 - 1):
+            if colors[6*i:6*i+3] != [1.0, 1.0, 1.0]:
+                self.assertEqual(colors[6*i:6*i+3], colors[6*i+3:6*i+6])
+                lines.append((tuple(vertices[4*i:4*i+4]), tuple(colors[6*i:6*i+3])))
+        current = tuple(self.drawing.current.vertices)
+        if current != (0, 0, 0, 0):
+            lines.append((current, tuple(self.drawing.current.colors[:3])))
+        return sorted(lines)
+
+    def check(self, position):
+        self.drawing.update(position)
+        self.assertEqual(self.drawn_lines(), sorted(draw_path(self.segments, position)), "at %r" % position)
+
+    def test_nothing_played(self):
+        self.assertEqual(self.drawn_lines(), [])
+        self.check(0)
+
+    def test_forward_and_backward(self):
+        boundaries = self.drawing.target_starts + self.drawing.target_ends
+        positions = sorted(set(boundaries + [b + 1 for b in boundaries] + [b - 1 for b in boundaries if b] + [25, 333, 777, 1200]))
+        for position in positions + positions[::-1]:
+            self.check(position)
+
+    def test_jumps(self):
+        for position in [0, 1100, 300, 1100, 0, 600, 500, 501, 1100]:
+            self.check(position)
+
+    def test_boundaries(self):
+        self.check(300)
+        self.assertEqual(self.drawing.num_played, 1)
+        self.assertEqual(self.drawing.current.vertices, [0, 0, 0, 0])
+        self.check(301)
+        self.assertEqual(self.drawing.current.vertices, [400, 300, 401, 301])
+        self.check(700)
+        self.assertEqual(self.drawing.num_played, 3)
+
+    def test_empty_path(self):
+        drawing = audioplayer.PathDrawing([])
+        drawing.update(0)
+        drawing.update(10)
+        self.assertEqual(drawing.current.vertices, [0, 0, 0, 0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from algorithms.path.beam import BeamPathAlgorithm
+from algorithms.repetition import RepetitionIndex
+from helpers import random_cuts, check_path
+
+class RecordingBeamPathAlgorithm(BeamPathAlgorithm):
+    """Beam search that records the durations and repetition measures of all paths it scores."""
+
+    def score(self, duration, cut_cost, log_repetition, target_duration):
+        self.scored.extend(zip(duration.tolist(), log_repetition.tolist()))
+        return super(RecordingBeamPathAlgorithm, self).score(duration, cut_cost, log_repetition, target_duration)
+
+class BeamPathAlgorithmTest(unittest.TestCase):
+    def test_path_follows_cuts(self):
+        cuts = random_cuts(100, 100000)
+        path = BeamPathAlgorithm(beam_width=20)([0, 100000], [0, 150000], cuts)
+        check_path(self, path, 0, 100000, cuts)
+
+    def test_repetition_is_accumulated_in_log_space(self):
+        # a path four times as long as the source repeats many segments
+        cuts = random_cuts(500, 250000, min_jump=25000)
+        algo = RecordingBeamPathAlgorithm(beam_width=5, max_steps=20000)
+        algo.scored = []
+        path = algo([0, 250000], [0, 1000000], cuts)
+        check_path(self, path, 0, 250000, cuts)
+        log_multiplicity = RepetitionIndex(path.segments).log_multiplicity
+        self.assertGreater(log_multiplicity, 1)
+        self.assertTrue(any(duration == path.duration and abs(log_repetition - log_multiplicity) < 1e-6
+            for duration, log_repetition in algo.scored))
+
+if __name__ == "__main__":
+    unittest.main()
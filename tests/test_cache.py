@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from algorithms.cache import ArtifactCache, array_fingerprint
+
+class ArtifactCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_keys(self):
+        cache = ArtifactCache(self.directory)
+        self.assertEqual(cache.key("cuts", "abc", 44100), cache.key("cuts", "abc", 44100))
+        self.assertNotEqual(cache.key("cuts", "abc", 44100), cache.key("cuts", "abc", 48000))
+        self.assertNotEqual(cache.key("cuts", "abc"), cache.key("path", "abc"))
+        self.assertTrue(cache.key("path", 1).startswith("path-"))
+
+    def test_array_fingerprint(self):
+        data = numpy.arange(1000, dtype=numpy.int16)
+        self.assertEqual(array_fingerprint(data), array_fingerprint(data.copy()))
+        self.assertNotEqual(array_fingerprint(data), array_fingerprint(data.astype(numpy.int32)))
+        self.assertNotEqual(array_fingerprint(data), array_fingerprint(data.reshape(500, 2)))
+        changed = data.copy()
+        changed[-1] = 0
+        self.assertNotEqual(array_fingerprint(data), array_fingerprint(changed))
+
+    def test_put_and_get(self):
+        cache = ArtifactCache(os.path.join(self.directory, "cache"))
+        key = cache.key("cuts", "abc")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, {"cut_starts": numpy.arange(5), "rate": 44100})
+        contents = cache.get(key)
+        self.assertTrue(numpy.array_equal(contents["cut_starts"], numpy.arange(5)))
+        self.assertEqual(contents["rate"], 44100)
+        self.assertEqual([name for name in os.listdir(cache.directory) if not name.endswith(".dat")], [])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ArtifactCache(self.directory)
+        keys = [cache.key("cuts", i) for i in range(4)]
+        for i, key in enumerate(keys):
+            cache.put(key, {"data": numpy.zeros(1000)})
+            os.utime(cache.filename(key), (1000 + i, 1000 + i))
+        entry_size = os.stat(cache.filename(keys[0])).st_size
+        cache.get(keys[0]) # now the most recently used entry
+
+        cache.max_size = 3 * entry_size
+        key = cache.key("cuts", 4)
+        cache.put(key, {"data": numpy.zeros(1000)})
+        self.assertEqual([cache.get(k) is not None for k in keys + [key]], [True, False, False, True, True])
+
+        # the new entry is kept even if it does not fit alone
+        cache.max_size = entry_size // 2
+        key = cache.key("cuts", 5)
+        cache.put(key, {"data": numpy.zeros(1000)})
+        self.assertEqual(os.listdir(self.directory), [key + ".dat"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from numpy.random import RandomState
+
+from algorithms.algorithm import Path, CompactPath, Segment, Keypoint, Cut
+
+def random_segments(rng, num_segments, length=1000):
+    segments = []
+    for i in range(num_segments):
+        start = rng.randint(length)
+        # some segments follow the one before, so that not every boundary is a cut
+        if segments and rng.rand() < 0.3:
+            start = segments[-1].end + 1
+        segments.append(Segment(start, start + 1 + rng.randint(100)))
+    return segments
+
+class CompactPathTest(unittest.TestCase):
+    def check_same(self, compact, path):
+        self.assertEqual(compact.segments, path.segments)
+        self.assertEqual(compact.duration, path.duration)
+        self.assertEqual(compact.cuts, path.cuts)
+        self.assertEqual(compact.segment_source_starts, path.segment_source_starts)
+        self.assertEqual(compact.segment_source_ends, path.segment_source_ends)
+        self.assertEqual(compact.segment_target_ends.tolist(), path.segment_target_ends.tolist())
+        self.assertEqual(compact.segment_target_starts, path.segment_target_starts)
+
+    def test_edits_match_path(self):
+        rng = RandomState(0)
+        for round in range(20):
+            segments = random_segments(rng, 20)
+            path, compact = Path(segments[:], [Keypoint(0, 0)]), CompactPath(segments, [Keypoint(0, 0)])
+            self.check_same(compact, path)
+            for step in range(20):
+                action = rng.randint(4)
+                if action == 0:
+                    segment = random_segments(rng, 1)[0]
+                    path += segment
+                    compact += segment
+                elif action == 1:
+                    other = Path(random_segments(rng, 3), [Keypoint(0, 0), Keypoint(5, 5)])
+                    path += other
+                    compact += other
+                elif action == 2 and len(path.cuts) > 2:
+                    start = rng.randint(len(path.cuts) - 1)
+                    end = start + 1 + rng.randint(len(path.cuts) - start - 1)
+                    try:
+                        path.remove_cuts(start, end)
+                    except ValueError:
+                        self.assertRaises(ValueError, compact.remove_cuts, start, end)
+                        continue
+                    compact.remove_cuts(start, end)
+                elif action == 3 and path.segments:
+                    segment = path.segments[rng.randint(len(path.segments))]
+                    cut = Cut(segment.start + rng.randint(segment.duration), rng.randint(1000), -1)
+                    position = rng.randint(len(path.cuts) + 1)
+                    try:
+                        path.insert_cut(position, cut)
+                    except (ValueError, UnboundLocalError):
+                        continue
+                    compact.insert_cut(position, cut)
+                self.check_same(compact, path)
+                self.assertEqual(compact.keypoints, path.keypoints)
+
+    def test_copy_is_independent(self):
+        compact = CompactPath(random_segments(RandomState(1), 10), [Keypoint(0, 0)])
+        copy = compact.copy()
+        copy += Segment(0, 10)
+        copy.segments = copy.segments[::-1]
+        self.assertEqual(len(compact.segments), 10)
+        self.assertEqual(compact.keypoints, [Keypoint(0, 0)])
+
+if __name__ == "__main__":
+    unittest.main()
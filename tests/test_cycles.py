@@ -0,0 +1,60 @@
+import unittest
+
+from numpy import inf
+
+from algorithms.path.cycles import AutomatonGraph
+from algorithms.path.segment import create_automaton
+from helpers import random_cuts
+
+def shortest_durations(graph, start):
+    """Return the shortest playback time from segment ``start`` to every segment (not including the last one), by relaxation."""
+    distances = [inf] * len(graph.segments)
+    distances[start] = 0
+    for i in range(len(graph.segments)):
+        for (a, b) in graph.cheapest:
+            distances[b] = min(distances[b], distances[a] + graph.durations[a])
+    return distances
+
+class AutomatonGraphTest(unittest.TestCase):
+    def setUp(self):
+        automaton, start, end = create_automaton(random_cuts(15, 20000, seed=3), 0, 20000)
+        self.graph = AutomatonGraph(automaton)
+
+    def check_sequence(self, path):
+        for a, b in zip(path, path[1:]):
+            self.assertIn((a, b), self.graph.cheapest)
+
+    def test_cheapest_jumps(self):
+        for (i, j), cost in self.graph.cheapest.items():
+            segment = self.graph.segments[i]
+            self.assertEqual(cost, min(c for c in segment if segment[c].start == self.graph.segments[j].start))
+
+    def test_shortest_path_matches_relaxation(self):
+        graph = self.graph
+        end = len(graph.segments) - 1
+        for start in range(len(graph.segments)):
+            expected = shortest_durations(graph, start)[end]
+            path = graph.shortest_path(start, end)
+            if expected == inf:
+                self.assertIsNone(path)
+            else:
+                self.assertEqual((path[0], path[-1]), (start, end))
+                self.check_sequence(path)
+                self.assertEqual(graph.durations[path[:-1]].sum(), expected)
+
+    def test_loops_are_shortest_ways_back(self):
+        graph = self.graph
+        loops = graph.loops(chunk_size=4)
+        self.assertEqual(sorted(loops), sorted(graph.loops()))
+        for first, path in loops:
+            self.assertIn((first, path[0]), graph.cheapest)
+            self.assertEqual(path[-1], first)
+            self.check_sequence(path)
+            self.assertEqual(graph.durations[path[:-1]].sum(), shortest_durations(graph, path[0])[first])
+        # every jump that can lead back has a loop
+        jumps = set((first, path[0]) for first, path in loops)
+        for (a, b) in graph.cheapest:
+            self.assertEqual((a, b) in jumps, shortest_durations(graph, b)[a] < inf)
+
+if __name__ == "__main__":
+    unittest.main()
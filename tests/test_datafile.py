@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from algorithms.datafile import write_datafile, read_datafile, read_rows, MAGIC, ALIGNMENT
+
+class DatafileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "data")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_binary_round_trip(self):
+        cuts = numpy.zeros(5, dtype=[("start", "<i8"), ("end", "<i8"), ("cost", "<f8")])
+        cuts["start"], cuts["end"], cuts["cost"] = [1, 2, 3, 4, 5], [50, 40, 30, 20, 10], numpy.linspace(0, 1, 5)
+        contents = {
+                "cuts": cuts,
+                "matrix": numpy.arange(12, dtype=numpy.float32).reshape(3, 4),
+                "bytes": numpy.arange(3, dtype=numpy.uint8),
+                "empty": numpy.zeros((0, 3), dtype=numpy.int64),
+                "name": "song.wav",
+                "length": numpy.int64(1000),
+                "keypoints": [[0, 0], [1000, 2000]],
+                }
+        write_datafile(self.filename, contents)
+        with open(self.filename, "rb") as f:
+            self.assertEqual(f.read(len(MAGIC)), MAGIC)
+        read = read_datafile(self.filename)
+        self.assertEqual(sorted(read), sorted(contents))
+        for key in ["cuts", "matrix", "bytes", "empty"]:
+            self.assertEqual(read[key].dtype, contents[key].dtype)
+            self.assertEqual(read[key].shape, contents[key].shape)
+            self.assertTrue(numpy.array_equal(read[key], contents[key]))
+        self.assertEqual(read["name"], "song.wav")
+        self.assertEqual(read["length"], 1000)
+        self.assertEqual(read["keypoints"], [[0, 0], [1000, 2000]])
+        self.assertEqual(read["matrix"].offset % ALIGNMENT, 0)
+        self.assertFalse(read["matrix"].flags.writeable)
+
+    def test_non_contiguous_array(self):
+        matrix = numpy.arange(20).reshape(4, 5)
+        write_datafile(self.filename, {"columns": matrix[:, ::2]})
+        self.assertTrue(numpy.array_equal(read_datafile(self.filename)["columns"], matrix[:, ::2]))
+
+    def test_text_round_trip(self):
+        contents = {"cuts": [(1, 50, 0.25), (2, 40, 0.5)], "name": "song.wav", "length": 1000}
+        write_datafile(self.filename, contents, binary=False)
+        self.assertEqual(read_datafile(self.filename), contents)
+
+    def test_newer_version_is_rejected(self):
+        write_datafile(self.filename, {"a": numpy.arange(3)})
+        with open(self.filename, "r+b") as f:
+            f.seek(len(MAGIC))
+            f.write("\xff\x00\x00\x00")
+        self.assertRaises(ValueError, read_datafile, self.filename)
+
+    def test_read_rows(self):
+        binary = {"start": numpy.array([1, 2]), "end": numpy.array([50, 40]), "cost": numpy.array([0.25, 0.5])}
+        text = {"cuts": [(1, 50, 0.25), (2, 40, 0.5)]}
+        expected = [(1, 50), (2, 40)]
+        self.assertEqual(read_rows(binary, ["start", "end"], "cuts", [0, 1]), expected)
+        self.assertEqual(read_rows(text, ["start", "end"], "cuts", [0, 1]), expected)
+        self.assertEqual(read_rows(text, ["cost"], "cuts", [2]), [(0.25,), (0.5,)])
+
+if __name__ == "__main__":
+    unittest.main()
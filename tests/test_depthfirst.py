@@ -0,0 +1,36 @@
+import unittest
+
+from algorithms.path.depthfirst import DepthFirstPathAlgorithm, calc_average_segment_length
+from algorithms.path.segment import create_automaton
+from helpers import random_cuts, check_path
+
+def count_acceptable_paths(cuts, source_start, source_end, target_duration):
+    """Return the number of distinct paths that the search accepts, by enumeration."""
+    automaton, start, end = create_automaton(cuts, source_start, source_end)
+    tolerance = calc_average_segment_length(automaton) / 2.0
+    def count(segment, duration):
+        ret_val = 1 if segment == end and abs(duration - target_duration) < tolerance else 0
+        if duration < target_duration:
+            ret_val += sum(count(segment[cost], duration + segment[cost].duration) for cost in segment)
+        return ret_val
+    return count(start, start.duration)
+
+class DepthFirstPathAlgorithmTest(unittest.TestCase):
+    def test_path_follows_cuts(self):
+        cuts = random_cuts(30, 50000)
+        algo = DepthFirstPathAlgorithm(num_paths=5)
+        path = algo([0, 50000], [0, 70000], cuts)
+        check_path(self, path, 0, 50000, cuts)
+        self.assertEqual(algo.get_statistics()["considered_paths"], 5)
+
+    def test_paths_are_counted_once_across_rounds(self):
+        # without enough paths, every deeper round finds the paths of the earlier rounds again
+        for seed in range(2):
+            cuts = random_cuts(8, 20000, seed=seed, min_jump=2000)
+            algo = DepthFirstPathAlgorithm(num_paths=100000, deepening_factor=1.1)
+            path = algo([0, 20000], [0, 30000], cuts)
+            check_path(self, path, 0, 20000, cuts)
+            self.assertLessEqual(algo.get_statistics()["considered_paths"], count_acceptable_paths(cuts, 0, 20000, 30000))
+
+if __name__ == "__main__":
+    unittest.main()
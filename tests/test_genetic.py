@@ -0,0 +1,192 @@
+import random
+import unittest
+
+from numpy import asarray, full, zeros
+from numpy.random import RandomState
+
+from algorithms.path.genetic import GeneticPathAlgorithm, CutTable, Population, crossover, remove_random_cuts, insert_random_cut, pad, \
+        migrate
+from helpers import random_cuts
+
+def segments(table, genes):
+    """Return the (start, end) pairs of the segments of the individual with the cut indices ``genes``."""
+    starts = [table.source_start] + [table.cuts[k].end for k in genes]
+    ends = [table.cuts[k].start for k in genes] + [table.source_end]
+    return zip(starts, ends)
+
+def crossover_children(table, genes, other_genes):
+    children = [tuple(genes[:i+1] + other_genes[j:]) for i in range(len(genes)) for j in range(len(other_genes))
+            if table.cuts[genes[i]].end < table.cuts[other_genes[j]].start]
+    return set(children or [tuple(genes)])
+
+def removal_children(table, genes):
+    children = set()
+    for num_cuts in range(1, len(genes) + 1):
+        starts = [table.source_start] + [table.cuts[k].end for k in genes]
+        ends = [table.cuts[k].start for k in genes[num_cuts:]] + [table.source_end]
+        possible = [i for i, (start, end) in enumerate(zip(starts, ends)) if start < end]
+        children.update(tuple(genes[:i] + genes[i+num_cuts:]) for i in possible)
+        if not possible:
+            children.add(tuple(genes))
+    return children
+
+def insertion_children(table, genes):
+    children = [tuple(genes[:i] + [k] + genes[i:]) for i, (start, end) in enumerate(segments(table, genes))
+            for k, cut in enumerate(table.cuts) if start < cut.start and cut.end < end]
+    return set(children or [tuple(genes)])
+
+def rows(genes, lengths):
+    return [tuple(row[:length].tolist()) for row, length in zip(genes, lengths)]
+
+def encode(individuals, width=None):
+    """Return the padded genes and the lengths of the given lists of cut indices."""
+    width = max([len(genes) for genes in individuals] + [width or 0])
+    genes = full((len(individuals), width), -1, dtype=int)
+    for i, individual in enumerate(individuals):
+        genes[i, :len(individual)] = individual
+    return genes, asarray([len(individual) for individual in individuals], dtype=int)
+
+class GeneticOperatorTest(unittest.TestCase):
+    repeats = 400
+
+    def setUp(self):
+        self.table = CutTable(random_cuts(12, 20000, seed=5, min_jump=2000), 0, 20000)
+        # random valid individuals, grown by inserting random cuts
+        rng = random.Random(0)
+        self.individuals = [[]]
+        for i in range(30):
+            children = sorted(insertion_children(self.table, rng.choice(self.individuals)))
+            self.individuals.append(list(rng.choice(children)))
+        self.assertGreater(max(len(genes) for genes in self.individuals), 3)
+
+    def check_operator(self, operator, expected_children, *args):
+        rng = RandomState(1)
+        for genes in self.individuals:
+            many_genes, lengths = encode([genes] * self.repeats, width=len(genes) + 2)
+            new_genes, new_lengths = operator(self.table, many_genes, lengths, *[a[:self.repeats] for a in args] + [rng])
+            self.assertTrue(self.table.is_valid(new_genes, new_lengths).all())
+            expected = expected_children(self.table, genes)
+            # each child is one of the possible ones, and all possible ones occur (there are few enough of them)
+            self.assertEqual(set(rows(new_genes, new_lengths)), expected)
+            for row, length in zip(new_genes, new_lengths):
+                self.assertTrue((row[length:] == -1).all())
+
+    def test_remove_random_cuts(self):
+        self.check_operator(remove_random_cuts, lambda table, genes: removal_children(table, genes) if genes else set([()]))
+
+    def test_insert_random_cut(self):
+        self.check_operator(insert_random_cut, insertion_children)
+
+    def test_crossover(self):
+        rng = RandomState(2)
+        for genes in self.individuals:
+            for other in self.individuals[::3]:
+                first, first_lengths = encode([genes] * self.repeats)
+                second, second_lengths = encode([other] * self.repeats, width=len(other) + 1)
+                children, lengths = crossover(self.table, first, first_lengths, second, second_lengths, rng)
+                self.assertTrue(self.table.is_valid(children, lengths).all())
+                self.assertEqual(set(rows(children, lengths)), crossover_children(self.table, genes, other))
+
+    def test_segment_bounds(self):
+        genes, lengths = encode([[], [0], [2, 5]], width=3)
+        starts, ends = self.table.segment_bounds(genes, lengths)
+        self.assertEqual(starts.shape, (3, 4))
+        for i, individual in enumerate([[], [0], [2, 5]]):
+            expected = segments(self.table, individual)
+            self.assertEqual(zip(starts[i, :len(expected)], ends[i, :len(expected)]), expected)
+            self.assertTrue((starts[i, len(expected):] == 0).all() and (ends[i, len(expected):] == 0).all())
+
+    def test_is_valid_edge_cases(self):
+        # no columns at all, rows without cuts, and a cut that ends right where the next one starts
+        self.assertEqual(self.table.is_valid(zeros((2, 0), dtype=int), zeros(2, dtype=int)).tolist(), [True, True])
+        individuals = [[], [0], [0, 0], [len(self.table) - 1] * 2]
+        genes, lengths = encode(individuals, width=3)
+        self.assertEqual(self.table.is_valid(genes, lengths).tolist(),
+                [all(start < end for start, end in segments(self.table, individual)) for individual in individuals])
+        forward = [k for k, cut in enumerate(self.table.cuts) if cut.start < cut.end][0]
+        self.assertEqual(self.table.is_valid(*encode([[forward, forward]])).tolist(), [False])
+        empty = CutTable([], 0, 1000)
+        self.assertEqual(empty.is_valid(zeros((3, 0), dtype=int), zeros(3, dtype=int)).tolist(), [True] * 3)
+        self.assertEqual([tuple(a.tolist()) for a in empty.evaluate(zeros((1, 0), dtype=int), zeros(1, dtype=int))], [(1000,), (0.0,), (0,)])
+
+class PopulationTest(unittest.TestCase):
+    def setUp(self):
+        self.algo = GeneticPathAlgorithm(random_seed=0)
+        self.table = CutTable(random_cuts(12, 20000, seed=5, min_jump=2000), 0, 20000)
+        population = Population(self.algo, self.table, 30000, *encode([[]] * 5))
+        for i in range(3):
+            population = population + population.breed(50, RandomState(i))
+        self.population = population
+
+    def test_costs_match_paths(self):
+        for i in range(len(self.population)):
+            self.assertAlmostEqual(self.population.individual(i).cost(), self.population.costs[i], places=6)
+
+    def test_select(self):
+        individuals = rows(self.population.genes, self.population.lengths)
+        self.assertGreater(len(individuals), len(set(individuals)))
+        # the first occurrence of each individual, sorted by cost and then by position
+        first = {}
+        for i, individual in enumerate(individuals):
+            first.setdefault(individual, i)
+        expected = sorted(first.values(), key=lambda i: (self.population.costs[i], i))
+        for num_individuals in [1, 5, len(expected), len(expected) + 10]:
+            selected = self.population.select(num_individuals)
+            self.assertEqual(rows(selected.genes, selected.lengths), [individuals[i] for i in expected[:num_individuals]])
+            self.assertEqual(selected.costs.tolist(), [self.population.costs[i] for i in expected[:num_individuals]])
+
+    def test_select_without_columns(self):
+        population = Population(self.algo, self.table, 30000, *encode([[]] * 4))
+        selected = population.select(3)
+        self.assertEqual(len(selected), 1)
+        self.assertEqual(selected.genes.shape, (1, 0))
+
+    def test_breed_keeps_individuals_valid(self):
+        children = self.population.breed(500, RandomState(7))
+        self.assertEqual(len(children), 500)
+        self.assertTrue(self.table.is_valid(children.genes, children.lengths).all())
+        self.assertEqual(pad(children.genes, children.genes.shape[1] + 2).shape[1], children.genes.shape[1] + 2)
+
+class IslandTest(unittest.TestCase):
+    def setUp(self):
+        self.cuts = random_cuts(60, 100000, seed=6)
+
+    def find_path(self, **parameters):
+        algo = GeneticPathAlgorithm(num_individuals=30, num_children=30, num_generations=6, random_seed=3, migration_interval=2,
+                num_migrants=3, **parameters)
+        algo.report = lambda generation, population: None
+        return algo.find_path(0, 100000, 150000, self.cuts)
+
+    def test_result_does_not_depend_on_workers(self):
+        for num_islands in [1, 3]:
+            paths = [self.find_path(num_islands=num_islands, num_workers=num_workers).segments for num_workers in [1, 2, 3]]
+            self.assertEqual(paths[1], paths[0])
+            self.assertEqual(paths[2], paths[0])
+
+    def test_migration(self):
+        algo = GeneticPathAlgorithm(num_individuals=4)
+        table = CutTable(self.cuts, 0, 100000)
+        islands = []
+        for i in range(3):
+            population = Population(algo, table, 150000, *encode([[]]))
+            islands.append((population + population.breed(20, RandomState(i))).select(4))
+        migrated = migrate(islands, 2)
+        changed = False
+        for i, island in enumerate(migrated):
+            # the best distinct individuals of the island and the two best of the island before it, in the ring
+            candidates = zip(rows(islands[i].genes, islands[i].lengths) + rows(islands[i-1].genes[:2], islands[i-1].lengths[:2]),
+                    islands[i].costs.tolist() + islands[i-1].costs[:2].tolist())
+            best = []
+            for individual, cost in sorted(candidates, key=lambda candidate: candidate[1]):
+                if individual not in [b[0] for b in best]:
+                    best.append((individual, cost))
+            self.assertEqual(zip(rows(island.genes, island.lengths), island.costs.tolist()), best[:4])
+            changed |= rows(island.genes, island.lengths) != rows(islands[i].genes, islands[i].lengths)
+        self.assertTrue(changed)
+
+    def test_parameters_are_checked(self):
+        self.assertRaises(ValueError, GeneticPathAlgorithm, migration_interval=0)
+        self.assertRaises(ValueError, GeneticPathAlgorithm, num_islands=0)
+
+if __name__ == "__main__":
+    unittest.main()
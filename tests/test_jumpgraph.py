@@ -0,0 +1,60 @@
+import unittest
+
+from numpy import inf
+
+from algorithms.path.jumpgraph import JumpGraph, duration_bounds
+from helpers import random_cuts
+
+def brute_force_bounds(graph, max_duration):
+    """Return the minimum and maximum (up to ``max_duration``) duration of the paths from each node to a terminal node, by relaxation and
+    enumeration."""
+    shortest = [graph.durations[node] if graph.terminal[node] else inf for node in range(len(graph))]
+    for i in range(len(graph)):
+        for node in range(len(graph)):
+            for successor in graph.successors(node)[0]:
+                shortest[node] = min(shortest[node], graph.durations[node] + shortest[successor])
+    memo = {}
+    def longest(node, elapsed):
+        # longest completion of a path whose duration up to and including node is elapsed, capped at max_duration
+        if shortest[node] == inf:
+            return -inf
+        if elapsed >= max_duration:
+            return max_duration
+        if (node, elapsed) not in memo:
+            memo[node, elapsed] = max([elapsed if graph.terminal[node] else -inf] +
+                    [longest(successor, elapsed + graph.durations[successor]) for successor in graph.successors(node)[0]])
+        return memo[node, elapsed]
+    return [(shortest[node], longest(node, graph.durations[node])) for node in range(len(graph))]
+
+class JumpGraphTest(unittest.TestCase):
+    def test_edges_are_cuts_or_playback(self):
+        cuts = random_cuts(20, 20000)
+        graph = JumpGraph(cuts, 0, 20000)
+        jumps = dict(((cut.start, cut.end), cut.cost) for cut in cuts)
+        for node in range(len(graph)):
+            for target, cost in zip(*graph.successors(node)):
+                if graph.starts[target] == graph.ends[node]:
+                    self.assertEqual(cost, 0)
+                else:
+                    self.assertEqual(cost, jumps[graph.ends[node], graph.starts[target]])
+        self.assertEqual(graph.starts[graph.start], 0)
+        self.assertTrue((graph.ends[graph.terminal] == 20000).all())
+
+    def test_bounds_match_enumeration(self):
+        for seed in range(5):
+            cuts = random_cuts(6, 10000, seed=seed, min_jump=2000)
+            graph = JumpGraph(cuts, 0, 10000)
+            graph.compute_bounds(20000)
+            for node, (shortest, longest) in enumerate(brute_force_bounds(graph, 20000)):
+                self.assertEqual(graph.min_remaining[node], shortest)
+                self.assertEqual(graph.max_remaining[node], longest)
+
+    def test_duration_bounds_with_loop(self):
+        # 0 -> 1 -> 2 (terminal), 1 -> 1 loops, 3 cannot reach the end
+        offsets, targets = [0, 1, 3, 3, 3], [1, 1, 2]
+        min_remaining, max_remaining = duration_bounds(offsets, targets, [1, 2, 3, 4], [False, False, True, False], 100)
+        self.assertEqual(min_remaining.tolist(), [6, 5, 3, inf])
+        self.assertEqual(max_remaining.tolist(), [100, 100, 3, -inf])
+
+if __name__ == "__main__":
+    unittest.main()
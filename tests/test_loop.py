@@ -0,0 +1,59 @@
+import unittest
+
+from numpy.random import RandomState
+
+from algorithms.repetition import RepetitionIndex
+from algorithms.path.loop import LoopPathAlgorithm, LoopPath, PathNotMatchingToLoopError, dijkstra
+from helpers import random_cuts
+
+def removable_pieces(path):
+    """Return ``(start_index, end_index, duration, old_cost, new_cost)`` of the removable pieces of ``path``, by trying every pair."""
+    ret_val = []
+    for i in range(len(path.segments)):
+        for j in range(i + 1, len(path.segments) - 1):
+            for cost in path.segments[i]:
+                if path.segments[i][cost].start == path.segments[j+1].start:
+                    ret_val.append((i, j + 1, sum(s.duration for s in path.segments[i+1:j+1]), round(sum(path.cut_cost[i+1:j+1]), 9), cost))
+    return sorted(ret_val)
+
+class LoopPathTest(unittest.TestCase):
+    def setUp(self):
+        self.algo = LoopPathAlgorithm(random_seed=0)
+        self.cuts = random_cuts(20, 40000, seed=4)
+        automaton, start_segment, end_segment, graph, self.loops = self.algo.get_loop_table(0, 40000, self.cuts)
+        self.path = LoopPath(self.algo, dijkstra(graph, start_segment, end_segment), 80000, False)
+
+    def check_statistics(self, path):
+        self.assertTrue(path.is_valid())
+        self.assertEqual(path.duration, sum(segment.duration for segment in path.segments))
+        self.assertAlmostEqual(path._cut_cost_sum, sum(path.cut_cost))
+        self.assertEqual(path.repetitions.counts, RepetitionIndex(path.segments).counts)
+
+    def test_edits_keep_statistics(self):
+        rng = RandomState(0)
+        path = self.path
+        for i in range(30):
+            pieces = path.get_removable_pieces()
+            if pieces and rng.rand() < 0.3:
+                path = path.remove_piece(pieces[rng.randint(len(pieces))])
+            else:
+                try:
+                    path = path.integrate_loop(self.loops[rng.randint(len(self.loops))], rng)
+                except PathNotMatchingToLoopError:
+                    continue
+            self.check_statistics(path)
+            self.assertEqual(sorted((p.start_index, p.end_index, p.duration, round(p.old_cost, 9), p.new_cost) for p in path.get_removable_pieces()),
+                    removable_pieces(path))
+
+class LoopPathAlgorithmTest(unittest.TestCase):
+    def test_result_does_not_depend_on_workers(self):
+        cuts = random_cuts(20, 40000, seed=4)
+        paths = []
+        for num_workers in [1, 2, 3]:
+            algo = LoopPathAlgorithm(random_seed=5, iterations=5, num_workers=num_workers)
+            paths.append(algo.find_path(0, 40000, 80000, cuts).segments)
+        self.assertEqual(paths[1], paths[0])
+        self.assertEqual(paths[2], paths[0])
+
+if __name__ == "__main__":
+    unittest.main()
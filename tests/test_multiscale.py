@@ -0,0 +1,71 @@
+import unittest
+
+from algorithms.algorithm import Path, Segment
+from algorithms.path.greedy import GreedyPathAlgorithm
+from algorithms.path.multiscale import MultiScalePathAlgorithm, cluster_cuts, jumps
+from helpers import random_cuts, check_path
+
+class RecordingPathAlgorithm(GreedyPathAlgorithm):
+    """A ``GreedyPathAlgorithm`` that remembers the cuts and the path of its last piece."""
+
+    def find_path(self, source_start, source_end, target_duration, cuts):
+        self.cuts = cuts
+        self.path = GreedyPathAlgorithm.find_path(self, source_start, source_end, target_duration, cuts)
+        return self.path
+
+class NoPathAlgorithm(GreedyPathAlgorithm):
+    """A path algorithm that never finds a path, like a ``DepthFirstPathAlgorithm`` that gives up."""
+
+    def find_path(self, source_start, source_end, target_duration, cuts):
+        return None
+
+class MultiScalePathAlgorithmTest(unittest.TestCase):
+    def setUp(self):
+        self.cuts = random_cuts(300, 200000, seed=2)
+        self.algo = MultiScalePathAlgorithm(cluster_size=20000, min_cuts=10)
+        self.algo.coarse_algorithm = RecordingPathAlgorithm()
+        self.algo.fine_algorithm = RecordingPathAlgorithm()
+
+    def test_cluster_cuts(self):
+        clusters = cluster_cuts(self.cuts, 20000)
+        self.assertEqual(sorted(cut for members in clusters.itervalues() for cut in members), sorted(self.cuts))
+        for (i, j), members in clusters.iteritems():
+            self.assertEqual([cut.cost for cut in members], sorted(cut.cost for cut in members))
+            for cut in members:
+                self.assertEqual((cut.start // 20000, cut.end // 20000), (i, j))
+
+    def test_fine_cuts_contain_coarse_jumps(self):
+        path = self.algo.find_path(0, 200000, 400000, self.cuts)
+        coarse, fine = self.algo.coarse_algorithm, self.algo.fine_algorithm
+        self.assertTrue(jumps(coarse.path))
+        fine_jumps = set((cut.start, cut.end) for cut in fine.cuts)
+        for jump in jumps(coarse.path):
+            self.assertIn(jump, fine_jumps)
+        self.assertLess(len(fine.cuts), len(self.cuts))
+        self.assertIs(path, fine.path)
+        check_path(self, path, 0, 200000, self.cuts)
+
+    def test_corridor_cuts(self):
+        cut = self.cuts[0]
+        coarse_path = Path([Segment(0, cut.start), Segment(cut.end, 200000)])
+        for corridor in range(3):
+            self.algo.corridor = corridor
+            expected = [c for c in self.cuts if abs(c.start // 20000 - cut.start // 20000) <= corridor
+                    and abs(c.end // 20000 - cut.end // 20000) <= corridor]
+            self.assertEqual(self.algo.corridor_cuts(self.cuts, coarse_path), expected)
+
+    def test_without_coarse_path(self):
+        self.algo.coarse_algorithm = NoPathAlgorithm()
+        path = self.algo.find_path(0, 200000, 400000, self.cuts)
+        self.assertIs(self.algo.fine_algorithm.cuts, self.cuts)
+        check_path(self, path, 0, 200000, self.cuts)
+
+    def test_few_cuts(self):
+        cuts = self.cuts[:10]
+        path = self.algo.find_path(0, 200000, 400000, cuts)
+        self.assertFalse(hasattr(self.algo.coarse_algorithm, "cuts"))
+        self.assertIs(self.algo.fine_algorithm.cuts, cuts)
+        check_path(self, path, 0, 200000, cuts)
+
+if __name__ == "__main__":
+    unittest.main()
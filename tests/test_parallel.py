@@ -0,0 +1,91 @@
+import unittest
+
+from algorithms.algorithm import PiecewisePathAlgorithm, Path, Segment, nominal_pieces
+from algorithms.path.beam import BeamPathAlgorithm
+from algorithms.path.composite import create_path_algorithm
+from algorithms.path.parallel import ParallelPiecesPathAlgorithm
+from helpers import random_cuts, check_path
+
+class OvershootingPathAlgorithm(PiecewisePathAlgorithm):
+    """Plays straight on for 1000 samples longer than the target duration of each piece, and records the target durations."""
+
+    def __init__(self):
+        self.solved = []
+
+    def find_path(self, source_start, source_end, target_duration, cuts):
+        self.solved.append(target_duration)
+        return Path([Segment(source_start, source_start + target_duration + 1000)])
+
+class CreatePathAlgorithmTest(unittest.TestCase):
+    def test_spec(self):
+        algo = create_path_algorithm("BeamPathAlgorithm beam_width=7 cut_penalty=2.5")
+        self.assertIsInstance(algo, BeamPathAlgorithm)
+        self.assertEqual(algo.beam_width, 7)
+        self.assertEqual(algo.cut_penalty, 2.5)
+        self.assertEqual(algo.max_steps, BeamPathAlgorithm().max_steps)
+        algo = create_path_algorithm("  ParallelPiecesPathAlgorithm  ")
+        self.assertIsInstance(algo.piecewise, create_path_algorithm("GreedyPathAlgorithm").__class__)
+
+    def test_errors(self):
+        self.assertRaises(ValueError, create_path_algorithm, "")
+        self.assertRaises(ValueError, create_path_algorithm, "NoSuchPathAlgorithm")
+        self.assertRaises(TypeError, create_path_algorithm, "BeamPathAlgorithm no_such_parameter=1")
+        self.assertRaises(ValueError, ParallelPiecesPathAlgorithm, "StreamingPathAlgorithm")
+
+    def test_delegated_properties(self):
+        algo = ParallelPiecesPathAlgorithm("BeamPathAlgorithm")
+        self.assertEqual(algo.drift_tolerance, 0)
+        self.assertIsNone(algo.piece_cache)
+        warm_start = Path([Segment(0, 1000)])
+        algo.drift_tolerance, algo.warm_start = 4410, warm_start
+        self.assertEqual(algo.piecewise.drift_tolerance, 4410)
+        self.assertIs(algo.piecewise.warm_start, warm_start)
+
+class ReconcileTest(unittest.TestCase):
+    def reconcile(self, drift_tolerance):
+        algo = OvershootingPathAlgorithm()
+        algo.drift_tolerance = drift_tolerance
+        pieces = nominal_pieces([0, 100000, 200000, 300000, 400000], [0, 10000, 20000, 30000, 40000])
+        piece_paths = [algo.find_path(start, end, duration, []) for start, end, duration in pieces]
+        path, num_solved_again = algo.reconcile(pieces, piece_paths, [0, 10000, 20000, 30000, 40000], [])
+        return path, num_solved_again, algo.solved[len(pieces):]
+
+    def test_pieces_are_solved_again_beyond_the_tolerance(self):
+        # deviations of 1000, 2000 and 3000 samples before the pieces; the last piece makes up for any of them
+        path, num_solved_again, solved = self.reconcile(2500)
+        self.assertEqual((num_solved_again, solved, path.duration), (1, [7000], 41000))
+        path, num_solved_again, solved = self.reconcile(1500)
+        self.assertEqual((num_solved_again, solved, path.duration), (2, [8000, 9000], 41000))
+        path, num_solved_again, solved = self.reconcile(0)
+        self.assertEqual((num_solved_again, solved, path.duration), (3, [9000, 9000, 9000], 41000))
+
+    def test_lazy_reconcile_solves_each_piece_once(self):
+        algo = OvershootingPathAlgorithm()
+        algo.drift_tolerance = 1500
+        path = algo([0, 100000, 200000, 300000, 400000], [0, 10000, 20000, 30000, 40000], [])
+        self.assertEqual(algo.solved, [10000, 10000, 8000, 9000])
+        self.assertEqual(path.duration, 41000)
+
+class ParallelPiecesTest(unittest.TestCase):
+    def setUp(self):
+        self.cuts = random_cuts(200, 400000)
+        self.source_keypoints = range(0, 400001, 50000)
+        self.target_keypoints = [int(1.3 * source) for source in self.source_keypoints]
+
+    def test_same_path_as_sequential(self):
+        for drift_tolerance in [0, 4410]:
+            sequential = BeamPathAlgorithm(beam_width=10)
+            sequential.drift_tolerance = drift_tolerance
+            expected = sequential(self.source_keypoints, self.target_keypoints, self.cuts)
+            for num_workers in [1, 2]:
+                algo = ParallelPiecesPathAlgorithm("BeamPathAlgorithm beam_width=10", num_workers=num_workers)
+                algo.drift_tolerance = drift_tolerance
+                path = algo(self.source_keypoints, self.target_keypoints, self.cuts)
+                check_path(self, path, 0, 400000, self.cuts)
+                self.assertEqual(path.segments, expected.segments)
+                statistics = algo.get_statistics()
+                self.assertEqual(statistics["pieces"], len(self.source_keypoints) - 1)
+                self.assertGreaterEqual(statistics["solved_again"], 1 if drift_tolerance else 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from algorithms.algorithm import Path
+from algorithms.cache import ArtifactCache
+from algorithms.path.beam import BeamPathAlgorithm
+from helpers import random_cuts, check_path
+
+class CountingBeamPathAlgorithm(BeamPathAlgorithm):
+    """Beam search that counts the pieces it actually solves."""
+
+    def find_path(self, source_start, source_end, target_duration, cuts):
+        self.solved.append((source_start, source_end, target_duration))
+        return super(CountingBeamPathAlgorithm, self).find_path(source_start, source_end, target_duration, cuts)
+
+class PieceCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cuts = random_cuts(200, 400000)
+        self.source_keypoints = range(0, 400001, 50000)
+        self.target_keypoints = [int(1.2 * source) for source in self.source_keypoints]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def solve(self, target_keypoints, drift_tolerance=4410, piece_cache=True):
+        algo = CountingBeamPathAlgorithm(beam_width=10)
+        algo.piece_cache = ArtifactCache(self.directory) if piece_cache else None
+        algo.drift_tolerance = drift_tolerance
+        algo.solved = []
+        path = algo(self.source_keypoints, target_keypoints, self.cuts)
+        check_path(self, path, self.source_keypoints[0], self.source_keypoints[-1], self.cuts)
+        return path, algo.solved
+
+    def test_cache_does_not_change_the_path(self):
+        for drift_tolerance in [0, 4410]:
+            path, solved = self.solve(self.target_keypoints, drift_tolerance, piece_cache=False)
+            cached, solved = self.solve(self.target_keypoints, drift_tolerance)
+            self.assertEqual(cached.segments, path.segments)
+
+    def test_without_tolerance_pieces_make_up_for_deviations(self):
+        algo = BeamPathAlgorithm(beam_width=10)
+        path = Path()
+        for source_start, source_end, target_end in zip(self.source_keypoints, self.source_keypoints[1:], self.target_keypoints[1:]):
+            path += algo.find_path(source_start, source_end, target_end - path.duration, self.cuts)
+        self.assertEqual(self.solve(self.target_keypoints, 0, piece_cache=False)[0].segments, path.segments)
+
+    def test_second_run_takes_all_pieces_from_cache(self):
+        path, solved = self.solve(self.target_keypoints)
+        self.assertEqual(len(solved), len(self.source_keypoints) - 1)
+        again, solved = self.solve(self.target_keypoints)
+        self.assertEqual(solved, [])
+        self.assertEqual(again.segments, path.segments)
+
+    def test_pieces_are_evicted(self):
+        path, solved = self.solve(self.target_keypoints)
+        entry_size = max(os.stat(os.path.join(self.directory, name)).st_size for name in os.listdir(self.directory))
+        algo = BeamPathAlgorithm(beam_width=10)
+        algo.piece_cache = ArtifactCache(self.directory, 3 * entry_size)
+        algo(self.source_keypoints, self.target_keypoints, self.cuts)
+        self.assertLessEqual(len(os.listdir(self.directory)), 3)
+
+    def test_moving_a_keypoint_reuses_later_pieces(self):
+        path, solved = self.solve(self.target_keypoints)
+        target_keypoints = list(self.target_keypoints)
+        target_keypoints[2] += 3000
+        moved, solved = self.solve(target_keypoints)
+        # only the two pieces next to the moved keypoint have new nominal durations
+        nominal = [(start, end) for start, end, duration in solved
+                if duration == target_keypoints[self.source_keypoints.index(end)] - target_keypoints[self.source_keypoints.index(start)]]
+        self.assertEqual(nominal, [(50000, 100000), (100000, 150000)])
+        self.assertLess(len(solved), len(self.source_keypoints) - 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+
+from algorithms.path.portfolio import PortfolioPathAlgorithm
+from helpers import random_cuts, check_path
+
+class PortfolioPathAlgorithmTest(unittest.TestCase):
+    def test_same_algorithm_twice(self):
+        cuts = random_cuts(50, 100000)
+        algo = PortfolioPathAlgorithm("BeamPathAlgorithm beam_width=5; BeamPathAlgorithm beam_width=5; BeamPathAlgorithm beam_width=20",
+                deadline=60)
+        path = algo([0, 100000], [0, 150000], cuts)
+        check_path(self, path, 0, 100000, cuts)
+        statistics = algo.get_statistics()
+        self.assertEqual(sorted(statistics), ["0:BeamPathAlgorithm beam_width=5", "1:BeamPathAlgorithm beam_width=5",
+            "2:BeamPathAlgorithm beam_width=20", "best"])
+        for key in algo.keys:
+            self.assertEqual(statistics[key]["status"], "finished")
+        self.assertEqual(statistics["0:BeamPathAlgorithm beam_width=5"]["cost"], statistics["1:BeamPathAlgorithm beam_width=5"]["cost"])
+        self.assertEqual(statistics[statistics["best"]]["cost"], min(statistics[key]["cost"] for key in algo.keys))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import time
+import unittest
+from threading import Thread
+
+from algorithms.algorithm import Cut, Keypoint
+from algorithms.path.priority import PriorityPath, CutIndex, MaxRuntimePathAlgorithm, MaxCostPathAlgorithm, MaxNumCutsPathAlgorithm
+from helpers import random_cuts
+
+def extensions(index, path, max_num_cuts):
+    """Generate all paths that extend ``path`` by one up to ``max_num_cuts`` (any number if ``None``) cuts."""
+    if max_num_cuts == 0:
+        return
+    for cut in index.candidates(path):
+        extended = path + cut
+        yield extended
+        for further in extensions(index, extended, None if max_num_cuts is None else max_num_cuts - 1):
+            yield further
+
+def forward_cuts(num_cuts, length, seed):
+    """Return random cuts that all jump forward."""
+    return [Cut(min(cut.start, cut.end), max(cut.start, cut.end), cut.cost) for cut in random_cuts(num_cuts, length, seed, min_jump=100)]
+
+class CutIndexTest(unittest.TestCase):
+    def check_lower_bounds(self, cuts, target_duration, num_cuts, enumerated_num_cuts):
+        keypoints = [Keypoint(0, 0), Keypoint(10000, target_duration)]
+        index = CutIndex(keypoints, cuts)
+        paths = [PriorityPath(keypoints)] + list(extensions(index, PriorityPath(keypoints), 2))
+        for path in paths:
+            best = min([extended.cost() for extended in extensions(index, path, enumerated_num_cuts)] + [float("inf")])
+            self.assertLessEqual(index.lower_bound(path, num_cuts), best)
+
+    def test_lower_bound_without_backward_jumps(self):
+        for seed in range(3):
+            for target_duration in (2000, 6000, 9000, 12000):
+                self.check_lower_bounds(forward_cuts(8, 10000, seed), target_duration, None, None)
+                self.check_lower_bounds(forward_cuts(8, 10000, seed), target_duration, 2, 2)
+
+    def test_lower_bound_with_backward_jumps(self):
+        for seed in range(3):
+            for target_duration in (2000, 9000, 15000, 30000):
+                self.check_lower_bounds(random_cuts(6, 10000, seed, min_jump=100), target_duration, 2, 2)
+                # the best of the paths with at most 3 more cuts is not lower than the best of all paths
+                self.check_lower_bounds(random_cuts(6, 10000, seed, min_jump=100), target_duration, None, 3)
+
+    def test_lower_bound_prunes_with_backward_jumps(self):
+        # after the backward jump, the first 8000 samples are kept, which is longer than the target whatever cuts follow
+        cuts = [Cut(8000, 1000, 0.0), Cut(2000, 9000, 0.0), Cut(3000, 4000, 0.0)]
+        keypoints = [Keypoint(0, 0), Keypoint(10000, 5000)]
+        path = PriorityPath(keypoints) + cuts[0]
+        self.assertEqual(CutIndex(keypoints, cuts).lower_bound(path), 3000)
+
+class PriorityPathAlgorithmTest(unittest.TestCase):
+    def run_with_timeout(self, function, timeout):
+        result = []
+        thread = Thread(target=lambda: result.append(function()))
+        thread.daemon = True
+        thread.start()
+        thread.join(timeout)
+        self.assertFalse(thread.is_alive(), "search did not finish within %g s" % timeout)
+        return result[0]
+
+    def test_search_ends_when_everything_is_pruned(self):
+        # the path without cuts has cost 0 already, so all of its extensions are pruned
+        cuts = random_cuts(50, 100000)
+        start_time = time.time()
+        path = self.run_with_timeout(lambda: MaxRuntimePathAlgorithm(max_runtime=30).find_path(0, 100000, 100000, cuts), 10)
+        self.assertEqual(path.cost(), 0)
+        self.assertLess(time.time() - start_time, 10)
+        path = self.run_with_timeout(lambda: MaxCostPathAlgorithm(max_cost=-1).find_path(0, 100000, 100000, cuts), 10)
+        self.assertEqual(path.cost(), 0)
+
+    def test_max_num_cuts_matches_enumeration(self):
+        cuts = forward_cuts(10, 10000, 1)
+        keypoints = [Keypoint(0, 0), Keypoint(10000, 6000)]
+        index = CutIndex(keypoints, cuts)
+        best = min(path.cost() for path in [PriorityPath(keypoints)] + list(extensions(index, PriorityPath(keypoints), 3)))
+        self.assertEqual(MaxNumCutsPathAlgorithm(max_num_cuts=3).find_path(0, 10000, 6000, cuts).cost(), best)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+from numpy.random import RandomState
+from scipy.io import wavfile
+
+from algorithms.algorithm import Segment
+from algorithms.rendering import PathView, write_wav, fade_in_window
+
+def synthesize(data, segments, crossfade=0):
+    """Concatenate the segments of ``data``, then crossfade each jump sample by sample."""
+    ret_val = numpy.concatenate([data[segment.start:segment.end] for segment in segments]).astype(float)
+    half = crossfade // 2
+    position = 0
+    for a, b in zip(segments, segments[1:]):
+        position += a.duration
+        h = min(half, a.duration // 2, b.duration // 2, len(data) - a.end, b.start)
+        if a.end == b.start or h <= 0:
+            continue
+        window = fade_in_window(2 * half)
+        for k in range(2 * h):
+            weight = window[k * 2 * half // (2 * h)]
+            ret_val[position - h + k] = (1 - weight) * data[a.end - h + k] + weight * data[b.start - h + k]
+    return numpy.round(ret_val).astype(data.dtype) if data.dtype.kind in "iu" else ret_val.astype(data.dtype)
+
+class PathViewTest(unittest.TestCase):
+    def setUp(self):
+        rng = RandomState(0)
+        self.data = rng.randint(-20000, 20000, (5000, 2)).astype(numpy.int16)
+        # jumps of all kinds, segments shorter than a fade, and jumps near both ends of the source
+        self.segments = [Segment(100, 900), Segment(300, 310), Segment(2000, 2600), Segment(4990, 5000), Segment(0, 700),
+                Segment(700, 1500), Segment(20, 1020)]
+        self.rng = rng
+
+    def test_slices_match_synthesized(self):
+        for crossfade in [0, 1, 64, 301]:
+            view = PathView(self.data, self.segments, crossfade)
+            expected = synthesize(self.data, self.segments, crossfade)
+            self.assertEqual(view.shape, expected.shape)
+            self.assertTrue(numpy.array_equal(numpy.asarray(view), expected))
+            for i in range(50):
+                start, stop = self.rng.randint(-len(view) - 100, len(view) + 100, 2)
+                step = self.rng.choice([1, 2, 7, -1, -3])
+                key = slice(start, stop, step)
+                self.assertTrue(numpy.array_equal(view[key], expected[key]), "%r with crossfade %d" % (key, crossfade))
+                self.assertTrue(numpy.array_equal(view[key, 1], expected[key, 1]))
+            for index in [0, 1, 799, 800, len(view) - 1, -1, -len(view)]:
+                self.assertTrue(numpy.array_equal(view[index], expected[index]))
+                self.assertEqual(view[index, 0], expected[index, 0])
+            self.assertRaises(IndexError, view.__getitem__, len(view))
+            self.assertRaises(IndexError, view.__getitem__, -len(view) - 1)
+
+    def test_chunks_match_synthesized(self):
+        view = PathView(self.data, self.segments, 128)
+        for chunk_size in [1, 97, 1000, 10000]:
+            rendered = numpy.concatenate([chunk.copy() for chunk in view.chunks(chunk_size)])
+            self.assertTrue(numpy.array_equal(rendered, synthesize(self.data, self.segments, 128)))
+
+    def test_fades_keep_continuations(self):
+        view = PathView(self.data, [Segment(0, 1000), Segment(1000, 2000)], 500)
+        self.assertTrue(numpy.array_equal(view[:], self.data[:2000]))
+
+class WriteWavTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_matches_scipy(self):
+        rng = RandomState(1)
+        data = rng.randint(-20000, 20000, (3000, 2)).astype(numpy.int16)
+        filename, reference = os.path.join(self.directory, "out.wav"), os.path.join(self.directory, "reference.wav")
+        write_wav(filename, 44100, data, chunk_size=1000)
+        wavfile.write(reference, 44100, data)
+        with open(filename, "rb") as f, open(reference, "rb") as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_view_round_trip(self):
+        rng = RandomState(2)
+        segments = [Segment(0, 1500), Segment(200, 1700), Segment(1000, 1999)]
+        for data in [rng.randint(-20000, 20000, (2000, 2)).astype(numpy.int16), rng.rand(2000).astype(numpy.float32)]:
+            view = PathView(data, segments, 100)
+            filename = os.path.join(self.directory, "view.wav")
+            write_wav(filename, 22050, view, chunk_size=333)
+            rate, read = wavfile.read(filename)
+            self.assertEqual(rate, 22050)
+            self.assertEqual(read.dtype, data.dtype)
+            self.assertTrue(numpy.array_equal(read, view[:]))
+
+if __name__ == "__main__":
+    unittest.main()
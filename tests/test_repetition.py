@@ -0,0 +1,78 @@
+import unittest
+from collections import Counter
+from math import log
+
+from numpy.random import RandomState
+
+from algorithms.algorithm import Segment, Keypoint, Cut
+from algorithms.repetition import RepetitionIndex
+from algorithms.path.greedy import CostAwarePath, GreedyPathAlgorithm
+
+def multiplicity(segments):
+    return reduce(lambda a, b: a * b, Counter(segments).values(), 1)
+
+def overlap(segments):
+    return sum(max(0, min(a.end, b.end) - max(a.start, b.start)) for i, a in enumerate(segments) for j, b in enumerate(segments) if i != j)
+
+def random_segment(rng, length=50):
+    start = rng.randint(length)
+    return Segment(start, start + rng.randint(length // 2))
+
+class RepetitionIndexTest(unittest.TestCase):
+    def test_matches_pairwise_computation(self):
+        rng = RandomState(0)
+        for round in range(20):
+            segments = []
+            index = RepetitionIndex()
+            for step in range(40):
+                if segments and rng.rand() < 0.3:
+                    segment = segments.pop(rng.randint(len(segments)))
+                    index.remove(segment)
+                else:
+                    # reuse segments, so that there are repetitions
+                    segment = segments[rng.randint(len(segments))] if segments and rng.rand() < 0.3 else random_segment(rng)
+                    segments.append(segment)
+                    index.insert(segment)
+                if rng.rand() < 0.3: # build the trees at random points in between
+                    self.assertEqual(index.overlap(), overlap(segments))
+                self.assertEqual(index.multiplicity(), multiplicity(segments))
+                self.assertAlmostEqual(index.log_multiplicity, log(multiplicity(segments)))
+                self.assertEqual(len(index), len(segments))
+            self.assertEqual(index.overlap(), overlap(segments))
+            copy = index.copy()
+            copy.insert(segments[0])
+            self.assertEqual(index.overlap(), overlap(segments))
+            self.assertEqual(copy.overlap(), overlap(segments + segments[:1]))
+
+    def test_remove_missing_segment(self):
+        index = RepetitionIndex([Segment(0, 10)])
+        self.assertRaises(ValueError, index.remove, Segment(0, 5))
+
+class CostAwarePathTest(unittest.TestCase):
+    def expected_cost(self, algo, path):
+        duration = sum(segment.duration for segment in path.segments)
+        return algo.duration_penalty * (duration - 500) ** 2 + algo.cut_penalty * path.cut_cost + \
+                algo.repetition_penalty * (multiplicity(path.segments) - 1)
+
+    def test_cost_follows_edits(self):
+        rng = RandomState(1)
+        algo = GreedyPathAlgorithm()
+        path = CostAwarePath(algo, [], [Keypoint(0, 0), Keypoint(100, 500)])
+        paths = [path]
+        for step in range(60):
+            path = paths[rng.randint(len(paths))].copy()
+            if rng.rand() < 0.2 and len(path.cuts) > 1:
+                try:
+                    path.remove_cuts(0, 1)
+                except ValueError:
+                    continue
+            elif rng.rand() < 0.1:
+                path.segments = path.segments[::-1]
+            else:
+                path.add_segment(rng.rand(), random_segment(rng))
+            paths.append(path)
+            for other in paths:
+                self.assertAlmostEqual(other.cost(), self.expected_cost(algo, other), places=6)
+
+if __name__ == "__main__":
+    unittest.main()
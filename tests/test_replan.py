@@ -0,0 +1,75 @@
+import time
+import unittest
+
+from algorithms.algorithm import Path, Segment
+from algorithms.path.beam import BeamPathAlgorithm
+from algorithms.replan import Replanner
+from helpers import random_cuts
+
+class StraightPathAlgorithm(object):
+    """Play straight on from the first source keypoint, after sleeping for ``delay`` seconds."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def __call__(self, source_keypoints, target_keypoints, cuts):
+        time.sleep(self.delay)
+        return Path([Segment(source_keypoints[0], source_keypoints[0] + target_keypoints[-1] - target_keypoints[0])])
+
+class ReplannerTest(unittest.TestCase):
+    rate = 44100
+    position = 100000
+
+    def setUp(self):
+        self.cuts = random_cuts(200, 400000, seed=3, min_jump=20000)
+        self.path = BeamPathAlgorithm(beam_width=10)([0, 400000], [0, 600000], self.cuts)
+        self.replanner = None
+
+    def tearDown(self):
+        if self.replanner is not None:
+            self.replanner.close()
+
+    def replan(self):
+        """Re-plan at ``position``, check the result, and return the re-planned segments or ``None`` if the path has been kept."""
+        start_time = time.time()
+        new_path, commit_time = self.replanner.replan(self.path, self.position, [0, 400000], [0, 500000])
+        elapsed = time.time() - start_time
+        self.assertLess(elapsed, self.replanner.latency + 0.03)
+        self.assertGreaterEqual(commit_time, self.position + elapsed * self.rate)
+        if new_path is self.path:
+            self.assertEqual(commit_time, self.path.duration)
+            return None
+        num_segments, duration = self.replanner.commit_point(self.path, self.position)
+        self.assertEqual(commit_time, duration)
+        self.assertEqual(new_path.segments[:num_segments], self.path.segments[:num_segments])
+        self.assertEqual(new_path.segments[num_segments].start, self.path.segments[num_segments-1].end)
+        return new_path.segments[num_segments:]
+
+    def test_path_algorithm_is_used_in_time(self):
+        self.replanner = Replanner(StraightPathAlgorithm(0), self.cuts, self.rate, latency=2.0)
+        num_segments, commit_time = self.replanner.commit_point(self.path, self.position)
+        self.assertEqual(self.replan(), [Segment(self.path.segments[num_segments-1].end,
+            self.path.segments[num_segments-1].end + 500000 - commit_time)])
+        self.assertEqual(self.replanner.get_statistics()["path"], 1)
+
+    def test_fallback_is_used_when_path_algorithm_is_late(self):
+        self.replanner = Replanner(StraightPathAlgorithm(10), self.cuts, self.rate, latency=0.5)
+        for i in range(2): # the second time, the worker is still being replaced
+            tail = self.replan()
+            self.assertIsNotNone(tail)
+            jumps = set((cut.start, cut.end) for cut in self.cuts)
+            for a, b in zip(tail, tail[1:]):
+                self.assertTrue(a.end == b.start or (a.end, b.start) in jumps)
+        self.assertEqual(self.replanner.get_statistics(), {"path": 0, "fallback": 2, "unchanged": 0})
+        self.replanner.restarting[0].join()
+        self.assertIsNotNone(self.replanner.pools[0])
+
+    def test_path_is_kept_when_both_are_late(self):
+        self.replanner = Replanner(StraightPathAlgorithm(10), self.cuts, self.rate, fallback=StraightPathAlgorithm(10))
+        self.assertEqual(self.replanner.latency, 0.05)
+        for i in range(3):
+            self.assertIsNone(self.replan())
+        self.assertEqual(self.replanner.get_statistics(), {"path": 0, "fallback": 0, "unchanged": 3})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from collections import namedtuple
+
+from numpy.random import RandomState
+
+from algorithms.algorithm import Path, Segment
+from algorithms.repetition import RepetitionIndex
+from algorithms import scoring
+from algorithms.scoring import pack_paths, durations, overlaps, log_multiplicities, score_paths
+
+Penalties = namedtuple("Penalties", "duration_penalty cut_penalty repetition_penalty")
+
+def random_paths(rng, num_paths, max_segments, length=1000):
+    paths = []
+    for i in range(num_paths):
+        segments = []
+        for j in range(rng.randint(max_segments + 1)):
+            # reuse segments, so that there are repetitions
+            if segments and rng.rand() < 0.3:
+                segments.append(segments[rng.randint(len(segments))])
+            else:
+                start = rng.randint(length)
+                segments.append(Segment(start, start + 1 + rng.randint(length // 4)))
+        paths.append(Path(segments))
+    return paths
+
+class ScoringTest(unittest.TestCase):
+    def setUp(self):
+        self.paths = random_paths(RandomState(0), 50, 30)
+        self.segment_starts, self.segment_ends = pack_paths(self.paths)
+
+    def test_measures_match_repetition_index(self):
+        for path, duration, overlap, log_multiplicity in zip(self.paths, durations(self.segment_starts, self.segment_ends),
+                overlaps(self.segment_starts, self.segment_ends), log_multiplicities(self.segment_starts, self.segment_ends)):
+            index = RepetitionIndex(path.segments)
+            self.assertEqual(duration, path.duration)
+            self.assertEqual(overlap, index.overlap())
+            self.assertAlmostEqual(log_multiplicity, index.log_multiplicity)
+
+    def test_overlaps_in_chunks(self):
+        old_chunk_elements = scoring.CHUNK_ELEMENTS
+        try:
+            scoring.CHUNK_ELEMENTS = 100
+            chunked = overlaps(self.segment_starts, self.segment_ends)
+        finally:
+            scoring.CHUNK_ELEMENTS = old_chunk_elements
+        self.assertEqual(chunked.tolist(), overlaps(self.segment_starts, self.segment_ends).tolist())
+
+    def test_empty(self):
+        segment_starts, segment_ends = pack_paths([Path(), Path()])
+        self.assertEqual(overlaps(segment_starts, segment_ends).tolist(), [0, 0])
+        self.assertEqual(log_multiplicities(segment_starts, segment_ends).tolist(), [0, 0])
+
+    def test_metrics(self):
+        algo = Penalties(1e-3, 10.0, 2.0)
+        cut_costs = RandomState(1).rand(len(self.paths))
+        target_durations = 3000
+        for metric in ("cost_aware", "genetic", "loop"):
+            costs = score_paths(metric, algo, self.segment_starts, self.segment_ends, cut_costs, target_durations)
+            for path, cut_cost, cost in zip(self.paths, cut_costs, costs):
+                index = RepetitionIndex(path.segments)
+                if metric == "cost_aware":
+                    expected = algo.duration_penalty * (path.duration - 3000) ** 2 + algo.cut_penalty * cut_cost + \
+                            algo.repetition_penalty * (index.multiplicity() - 1)
+                elif metric == "genetic":
+                    expected = algo.duration_penalty * abs(path.duration - 3000) + algo.cut_penalty * cut_cost + \
+                            algo.repetition_penalty * index.overlap()
+                else:
+                    expected = algo.duration_penalty * (path.duration - 3000) ** 2 + algo.cut_penalty * cut_cost + \
+                            algo.repetition_penalty * (index.multiplicity() - 1) ** 0.5
+                self.assertAlmostEqual(cost / expected, 1)
+        self.assertRaises(ValueError, score_paths, "unknown", algo, self.segment_starts, self.segment_ends, cut_costs, target_durations)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from itertools import islice
+
+from algorithms.path.stream import StreamingPathAlgorithm
+from helpers import random_cuts
+
+class StreamingPathTest(unittest.TestCase):
+    def setUp(self):
+        self.algo = StreamingPathAlgorithm(lookahead=4, beam_width=5)
+        self.cuts = random_cuts(30, 40000, seed=2)
+
+    def test_path_has_target_duration(self):
+        path = self.algo([0, 40000], [0, 100000], self.cuts)
+        self.assertEqual(path.duration, 100000)
+        self.assertEqual(path.segments[0].start, 0)
+        jumps = set((cut.start, cut.end) for cut in self.cuts)
+        for a, b in zip(path.segments, path.segments[1:]):
+            self.assertIn((a.end, b.start), jumps)
+        self.assertEqual(path.keypoints[-1].source, path.segments[-1].end)
+
+    def test_zero_target_duration(self):
+        path = self.algo([0, 40000], [500, 500], self.cuts)
+        self.assertEqual(path.segments, [])
+        self.assertEqual(path.duration, 0)
+        self.assertEqual([(k.source, k.target) for k in path.keypoints], [(0, 500), (0, 500)])
+
+    def test_stream_stays_within_source(self):
+        for segment in islice(self.algo.stream(0, 40000, self.cuts), 200):
+            self.assertTrue(0 <= segment.start < segment.end <= 40000)
+
+if __name__ == "__main__":
+    unittest.main()
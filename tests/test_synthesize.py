@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+from numpy.random import RandomState
+from scipy.io import wavfile
+
+from algorithms.algorithm import CutsAlgorithm, cuts_fingerprint
+from algorithms.datafile import read_datafile
+from algorithms.path.beam import BeamPathAlgorithm
+from helpers import random_cuts
+
+try:
+    import synthesize
+except ImportError: # needs matplotlib
+    synthesize = None
+
+class RandomCutsAlgorithm(CutsAlgorithm):
+    # number of times cuts have been computed
+    calls = 0
+
+    def __init__(self, seed=0):
+        self.seed = seed
+
+    def __call__(self, data):
+        RandomCutsAlgorithm.calls += 1
+        return random_cuts(40, len(data), seed=self.seed, min_jump=5000)
+
+@unittest.skipIf(synthesize is None, "matplotlib is not available")
+class StalePathTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.infilename = os.path.join(self.directory, "in.wav")
+        self.pathfilename = os.path.join(self.directory, "out.path")
+        self.data = RandomState(0).randint(-1000, 1000, 88200).astype(numpy.int16)
+        wavfile.write(self.infilename, 44100, self.data)
+        os.utime(self.infilename, (0, 0)) # older than all files written by the tests
+
+        RandomCutsAlgorithm.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def synthesize(self, seed, cutsfilename=None, cache_dir=None, outfilename=None):
+        synthesize.main(self.infilename, cutsfilename, self.pathfilename, outfilename, [0, None], [0, 3], RandomCutsAlgorithm(seed),
+                BeamPathAlgorithm(beam_width=10), cache_dir=cache_dir)
+        return read_datafile(self.pathfilename)["cuts_fingerprint"]
+
+    def expected_fingerprint(self, seed):
+        return cuts_fingerprint(random_cuts(40, len(self.data), seed=seed, min_jump=5000))
+
+    def test_path_is_recomputed_for_changed_cuts_algorithm(self):
+        self.assertEqual(self.synthesize(0), self.expected_fingerprint(0))
+        self.assertEqual(self.synthesize(1), self.expected_fingerprint(1))
+        self.assertEqual(RandomCutsAlgorithm.calls, 2)
+
+    def test_path_is_recomputed_for_cached_cuts(self):
+        cache_dir = os.path.join(self.directory, "cache")
+        self.synthesize(1, cache_dir=cache_dir)
+        self.assertEqual(self.synthesize(0, cache_dir=cache_dir), self.expected_fingerprint(0))
+        self.assertEqual(self.synthesize(1, cache_dir=cache_dir), self.expected_fingerprint(1))
+        self.assertEqual(RandomCutsAlgorithm.calls, 2)
+
+    def test_path_is_recomputed_for_changed_cut_file(self):
+        cutsfilename = os.path.join(self.directory, "out.cuts")
+        self.synthesize(0, cutsfilename)
+        self.assertEqual(self.synthesize(1, cutsfilename), self.expected_fingerprint(1))
+
+    def test_fresh_path_is_kept_without_computing_cuts(self):
+        self.synthesize(0)
+        os.utime(self.pathfilename, (1000, 1000))
+        self.assertEqual(self.synthesize(0, outfilename=os.path.join(self.directory, "out.wav")), self.expected_fingerprint(0))
+        self.assertEqual(os.stat(self.pathfilename).st_mtime, 1000)
+        self.assertEqual(RandomCutsAlgorithm.calls, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+
+from numpy import asarray
+
+from algorithms.algorithm import Path, Segment, Cut, Keypoint
+from algorithms.path.beam import BeamPathAlgorithm
+from algorithms.path.genetic import GeneticPathAlgorithm, CutTable
+from algorithms.path.greedy import GreedyPathAlgorithm, CostAwarePath
+from algorithms.path.jumpgraph import JumpGraph
+from algorithms.path.loop import LoopPathAlgorithm, warm_loop
+from helpers import random_cuts, check_path
+
+class WarmPieceTest(unittest.TestCase):
+    def setUp(self):
+        self.cuts = [Cut(3000, 1000, 0.5), Cut(5000, 8000, 0.25), Cut(9000, 2000, 0.1)]
+        self.algo = BeamPathAlgorithm()
+        # plays 0-3000, 1000-5000, 8000-9000, 2000-10000
+        self.algo.warm_start = Path([Segment(0, 3000), Segment(1000, 5000), Segment(8000, 9000), Segment(2000, 10000)])
+
+    def piece(self, source_start, source_end, cuts=None):
+        return self.algo.warm_piece(source_start, source_end, self.cuts if cuts is None else cuts)
+
+    def test_without_warm_start(self):
+        self.algo.warm_start = None
+        self.assertIsNone(self.piece(0, 10000))
+
+    def test_whole_path(self):
+        self.assertEqual(self.piece(0, 10000), self.algo.warm_start.segments)
+
+    def test_within_one_segment(self):
+        self.assertEqual(self.piece(500, 2500), [Segment(500, 2500)])
+        self.assertEqual(self.piece(0, 3000), [Segment(0, 3000)])
+
+    def test_pieces_are_cut_at_the_first_passes(self):
+        # 2500 is first passed in the first segment, 4000 is reached in the second one after jumping back
+        self.assertEqual(self.piece(2500, 4000), [Segment(2500, 3000), Segment(1000, 4000)])
+        # the end has to be reached after the start, 2500 is next reached in the last segment
+        self.assertEqual(self.piece(4000, 2500), [Segment(4000, 5000), Segment(8000, 9000), Segment(2000, 2500)])
+        # a start at the end of a segment belongs to the segment that starts there
+        self.assertEqual(self.piece(3000, 9000)[0], Segment(3000, 5000))
+        self.assertEqual(self.piece(8500, 9000), [Segment(8500, 9000)])
+
+    def test_unreachable_points(self):
+        self.algo.warm_start = Path(self.algo.warm_start.segments[:2])
+        self.assertIsNone(self.piece(6000, 10000)) # never played
+        self.assertIsNone(self.piece(0, 10500)) # beyond the end
+        self.assertIsNone(self.piece(4500, 3000)) # not reached after the start
+
+    def test_jumps_must_be_cuts(self):
+        self.assertIsNone(self.piece(0, 10000, self.cuts[:2]))
+        self.assertEqual(self.piece(0, 4000, self.cuts[:1]), [Segment(0, 3000), Segment(1000, 4000)])
+
+class WarmGreedyTest(unittest.TestCase):
+    def setUp(self):
+        self.cuts = random_cuts(40, 100000, seed=8, min_jump=5000)
+
+    def test_result_is_not_worse_than_warm_piece(self):
+        # the path of a run with other keypoints as warm start
+        earlier = GreedyPathAlgorithm(num_paths=5)([0, 60000, 100000], [0, 50000, 140000], self.cuts)
+        for num_paths in [1, 5]:
+            algo = GreedyPathAlgorithm(num_paths=num_paths)
+            algo.warm_start = earlier
+            keypoints = [Keypoint(0, 0), Keypoint(100000, 130000)]
+            warm = algo.warm_path(0, 100000, self.cuts, keypoints)
+            self.assertIsNotNone(warm)
+            path = algo.find_path(0, 100000, 130000, self.cuts)
+            check_path(self, path, 0, 100000, self.cuts)
+            self.assertLessEqual(path.cost(), warm.cost())
+
+    def test_warm_start_is_not_worse_than_cold(self):
+        cold = GreedyPathAlgorithm(num_paths=3).find_path(0, 100000, 130000, self.cuts)
+        algo = GreedyPathAlgorithm(num_paths=1)
+        algo.warm_start = cold
+        self.assertLessEqual(algo.find_path(0, 100000, 130000, self.cuts).cost(), cold.cost())
+
+    def test_lower_bound_is_admissible(self):
+        algo = GreedyPathAlgorithm(num_paths=10)
+        keypoints = [Keypoint(0, 0), Keypoint(100000, 130000)]
+        graph = JumpGraph(self.cuts, 0, 100000)
+        graph.compute_bounds(130000)
+        costs = dict(((cut.start, cut.end), cut.cost) for cut in self.cuts)
+        for target_duration in [60000, 130000, 250000]:
+            path = algo.find_path(0, 100000, target_duration, self.cuts)
+            keypoints = [Keypoint(0, 0), Keypoint(100000, target_duration)]
+            graph.compute_bounds(target_duration)
+            segments = path.segments
+            for k in range(1, len(segments)):
+                cut_cost = sum(costs[a.end, b.start] for a, b in zip(segments[:k], segments[1:k]) if a.end != b.start)
+                prefix = CostAwarePath(algo, segments[:k], keypoints, cut_cost)
+                self.assertLessEqual(algo.lower_bound(prefix, graph, target_duration), path.cost() * (1 + 1e-9))
+
+class WarmGeneticTest(unittest.TestCase):
+    def test_warm_piece_is_initial_individual(self):
+        cuts = random_cuts(40, 100000, seed=8, min_jump=5000)
+        warm = GreedyPathAlgorithm(num_paths=3).find_path(0, 100000, 130000, cuts)
+        algo = GeneticPathAlgorithm(num_individuals=5, random_seed=0)
+        table = CutTable(cuts, 0, 100000)
+        genes, lengths = algo.initial_genes(table, 0, 100000, cuts)
+        self.assertEqual(lengths.tolist(), [0] * 5)
+        algo.warm_start = warm
+        genes, lengths = algo.initial_genes(table, 0, 100000, cuts)
+        self.assertEqual(lengths.tolist(), [len(table.encode(warm.segments))] + [0] * 4)
+        self.assertEqual(genes[0].tolist(), table.encode(warm.segments))
+        self.assertTrue((genes[1:] == -1).all())
+        # the genetic algorithm keeps the best individual, so it does not get worse than the warm start
+        algo.report = lambda generation, population: None
+        algo.num_generations = 2
+        self.assertLessEqual(algo.find_path(0, 100000, 130000, cuts).cost(), table_cost(algo, table, warm, 130000) * (1 + 1e-9))
+
+def table_cost(algo, table, path, target_duration):
+    from algorithms.path.genetic import Population
+    genes = table.encode(path.segments)
+    return Population(algo, table, target_duration, asarray([genes], dtype=int).reshape(1, len(genes)), asarray([len(genes)])).costs[0]
+
+class WarmLoopTest(unittest.TestCase):
+    def test_warm_loop_plays_the_same(self):
+        cuts = random_cuts(20, 40000, seed=4)
+        algo = LoopPathAlgorithm(random_seed=0, iterations=3)
+        path = algo.find_path(0, 40000, 80000, cuts)
+        automaton, start_segment, end_segment, graph, loops = algo.get_loop_table(0, 40000, cuts)
+        loop = warm_loop(graph, path.segments)
+        self.assertIsNotNone(loop)
+        self.assertEqual(sum(segment.duration for segment in loop.path), path.duration)
+        self.assertEqual(loop.path[0].start, 0)
+        self.assertEqual(loop.path[-1].end, 40000)
+        # a jump that is no cut
+        self.assertIsNone(warm_loop(graph, [Segment(0, 1000), Segment(30000, 40000)]))
+
+if __name__ == "__main__":
+    unittest.main()